@@ -0,0 +1,169 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Event-driven achievements with persistent progress, shared by both games.
+#
+# The game reports what happens with tracker.record(event, amount); every
+# event is a lifetime counter in the stats. An Achievement names the events
+# it depends on and a condition over the stats, and is evaluated only when
+# one of those events is recorded (and never again once unlocked), so nothing
+# is polled per frame. record() returns the achievements it unlocked for the
+# game to announce.
+#
+# StatsStore keeps stats and unlocks in a JSON file, write-behind: save()
+# only hands the newest snapshot to a writer thread, which waits `delay`
+# seconds to batch further changes into one write, then writes a temp file
+# in the same directory, fsyncs it and renames it over the old one, so the
+# file is always either the old or the new version. close() flushes. A store
+# without a path keeps nothing. A read-only store loads the file but never
+# writes it; replays, spectators, network guests and attract mode use one,
+# and their tracker shows the saved trophies but records nothing, so a match
+# that was already played isn't counted or announced again.
+
+VERSION = 1
+
+
+class Achievement:
+    # condition(stats) gets the stats Counter (missing events count 0)
+    def __init__(self, name, desc, events, condition):
+        self.name = name
+        self.desc = desc
+        self.events = events
+        self.condition = condition
+
+
+# An achievement for reaching `target` of a single event
+def milestone(name, desc, event, target):
+    return Achievement(name, desc, (event,), lambda stats: stats[event] >= target)
+
+
+class StatsStore:
+    def __init__(self, path, delay=2.0, read_only=False):
+        self.path = path
+        self.delay = delay
+        self.read_only = read_only
+        self.pending = None
+        self.closed = False
+        self.writes = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        if path and not read_only:
+            self.thread = threading.Thread(target=self._run, name="stats", daemon=True)
+            self.thread.start()
+
+    def load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable stats file {self.path}: {e}", file=sys.stderr)
+            return {}
+        return data if data.get("version") == VERSION else {}
+
+    # Never blocks on the disk; a newer snapshot replaces an unwritten one
+    def save(self, data):
+        if not self.path or self.read_only:
+            return
+        with self.condition:
+            if self.pending is None:
+                self.condition.notify()  # a batch in progress just takes the newer data
+            self.pending = data
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                deadline = time.monotonic() + self.delay
+                while not self.closed and time.monotonic() < deadline:
+                    self.condition.wait(deadline - time.monotonic())
+                data, self.pending = self.pending, None
+            try:
+                self._write(data)
+            except OSError as e:
+                print(f"Couldn't save stats to {self.path}: {e}", file=sys.stderr)
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(prefix=".stats-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self.writes += 1
+
+    def close(self):
+        if self.thread is None:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+
+class AchievementTracker:
+    def __init__(self, achievements, store):
+        self.achievements = achievements
+        self.store = store
+        data = store.load()
+        self.stats = Counter(data.get("stats", {}))
+        self.unlocked = dict(data.get("unlocked", {}))  # name -> unix time
+        self.watchers = {}  # event -> locked achievements that depend on it
+        for achievement in achievements:
+            if achievement.name not in self.unlocked:
+                for event in achievement.events:
+                    self.watchers.setdefault(event, []).append(achievement)
+
+    def record(self, event, amount=1):
+        if self.store.read_only:
+            return []
+        self.stats[event] += amount
+        unlocked = [a for a in self.watchers.get(event, ()) if a.condition(self.stats)]
+        for achievement in unlocked:
+            self.unlocked[achievement.name] = int(time.time())
+            for watched in achievement.events:
+                self.watchers[watched].remove(achievement)
+        self.store.save({"version": VERSION, "stats": dict(self.stats), "unlocked": dict(self.unlocked)})
+        return unlocked
+
+    def is_unlocked(self, name):
+        return name in self.unlocked
+
+    def close(self):
+        self.store.close()
+
+
+def default_path(game):
+    return os.path.join(os.path.expanduser("~"), ".xaigames", f"{game}-stats.json")
+
+
+# The store for this run: --stats FILE or the per-user default, read-only
+# when the run isn't real play, or nothing when saving is off
+def open_store(args, game, playing=True):
+    if args.no_stats:
+        return StatsStore(None)
+    return StatsStore(args.stats or default_path(game), read_only=not playing)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    group = parser.add_argument_group("achievements")
+    group.add_argument("--stats", metavar="FILE", help="file for stats and trophies (default: ~/.xaigames/GAME-stats.json)")
+    group.add_argument("--no-stats", action="store_true", help="don't load or save stats and trophies")
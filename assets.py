@@ -0,0 +1,85 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Deferred asset loading and startup timing.
+#
+# The games put the first frame on screen before doing anything that isn't
+# needed for it. Work that doesn't touch shared game state (sound synthesis,
+# the star layers, the gradient background) is handed to BackgroundLoader,
+# which holds it until start() is called after that frame and then runs it on
+# one worker thread, mostly while the game loop sleeps in clock.tick (holding
+# it back matters: under the GIL the worker would otherwise slow the first
+# frame down rather than overlap with it). The main loop polls ready() and
+# swaps results in, or blocks in get() if it needs one before it's done.
+# StartupReport records named milestones relative to launch for
+# --startup-report.
+
+
+class StartupReport:
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.origin))
+
+    def print(self, file=sys.stdout):
+        print("Startup (ms since launch):", file=file)
+        for name, elapsed in sorted(self.marks, key=lambda mark: mark[1]):
+            print(f"{elapsed * 1000:9.1f}  {name}", file=file)
+
+
+class BackgroundLoader:
+    def __init__(self, report=None):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+        self.jobs = {}
+        self.deferred = []
+        self.started = False
+        self.report = report
+
+    def submit(self, name, build, *args):
+        if self.started:
+            self.jobs[name] = self.executor.submit(self._run, name, build, args)
+        else:
+            self.deferred.append((name, build, args))
+
+    def start(self):
+        self.started = True
+        for name, build, args in self.deferred:
+            self.submit(name, build, *args)
+        self.deferred = []
+
+    def _run(self, name, build, args):
+        result = build(*args)
+        if self.report:
+            self.report.mark(name)
+        return result
+
+    def ready(self, name):
+        job = self.jobs.get(name)
+        return job is not None and job.done()
+
+    # Waits for the job if it is still running; re-raises its exception
+    def get(self, name):
+        if not self.started:
+            self.start()
+        return self.jobs[name].result()
+
+    # get(), then forget the job so its result can be freed
+    def take(self, name):
+        result = self.get(name)
+        del self.jobs[name]
+        return result
+
+    def idle(self):
+        return self.started and all(job.done() for job in self.jobs.values())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long startup steps took once all assets are loaded")
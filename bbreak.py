@@ -1,12 +1,75 @@
+import time
+launch_time = time.perf_counter()  # startup report baseline, before the heavy imports
 import pygame
 import sys
+import os
 import numpy as np
 import random
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+import argparse
+from text_cache import TextCache
+from brick_layer import BrickLayer
+from dirty_rects import DirtyRenderer, NullRenderer
+from timestep import FixedTimestep, lerp_point, substep_count
+from profiler import FrameProfiler, DEFAULT_EXPORT, OVERLAY_SIZE
+from assets import BackgroundLoader, StartupReport
+from sound_bank import SoundBank, VoicePool
+import replay
+import profiler
+import assets
+import spectate
+import resolution
+import levels
+import achievements
+import multiball
+import pacing
+import capture
+
+# Command line
+parser = argparse.ArgumentParser(description="Breakout PS1")
+parser.add_argument("--dirty-rects", action="store_true", help="redraw and present only changed regions")
+parser.add_argument("--fps", type=int, default=60, help="render frame cap, 0 for uncapped (physics always runs at SIM_RATE)")
+parser.add_argument("--autopilot", action="store_true", help="paddle tracks the ball (attract mode, benchmarks)")
+parser.add_argument("--brick-rows", type=int, default=5, help="rows of bricks on the board")
+parser.add_argument("--brick-columns", type=int, default=10, help="columns of bricks on the board")
+parser.add_argument("--multiball", type=int, default=0, metavar="N", help="stress mode: play with N balls at once")
+replay.add_arguments(parser)
+profiler.add_arguments(parser)
+assets.add_arguments(parser)
+spectate.add_arguments(parser)
+resolution.add_arguments(parser)
+levels.add_arguments(parser)
+achievements.add_arguments(parser)
+pacing.add_arguments(parser)
+capture.add_arguments(parser)
+args = parser.parse_args()
+if args.dirty_rects and (args.window or args.fullscreen):
+    parser.error("--dirty-rects draws straight to an unscaled window; it can't be combined with --window or --fullscreen")
+if args.spectate and (args.broadcast is not None or args.replay or args.record):
+    parser.error("--spectate only watches; it can't be combined with broadcasting or replays")
+if args.headless:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+# Session seed: drives the ball's random serve direction, so a replay's seed
+# plus its recorded inputs reproduce the session exactly
+replay_reader = replay.ReplayReader(args.replay) if args.replay else None
+if replay_reader:
+    if replay_reader.game != "breakout":
+        parser.error(f"{args.replay} is a {replay_reader.game} replay")
+    seed = replay_reader.seed
+elif args.seed is not None:
+    seed = args.seed
+else:
+    seed = random.randrange(2**63)
+random.seed(seed)
+
+# Initialize Pygame: only what the first frame needs. Audio is opened after
+# that frame is on screen and the sounds are synthesized on a loader thread
+startup = StartupReport(launch_time)
+startup.mark("imports")
+pygame.display.init()
 pygame.font.init()
+loader = BackgroundLoader(startup)
 
 # Screen dimensions
 SCREEN_WIDTH = 800
@@ -29,53 +92,84 @@ BALL_SPEED_Y = 5
 # Brick settings
 BRICK_WIDTH = 75
 BRICK_HEIGHT = 30
-BRICK_ROWS = 5
-BRICK_COLUMNS = 10
+BRICK_ROWS = args.brick_rows
+BRICK_COLUMNS = args.brick_columns
 BRICK_GAP = 5
 
-# Fonts
-font = pygame.font.SysFont(None, 50)
-small_font = pygame.font.SysFont(None, 30)
-
-# Function to generate beep sound using NumPy
-def generate_beep(freq=880, duration=0.1):
-    sample_rate = 44100
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    tone = np.sin(freq * t * 2 * np.pi)
-    audio = np.hstack((tone, tone))  # Stereo
-    audio = (audio * 32767).astype(np.int16)  # Scale to int16
-    return pygame.mixer.Sound(buffer=audio.tobytes())
-
-# Function to generate boop sound using NumPy
-def generate_boop(freq=440, duration=0.1):
-    sample_rate = 44100
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    tone = np.sin(freq * t * 2 * np.pi)
-    audio = np.hstack((tone, tone))  # Stereo
-    audio = (audio * 32767).astype(np.int16)  # Scale to int16
-    return pygame.mixer.Sound(buffer=audio.tobytes())
-
-# Sounds
-beep_sound = generate_beep()  # For brick collision
-boop_sound = generate_boop()  # For paddle/wall collision
-
-# Game setup
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Breakout Game")
+# Levels: a pack (see levels.py) or the classic BRICK_ROWS x BRICK_COLUMNS board.
+# The spectator brick mask covers the largest grid in the list.
+if args.levels:
+    try:
+        level_list = levels.open_levels(args.levels)
+        spectator_cells = levels.max_cells(level_list)
+    except (OSError, ValueError) as e:
+        parser.error(f"can't load {args.levels}: {e}")
+else:
+    try:
+        level_list = [levels.classic_level(BRICK_ROWS, BRICK_COLUMNS)]
+    except ValueError as e:
+        parser.error(str(e))
+    spectator_cells = levels.max_cells(level_list)
+if not 1 <= args.level <= len(level_list):
+    parser.error(f"--level must be between 1 and {len(level_list)}")
+
+# Physics settings
+SIM_RATE = 60  # Physics ticks per second, independent of the render rate
+MAX_SUBSTEP = min(PADDLE_HEIGHT, BALL_RADIUS * 2, BRICK_HEIGHT)  # Longest ball move per collision check (lowered for smaller bricks)
+
+# Fonts (the default font; SysFont(None) gives the same but scans the system fonts first)
+# The view maps logical coordinates to the current render scale (see resolution.py)
+view = resolution.View((SCREEN_WIDTH, SCREEN_HEIGHT))
+font = view.load_font(None, 50)
+small_font = view.load_font(None, 30)
+text_cache = TextCache()
+
+# Sound effects, synthesized together into one bank (see sound_bank.py)
+SOUND_EFFECTS = {
+    "beep": dict(freq=880, duration=0.1, volume=1.0, attack=0, decay=0, sustain_level=1, release=0),  # For brick collision
+    "boop": dict(freq=440, duration=0.1, volume=1.0, attack=0, decay=0, sustain_level=1, release=0),  # For paddle/wall collision
+}
+MAX_VOICES = 8  # Sound effects playing at once; a burst of brick hits reuses channels
+audio_ready = False
+voices = None
+
+def init_audio():
+    global audio_ready, voices
+    audio_ready = True
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    voices = VoicePool(MAX_VOICES)
+    startup.mark("audio")
+    loader.submit("sounds", SoundBank, SOUND_EFFECTS)
+
+def play_sound(name):
+    if not audio_ready:
+        init_audio()
+    voices.play(loader.get("sounds")[name])
+
+# Game setup: everything runs in SCREEN_WIDTH x SCREEN_HEIGHT logical
+# coordinates and is drawn through `view` into a window of any size
+display = resolution.Display((SCREEN_WIDTH, SCREEN_HEIGHT), "Breakout Game", args.window, args.fullscreen,
+                             resizable=not args.dirty_rects)
+screen = display.surface
 
 clock = pygame.time.Clock()
+startup.mark("window")
+
+# Per-phase frame timings (F3 overlay, F4 export, see profiler.py)
+frame_profiler = FrameProfiler(("events", "input", "physics", "submit", "draw", "present", "wait"))
+frame_profiler.visible = args.profile
+profile_rect = pygame.Rect((SCREEN_WIDTH - OVERLAY_SIZE[0] - 10, SCREEN_HEIGHT - OVERLAY_SIZE[1] - 40), OVERLAY_SIZE)
 
 # Paddle class
 class Paddle:
     def __init__(self):
         self.rect = pygame.Rect((SCREEN_WIDTH - PADDLE_WIDTH) // 2, SCREEN_HEIGHT - PADDLE_HEIGHT - 10, PADDLE_WIDTH, PADDLE_HEIGHT)
 
-    def update(self):
-        mouse_x = pygame.mouse.get_pos()[0]
+    def update(self, mouse_x):
         self.rect.centerx = max(PADDLE_WIDTH // 2, min(SCREEN_WIDTH - PADDLE_WIDTH // 2, mouse_x))
 
-    def draw(self):
-        pygame.draw.rect(screen, WHITE, self.rect)
+    def draw(self, surface):
+        pygame.draw.rect(surface, WHITE, view.rect(self.rect))
 
 # Ball class
 class Ball:
@@ -84,69 +178,272 @@ class Ball:
         self.dx = random.choice([-BALL_SPEED_X, BALL_SPEED_X])
         self.dy = -BALL_SPEED_Y
 
-    def move(self):
-        self.rect.x += self.dx
-        self.rect.y += self.dy
-
-    def draw(self):
-        pygame.draw.circle(screen, RED, self.rect.center, BALL_RADIUS)
+    def draw(self, surface, center):
+        pygame.draw.circle(surface, RED, view.point(center), view.length(BALL_RADIUS))
 
     def bounce_x(self):
         self.dx = -self.dx
-        boop_sound.play()  # Boop on wall bounce
+        play_sound("boop")  # Boop on wall bounce
 
     def bounce_y(self):
         self.dy = -self.dy
 
-# Brick class
+# Brick class: the kind picks the colour, each hit point beyond the first
+# shows as an inset outline
+BRICK_COLORS = [WHITE, (255, 170, 0), (0, 200, 255), (120, 255, 120), (255, 90, 200)]
+
 class Brick:
-    def __init__(self, x, y):
-        self.rect = pygame.Rect(x, y, BRICK_WIDTH, BRICK_HEIGHT)
-
-    def draw(self):
-        pygame.draw.rect(screen, WHITE, self.rect)
-
-# Function to create bricks
-def create_bricks():
-    bricks = []
-    for row in range(BRICK_ROWS):
-        for col in range(BRICK_COLUMNS):
-            x = col * (BRICK_WIDTH + BRICK_GAP) + BRICK_GAP
-            y = row * (BRICK_HEIGHT + BRICK_GAP) + BRICK_GAP + 50
-            bricks.append(Brick(x, y))
-    return bricks
+    def __init__(self, x, y, width=BRICK_WIDTH, height=BRICK_HEIGHT, kind=1, hp=1, index=0):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.kind = kind
+        self.hp = hp
+        self.index = index  # cell number on the level's grid
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, BRICK_COLORS[(self.kind - 1) % len(BRICK_COLORS)], view.rect(self.rect))
+        for i in range(1, self.hp):
+            inset = self.rect.inflate(-6 * i, -6 * i)
+            if inset.width <= 0 or inset.height <= 0:
+                break
+            pygame.draw.rect(surface, BLACK, view.rect(inset), view.length(1))
+
+# A level's bricks from its board arrays (see levels.py); runs on the loader
+# thread when the level is preloaded
+def prepare_level(board):
+    columns = (board.x.tolist(), board.y.tolist(), board.kind.tolist(), board.hp.tolist(), board.index.tolist())
+    bricks = [Brick(x, y, board.brick_width, board.brick_height, kind, hp, index) for x, y, kind, hp, index in zip(*columns)]
+    return board, bricks
 
 # Initial game objects (placeholders)
 bricks = []
+level_board = None
+max_substep = MAX_SUBSTEP
 paddle = Paddle()
 ball = Ball()
 
-# PS1-inspired features: achievements, session tracking
+# PS1-inspired features: session tracking, and trophies unlocked by game
+# events with progress saved across sessions (see achievements.py)
 total_bricks_broken = 0
 lost_balls = 0
 has_won = False
-achievements = {
-    "Brick Buster": {"desc": "Break 10 bricks", "condition": lambda: total_bricks_broken >= 10, "unlocked": False},
-    "Butterfingers": {"desc": "Lose 5 balls", "condition": lambda: lost_balls >= 5, "unlocked": False},
-    "Champion": {"desc": "Win the game", "condition": lambda: has_won, "unlocked": False},
+TROPHIES = [
+    achievements.milestone("Brick Buster", "Break 10 bricks", "bricks_broken", 10),
+    achievements.milestone("Butterfingers", "Lose 5 balls", "balls_lost", 5),
+    achievements.milestone("Champion", "Win the game", "wins", 1),
     # Add more PS1-style unlocks (e.g., survival, score-based)
-    "Survivor": {"desc": "Lose 10 balls without winning", "condition": lambda: lost_balls >= 10 and not has_won, "unlocked": False},
-    "Brick Master": {"desc": "Break 50 bricks", "condition": lambda: total_bricks_broken >= 50, "unlocked": False},
-}
+    achievements.Achievement("Survivor", "Lose 10 balls without winning", ("balls_lost", "wins"),
+                             lambda stats: stats["balls_lost"] >= 10 and not stats["wins"]),
+    achievements.milestone("Brick Master", "Break 50 bricks", "bricks_broken", 50),
+    achievements.milestone("Level Climber", "Clear 10 levels", "levels_cleared", 10),
+]
+trophies = achievements.AchievementTracker(TROPHIES, achievements.open_store(
+    args, "breakout", playing=not (args.replay or args.spectate or args.autopilot)))
+
+def record(event, amount=1):
+    for trophy in trophies.record(event, amount):
+        print(f"Trophy unlocked: {trophy.name}")
+
+# Renderer: full redraw at the current render scale, or dirty rects against
+# the black background (unscaled). During play the background is the brick
+# layer, with the whole wall drawn into it (see brick_layer.py)
+background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+background.fill(BLACK)
+brick_layer = BrickLayer(background, view)
+
+# Levels are played in order; the next one is built on the loader thread
+campaign = levels.Campaign(level_list, loader, prepare_level, args.level - 1)
+
+# Multiball stress mode (see multiball.py): every ball in NumPy arrays, and
+# bricks found through the level's cell grid instead of scanning the list
+swarm = brick_grid = None
+level_bricks = []  # the level's bricks in grid order, including broken ones
+if args.multiball:
+    swarm = multiball.BallSwarm(args.multiball, BALL_RADIUS * 2, (BALL_SPEED_X, BALL_SPEED_Y),
+                                (SCREEN_WIDTH, SCREEN_HEIGHT), np.random.default_rng(random.getrandbits(64)))
+
+def start_level():
+    global bricks, level_board, level_bricks, brick_grid, max_substep, ball, prev_ball
+    level_board, bricks = campaign.current()
+    level_bricks = list(bricks)
+    max_substep = min(MAX_SUBSTEP, level_board.brick_height)
+    brick_layer.reset(bricks)
+    renderer.invalidate()
+    ball = Ball()
+    prev_ball = ball.rect.topleft
+    if swarm:
+        brick_grid = multiball.BrickGrid(level_board, BALL_RADIUS * 2)
+        swarm.serve()
+
+# Win condition, checked after every tick: on to the next level, or the
+# campaign is won
+def check_cleared():
+    global has_won, game_state
+    if bricks:
+        return
+    record("levels_cleared")
+    if campaign.advance():
+        print(f"Level cleared! Next: {campaign.name()}")
+        start_level()
+        return
+    print("You Win!")
+    has_won = True
+    record("wins")
+    game_state = "menu"
+
+# One tick of every ball in the swarm; ball 0 stands in for `ball` (for spectators)
+def multiball_tick():
+    global total_bricks_broken, lost_balls, prev_ball
+    paddle.update(int(swarm.x[swarm.lowest_falling()]) + BALL_RADIUS if args.autopilot else controls.mouse[0])
+    walls, paddle_hits, lost, hit, broken = swarm.step(paddle.rect, brick_grid, max_substep)
+    if walls or paddle_hits:
+        play_sound("boop")
+    if len(hit):
+        play_sound("beep")
+    for i in hit.tolist():
+        brick = level_bricks[i]
+        brick.hp = int(brick_grid.hp[i])
+        renderer.invalidate(brick_layer.redraw(brick) if brick.hp > 0 else brick_layer.remove(brick))
+    if len(broken):
+        bricks[:] = [brick for brick in bricks if brick.hp > 0]  # in place: the brick layer holds this list
+        total_bricks_broken += len(broken)
+        record("bricks_broken", len(broken))
+    if lost:
+        lost_balls += lost
+        record("balls_lost", lost)
+    ball.rect.topleft = prev_ball = (int(swarm.x[0]), int(swarm.y[0]))
+
+def build_ball_sprite():
+    radius = view.length(BALL_RADIUS)
+    sprite = pygame.Surface((radius * 2 + 2, radius * 2 + 2)).convert()
+    pygame.draw.circle(sprite, RED, (radius + 1, radius + 1), radius)
+    sprite.set_colorkey(BLACK, pygame.RLEACCEL)
+    return sprite
+
+# All the swarm's balls in one blits() call, drawn like Ball.draw
+def draw_balls(surface, x, y):
+    sprite = view.cached("ball_sprite", build_ball_sprite)
+    offset = view.length(BALL_RADIUS) + 1
+    x = x + BALL_RADIUS
+    y = y + BALL_RADIUS
+    if not view.identity:
+        x = np.rint(x * view.scale).astype(np.int64)
+        y = np.rint(y * view.scale).astype(np.int64)
+    surface.blits([(sprite, pos) for pos in zip((x - offset).tolist(), (y - offset).tolist())], doreturn=False)
+scaler = None
+if args.replay and args.fast_forward:
+    renderer = NullRenderer(screen, background)
+elif args.dirty_rects:
+    renderer = DirtyRenderer(screen, background)
+else:
+    budget = args.frame_budget / 1000 if args.frame_budget else 0.9 / (args.fps or SIM_RATE)
+    # Replays render at a fixed resolution so their output doesn't depend on timing
+    mode = "native" if args.replay and args.resolution == "auto" else args.resolution
+    scaler = resolution.ResolutionScaler(display, view, budget, mode)
+    renderer = resolution.ScaledRenderer(display, view, background)
+
+def draw_text(surface, text_font, text, color, pos):
+    surface.blit(text_cache.render(view.font(text_font), text, color), view.point(pos))
+
+def draw_profiler(surface):
+    area = view.rect(profile_rect)
+    frame_profiler.draw(surface, area.topleft, area.size)
+
+# Submit a cached text line as a sprite (laid out with the logical font,
+# drawn with the scaled one)
+def text_sprite(key, text_font, text, color, pos):
+    rendered = text_cache.render(text_font, text, color)
+    renderer.sprite(key, rendered.get_rect(topleft=pos), (text, color), draw_text, text_font, text, color, pos)
 
 # Menu setup (PS1 main menu style: simple navigation)
 game_state = "menu"
 options = ["Start Game", "Trophies", "Exit"]
 selected_option = 0
 
+# Timing: physics at SIM_RATE, rendering at up to --fps with interpolation
+timestep = FixedTimestep(SIM_RATE)
+frame_time = 0.0
+# Frame pacing (see pacing.py): the menu and trophies screens only change on input
+pacer = pacing.from_args(args, clock, timestep, ("menu", "trophies"))
+# Frame capture (see capture.py): presented frames go to a writer thread
+frame_capture = capture.from_args(args, args.fps or SIM_RATE)
+prev_ball = ball.rect.topleft
+
+# Input: live (optionally recorded) or played back from a replay
+if replay_reader:
+    controls = replay.PlaybackControls(timestep, replay_reader)
+else:
+    controls = replay.LiveControls(timestep, replay.ReplayWriter(args.record, "breakout", seed, SIM_RATE) if args.record else None)
+controls.map_mouse = display.to_logical
+
+# Spectators (see spectate.py): --broadcast streams this match, --spectate
+# watches one, drawn with the normal drawing code. Spectators of a pack need
+# the same --levels
+SPECTATOR_FIELDS = ("tick", "level", "ball_x", "ball_y", "paddle_x", "selected", "bricks_broken", "lost_balls", "won")
+broadcaster = feed = None
+if args.broadcast is not None:
+    broadcaster = spectate.BroadcastServer("breakout", SPECTATOR_FIELDS, ("menu", "trophies", "game"), args.broadcast,
+                                           args.broadcast_rate, bricks=spectator_cells,
+                                           layout={"rows": BRICK_ROWS, "columns": BRICK_COLUMNS})
+    print(f"Broadcasting on TCP port {broadcaster.port}")
+elif args.spectate:
+    feed = spectate.FeedReader(spectate.parse_address(args.spectate, spectate.DEFAULT_PORT), "breakout")
+feed_bricks = None  # the full board, filtered by each frame's brick mask
+feed_level = None
+mask_cache = (None, None, b"")  # bricks list, its length, the mask
+
+def remaining_bricks_mask():
+    global mask_cache
+    if mask_cache[:2] != (id(bricks), len(bricks)):
+        alive = {brick.index for brick in bricks}
+        mask_cache = (id(bricks), len(bricks), spectate.brick_mask(i in alive for i in range(spectator_cells)))
+    return mask_cache[2]
+
+def watch_feed():
+    global game_state, bricks, feed_bricks, feed_level, selected_option, total_bricks_broken, lost_balls, has_won, prev_ball, running
+    frame = feed.poll()
+    if feed.closed:
+        print("Broadcast ended")
+        running = False
+    if frame is None:
+        return
+    if frame["level"] != feed_level:
+        feed_level = frame["level"]
+        layout = feed.hello["layout"]
+        if args.levels:
+            level = level_list[min(feed_level, len(level_list) - 1)]
+        else:
+            level = levels.classic_level(layout.get("rows", BRICK_ROWS), layout.get("columns", BRICK_COLUMNS))
+        feed_bricks = prepare_level(levels.build_board(level))[1]
+    game_state = frame["state"]
+    selected_option = frame["selected"]
+    total_bricks_broken, lost_balls, has_won = frame["bricks_broken"], frame["lost_balls"], bool(frame["won"])
+    ball.rect.topleft = prev_ball = (frame["ball_x"], frame["ball_y"])
+    paddle.rect.x = frame["paddle_x"]
+    bricks = [brick for brick, live in zip(feed_bricks, frame["bricks"]) if live]
+    for rect in brick_layer.sync(bricks):
+        renderer.invalidate(rect)
+
 # Game loop
 running = True
+report_pending = args.startup_report
 while running:
-    screen.fill(BLACK)
-
-    for event in pygame.event.get():
+    frame_start = time.perf_counter()
+    frame_profiler.start_frame()
+    events = controls.poll(frame_time)
+    if feed:
+        watch_feed()
+    frame_profiler.mark("events")
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
+        if event.type == pygame.VIDEORESIZE and scaler:
+            scaler.window_resized()
+        if event.type == pygame.KEYDOWN and frame_profiler.handle_key(event.key, args.profile_out or DEFAULT_EXPORT):
+            continue
+        if event.type == pygame.KEYDOWN and feed:
+            if event.key == pygame.K_ESCAPE:
+                running = False
+            continue
         if event.type == pygame.KEYDOWN:
             if game_state == "menu":
                 if event.key == pygame.K_UP:
@@ -155,9 +452,9 @@ while running:
                     selected_option = (selected_option + 1) % len(options)
                 elif event.key == pygame.K_RETURN:
                     if selected_option == 0:
-                        bricks = create_bricks()
+                        campaign.restart()
+                        start_level()
                         paddle = Paddle()
-                        ball = Ball()
                         game_state = "game"
                     elif selected_option == 1:
                         game_state = "trophies"
@@ -169,81 +466,155 @@ while running:
             elif game_state == "game":
                 if event.key == pygame.K_ESCAPE:
                     game_state = "menu"
+    frame_profiler.mark("input")
+
+    # Fixed-timestep simulation: as many ticks as the elapsed frame time covers
+    for _ in range(controls.ticks):
+        if game_state != "game" or feed:
+            break
+        if swarm:
+            multiball_tick()
+            check_cleared()
+            continue
+        prev_ball = ball.rect.topleft
+
+        # Paddle movement via mouse
+        paddle.update(ball.rect.centerx if args.autopilot else controls.mouse[0])
+
+        # Ball movement and collisions, in sub-steps of at most MAX_SUBSTEP
+        # pixels so a fast ball can't pass through the paddle or a brick
+        steps = substep_count(ball.dx, ball.dy, max_substep)
+        x, y = ball.rect.x, ball.rect.y
+        for step in range(steps):
+            x += ball.dx / steps
+            y += ball.dy / steps
+            ball.rect.x = x
+            ball.rect.y = y
+
+            # Ball collisions with walls
+            if ball.rect.left <= 0 or ball.rect.right >= SCREEN_WIDTH:
+                ball.bounce_x()
+            if ball.rect.top <= 0:
+                ball.bounce_y()
+                play_sound("boop")  # Boop on top wall
+
+            # Respawn ball if it hits bottom
+            if ball.rect.bottom >= SCREEN_HEIGHT:
+                lost_balls += 1
+                record("balls_lost")
+                ball.rect.centerx = SCREEN_WIDTH // 2
+                ball.rect.centery = SCREEN_HEIGHT // 2
+                ball.dx = random.choice([-BALL_SPEED_X, BALL_SPEED_X])
+                ball.dy = -BALL_SPEED_Y
+                prev_ball = ball.rect.topleft  # don't interpolate the respawn
+                break
+
+            # Ball collision with paddle
+            if ball.rect.colliderect(paddle.rect):
+                ball.bounce_y()
+                play_sound("boop")  # Boop on paddle
+
+            # Ball collision with bricks (at most one per sub-step, so the
+            # list can be changed in the loop)
+            for brick in bricks:
+                if ball.rect.colliderect(brick.rect):
+                    ball.bounce_y()
+                    brick.hp -= 1
+                    if brick.hp > 0:
+                        renderer.invalidate(brick_layer.redraw(brick))
+                    else:
+                        bricks.remove(brick)
+                        renderer.invalidate(brick_layer.remove(brick))
+                        total_bricks_broken += 1
+                        record("bricks_broken")
+                    play_sound("beep")  # Beep on brick hit
+                    break
+
+        check_cleared()
+    if broadcaster and controls.ticks:
+        broadcaster.publish(game_state, (timestep.ticks, campaign.index, ball.rect.x, ball.rect.y, paddle.rect.x, selected_option,
+                                         total_bricks_broken, lost_balls, has_won), remaining_bricks_mask())
+    frame_profiler.mark("physics")
 
     if game_state == "menu":
         # Draw PS1-style main menu
-        title = font.render("Breakout PS1", True, WHITE)
-        screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
+        title = text_cache.render(font, "Breakout PS1", WHITE)
+        text_sprite("title", font, "Breakout PS1", WHITE, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
         for i, opt in enumerate(options):
             color = RED if i == selected_option else WHITE
-            text = small_font.render(opt, True, color)
-            screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, 200 + i * 50))
+            text = text_cache.render(small_font, opt, color)
+            text_sprite(("option", i), small_font, opt, color, (SCREEN_WIDTH // 2 - text.get_width() // 2, 200 + i * 50))
 
     elif game_state == "trophies":
-        # Update and draw trophies
-        title = font.render("Trophies", True, WHITE)
-        screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 50))
+        # Draw trophies
+        title = text_cache.render(font, "Trophies", WHITE)
+        text_sprite("title", font, "Trophies", WHITE, (SCREEN_WIDTH // 2 - title.get_width() // 2, 50))
         y = 150
-        for name, info in achievements.items():
-            if info["condition"]():
-                info["unlocked"] = True
-            status = "Unlocked" if info["unlocked"] else "Locked"
-            text = small_font.render(f"{name}: {info['desc']} - {status}", True, WHITE)
-            screen.blit(text, (100, y))
+        for trophy in TROPHIES:
+            status = "Unlocked" if trophies.is_unlocked(trophy.name) else "Locked"
+            text_sprite(("trophy", trophy.name), small_font, f"{trophy.name}: {trophy.desc} - {status}", WHITE, (100, y))
             y += 40
-        back_text = small_font.render("Press ESC or ENTER to return", True, WHITE)
-        screen.blit(back_text, (100, y + 50))
+        text_sprite("back", small_font, "Press ESC or ENTER to return", WHITE, (100, y + 50))
 
     elif game_state == "game":
-        # Paddle movement via mouse
-        paddle.update()
-
-        # Ball movement
-        ball.move()
-
-        # Ball collisions with walls
-        if ball.rect.left <= 0 or ball.rect.right >= SCREEN_WIDTH:
-            ball.bounce_x()
-        if ball.rect.top <= 0:
-            ball.bounce_y()
-            boop_sound.play()  # Boop on top wall
-
-        # Respawn ball if it hits bottom
-        if ball.rect.bottom >= SCREEN_HEIGHT:
-            lost_balls += 1
-            ball.rect.centerx = SCREEN_WIDTH // 2
-            ball.rect.centery = SCREEN_HEIGHT // 2
-            ball.dx = random.choice([-BALL_SPEED_X, BALL_SPEED_X])
-            ball.dy = -BALL_SPEED_Y
-
-        # Ball collision with paddle
-        if ball.rect.colliderect(paddle.rect):
-            ball.bounce_y()
-            boop_sound.play()  # Boop on paddle
-
-        # Ball collision with bricks
-        for brick in bricks[:]:
-            if ball.rect.colliderect(brick.rect):
-                ball.bounce_y()
-                bricks.remove(brick)
-                total_bricks_broken += 1
-                beep_sound.play()  # Beep on brick hit
-                break
-
-        # Check win condition
-        if not bricks:
-            print("You Win!")
-            has_won = True
-            game_state = "menu"
-
-        # Draw everything
-        paddle.draw()
-        ball.draw()
-        for brick in bricks:
-            brick.draw()
-
-    pygame.display.flip()
-    clock.tick(60)
-
+        # Draw everything; the ball is interpolated between the last two ticks
+        renderer.sprite("paddle", paddle.rect, paddle.rect.topleft, paddle.draw)
+        if swarm:
+            x, y = swarm.interpolated(timestep.alpha)
+            renderer.sprite("balls", pygame.Rect(swarm.bounds(x, y)), None, draw_balls, x, y)
+        else:
+            ball_rect = pygame.Rect(lerp_point(prev_ball, ball.rect.topleft, timestep.alpha), ball.rect.size)
+            renderer.sprite("ball", ball_rect, ball_rect.topleft, ball.draw, ball_rect.center)
+
+    # The bricks are in the background layer, so they cost one blit however many there are
+    current_background = brick_layer.get() if game_state == "game" else background
+    if current_background is not renderer.background:
+        renderer.set_background(current_background)
+
+    if frame_profiler.visible:
+        renderer.sprite("profiler", profile_rect, None, draw_profiler)
+    frame_profiler.mark("submit")
+
+    renderer.draw()
+    frame_profiler.mark("draw")
+    renderer.present()
+    if frame_capture:
+        frame_capture.frame(pygame.display.get_surface())
+    frame_profiler.mark("present")
+    if not audio_ready:
+        startup.mark("first frame")
+        init_audio()
+        loader.start()
+    elif report_pending and loader.idle():
+        startup.print()
+        report_pending = False
+    if scaler:
+        scaler.update(time.perf_counter() - frame_start)
+    if feed or frame_profiler.visible or report_pending:
+        pacer.schedule(0)  # these need every frame, idle screen or not
+    frame_time = pacer.wait(game_state)
+    frame_profiler.mark("wait")
+
+controls.close()
+loader.shutdown()
+trophies.close()
+if frame_capture:
+    frame_capture.close()
+    print(frame_capture.summary())
+if broadcaster:
+    broadcaster.close()
+    print(broadcaster.summary())
+if feed:
+    feed.close()
+    print(f"Spectated {feed.frames} frames")
+if args.profile_out:
+    frame_profiler.export(args.profile_out)
+if scaler and scaler.changes:
+    print(f"Render resolution changed {scaler.changes} times, ending at {scaler.describe()}")
+if pacer.adaptive:
+    print(pacer.summary())
+if replay_reader:
+    print(f"Replay finished: {controls.frames} frames, {timestep.ticks} ticks, {len(bricks)} bricks left, "
+          f"{total_bricks_broken} broken, {lost_balls} balls lost, state {game_state}")
 pygame.quit()
 sys.exit()
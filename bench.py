@@ -0,0 +1,282 @@
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+# Headless frame-time benchmarks for both games.
+#
+# Each scenario runs one game script in a fresh subprocess under SDL's dummy
+# video/audio drivers. Inputs are scripted by writing a replay file (one
+# physics tick per frame, key presses on chosen frames) and playing it back
+# uncapped, so every run does exactly the same work and results are
+# comparable across commits. The game's pygame.time.Clock is swapped for one
+# that timestamps each frame and notes the game state it belongs to (the
+# frame pacer reports it through pacing.on_wait); only frames in the
+# scenario's target state are measured.
+#
+#   python bench.py                       # all scenarios, table on stdout
+#   python bench.py 'pong/*' --json new.json --compare old.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES = {
+    "pong": os.path.join(HERE, "ultraponghdrv010.3.25.py"),
+    "breakout": os.path.join(HERE, "bbreak.py"),
+}
+SEED = 1234
+
+# name: game, extra command line, frames to play, key presses {frame: [key names]},
+# mouse position and the game state whose frames are measured
+SCENARIOS = {
+    "pong/menu": dict(game="pong", args=[], frames=600, keys={}, mouse=(0, 0), state="menu"),
+    "pong/playing": dict(game="pong", args=["--autopilot"], frames=1800, keys={1: ["K_SPACE"]},
+                         mouse=(0, 0), state="playing"),
+    "pong/particle_burst": dict(game="pong", args=["--autopilot", "--particles-per-hit", "2000"], frames=1800,
+                                keys={1: ["K_SPACE"]}, mouse=(0, 0), state="playing"),
+    # Bloom/CRT post-processing per tier (see postfx.py)
+    "pong/bloom_low": dict(game="pong", args=["--autopilot", "--bloom", "low"], frames=1800, keys={1: ["K_SPACE"]},
+                           mouse=(0, 0), state="playing"),
+    "pong/bloom_medium": dict(game="pong", args=["--autopilot", "--bloom", "medium"], frames=1800,
+                              keys={1: ["K_SPACE"]}, mouse=(0, 0), state="playing"),
+    "pong/bloom_high": dict(game="pong", args=["--autopilot", "--bloom", "high"], frames=1800, keys={1: ["K_SPACE"]},
+                            mouse=(0, 0), state="playing"),
+    # Paddle parked at the top: the AI wins 5-0, then the game over screen idles
+    "pong/game_over": dict(game="pong", args=[], frames=3000, keys={1: ["K_SPACE"]}, mouse=(0, 0),
+                           state="game_over"),
+    "breakout/menu": dict(game="breakout", args=[], frames=600, keys={}, mouse=(400, 300), state="menu"),
+    "breakout/trophies": dict(game="breakout", args=[], frames=600, keys={1: ["K_DOWN"], 2: ["K_RETURN"]},
+                              mouse=(400, 300), state="trophies"),
+    "breakout/bricks_heavy": dict(game="breakout", args=["--autopilot", "--brick-rows", "12"], frames=1800,
+                                  keys={1: ["K_RETURN"]}, mouse=(400, 300), state="game"),
+    "breakout/bricks_sparse": dict(game="breakout", args=["--autopilot", "--brick-rows", "1"], frames=1800,
+                                   keys={1: ["K_RETURN"]}, mouse=(400, 300), state="game"),
+    # 300 balls on an 80x60 board (4800 bricks)
+    "breakout/multiball": dict(game="breakout", args=["--autopilot", "--multiball", "300", "--brick-rows", "60",
+                                                      "--brick-columns", "80"], frames=1800,
+                               keys={1: ["K_RETURN"]}, mouse=(400, 300), state="game"),
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def write_script(path, spec, seed):
+    import pygame
+    import replay
+    writer = replay.ReplayWriter(path, spec["game"], seed, 60)
+    mouse = tuple(spec["mouse"])
+    keys = {int(frame): names for frame, names in spec["keys"].items()}
+    for frame in range(spec["frames"]):
+        events = [(replay.EVENT_KEYDOWN, getattr(pygame, name)) for name in keys.get(frame, ())]
+        writer.frame(1, mouse, events)
+    writer.close()
+
+
+# Stands in for pygame.time.Clock inside the benchmarked game. Samples go to
+# flat arrays so recording them does not itself show up as allocated blocks.
+class BenchClock:
+    states = []
+    times = array("d")
+    blocks = array("q")  # net change in allocated memory blocks over the frame
+    peaks = array("q")  # traced peak bytes during the frame, with --tracemalloc
+    first_tick = None  # perf_counter at the end of the first frame
+    state = None  # game state of the frame being timed, set by the pacer
+
+    @staticmethod
+    def set_state(state):
+        BenchClock.state = state
+
+    def __init__(self):
+        self.last = None
+        self.last_blocks = sys.getallocatedblocks()
+
+    def tick(self, framerate=0):
+        blocks = sys.getallocatedblocks()
+        now = time.perf_counter()
+        elapsed = 0.0 if self.last is None else now - self.last
+        if BenchClock.first_tick is None:
+            BenchClock.first_tick = now
+        if self.last is not None:
+            BenchClock.states.append(BenchClock.state)
+            BenchClock.times.append(elapsed)
+            BenchClock.blocks.append(blocks - self.last_blocks)
+            peak = 0
+            if tracemalloc.is_tracing():
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+            BenchClock.peaks.append(peak)
+        self.last_blocks = blocks
+        self.last = time.perf_counter()  # bookkeeping above is not charged to the next frame
+        return int(elapsed * 1000)
+
+    def get_fps(self):
+        return 0.0
+
+
+def run_child(spec, out_path):
+    import pygame
+    sys.path.insert(0, HERE)
+    import pacing
+    fd, script_path = tempfile.mkstemp(suffix=".rpl")
+    os.close(fd)
+    try:
+        write_script(script_path, spec, spec["seed"])
+        pygame.time.Clock = BenchClock
+        pacing.on_wait = BenchClock.set_state
+        sys.argv = [GAMES[spec["game"]], "--headless", "--fps", "0", "--replay", script_path] + spec["args"]
+        if spec["tracemalloc"]:
+            tracemalloc.start()
+        gc_before = [s["collections"] for s in gc.get_stats()]
+        start = time.perf_counter()
+        try:
+            runpy.run_path(sys.argv[0], run_name="__main__")
+        except SystemExit:
+            pass
+        wall = time.perf_counter() - start
+        gc_after = [s["collections"] for s in gc.get_stats()]
+    finally:
+        os.remove(script_path)
+    with open(out_path, "w") as f:
+        samples = list(zip(BenchClock.states, BenchClock.times, BenchClock.blocks, BenchClock.peaks))
+        json.dump({"samples": samples, "wall": wall, "startup": BenchClock.first_tick - start,
+                   "gc_collections": [b - a for a, b in zip(gc_before, gc_after)]}, f)
+
+
+def summarize(spec, runs, warmup):
+    times, blocks, peaks = [], [], []
+    for run in runs:
+        measured = [s for s in run["samples"] if s[0] == spec["state"]][warmup:]
+        times += [s[1] * 1000.0 for s in measured]
+        blocks += [s[2] for s in measured]
+        peaks += [s[3] for s in measured]
+    ordered = sorted(times)
+    total = sum(times)
+    result = {
+        "frames": len(times),
+        "mean_ms": total / len(times) if times else 0.0,
+        "max_ms": ordered[-1] if ordered else 0.0,
+        "fps": len(times) / (total / 1000.0) if total else 0.0,
+        "allocated_blocks_growth": sum(blocks),
+        "gc_collections": [sum(c) for c in zip(*(run["gc_collections"] for run in runs))],
+        "wall_s": sum(run["wall"] for run in runs),
+        "startup_ms": sum(run["startup"] for run in runs) * 1000 / len(runs),  # script start to first frame
+    }
+    for p in PERCENTILES:
+        result[f"p{p}_ms"] = percentile(ordered, p)
+    if any(peaks):
+        peaks.sort()
+        result["alloc_peak_bytes_p50"] = percentile(peaks, 50)
+        result["alloc_peak_bytes_p99"] = percentile(peaks, 99)
+    return result
+
+
+def run_scenario(name, spec, options):
+    spec = dict(spec, seed=options.seed, tracemalloc=options.tracemalloc)
+    if options.dirty:
+        spec["args"] = spec["args"] + ["--dirty-rects"]
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    runs = []
+    for _ in range(options.repeat):
+        fd, out_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec), out_path],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+            with open(out_path) as f:
+                runs.append(json.load(f))
+        finally:
+            os.remove(out_path)
+    result = summarize(spec, runs, options.warmup)
+    if not result["frames"]:
+        print(f"warning: {name} never reached state {spec['state']!r}", file=sys.stderr)
+    return result
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    versions = {}
+    for module in ("pygame", "numpy"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), **versions}
+
+
+def print_table(results, baseline=None):
+    header = f"{'scenario':<28}{'frames':>7}{'mean':>8}{'p50':>8}{'p99':>8}{'max':>8}{'fps':>9}{'blocks':>8}{'start':>8}"
+    if baseline:
+        header += f"{'p50 chg':>9}{'fps chg':>9}"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<28}{r['frames']:>7}{r['mean_ms']:>8.2f}{r['p50_ms']:>8.2f}{r['p99_ms']:>8.2f}"
+                f"{r['max_ms']:>8.2f}{r['fps']:>9.0f}{r['allocated_blocks_growth']:>8}{r.get('startup_ms', 0):>8.1f}")
+        old = baseline.get(name) if baseline else None
+        if old and old["p50_ms"] and old["fps"]:
+            line += f"{(r['p50_ms'] / old['p50_ms'] - 1) * 100:>+8.1f}%{(r['fps'] / old['fps'] - 1) * 100:>+8.1f}%"
+        print(line)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(json.loads(sys.argv[2]), sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmarks for Pong and Breakout")
+    parser.add_argument("patterns", nargs="*", default=["*"], help="scenario name patterns (default: all)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--json", metavar="FILE", help="write results to a JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="show changes against an earlier --json file")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario; samples are pooled")
+    parser.add_argument("--warmup", type=int, default=30, help="measured-state frames to skip per run")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--dirty", action="store_true", help="benchmark the dirty-rect renderer")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also record per-frame peak allocation (slows every frame down)")
+    options = parser.parse_args()
+
+    names = [name for name in SCENARIOS if any(fnmatch.fnmatch(name, p) for p in options.patterns)]
+    if options.list:
+        print("\n".join(names))
+        return
+    if not names:
+        parser.error("no scenario matches " + " ".join(options.patterns))
+
+    results = {}
+    for name in names:
+        results[name] = run_scenario(name, SCENARIOS[name], options)
+    baseline = None
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)["scenarios"]
+    print_table(results, baseline)
+    if options.json:
+        report = {"meta": dict(metadata(), renderer="dirty" if options.dirty else "full", seed=options.seed,
+                               repeat=options.repeat, warmup=options.warmup),
+                  "scenarios": results}
+        with open(options.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
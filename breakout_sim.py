@@ -0,0 +1,146 @@
+from collections import namedtuple
+
+import numpy as np
+
+from pong_sim import rect_round, colliderect
+
+# Headless, vectorized Breakout rules.
+#
+# Mirrors the physics tick in bbreak.py (paddle follows the mouse x, ball
+# sub-steps with wall, bottom, paddle and brick checks, first brick in list
+# order wins) for N independent boards as struct-of-arrays state. Bricks are
+# an (N, rows * columns) occupancy mask in the game's creation order. No
+# pygame import.
+
+# Constants (same values as the game)
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 10
+PADDLE_Y = SCREEN_HEIGHT - PADDLE_HEIGHT - 10
+BALL_RADIUS = 10
+BALL_SIZE = BALL_RADIUS * 2
+BALL_SPEED_X = 5
+BALL_SPEED_Y = 5
+BRICK_WIDTH = 75
+BRICK_HEIGHT = 30
+BRICK_ROWS = 5
+BRICK_COLUMNS = 10
+BRICK_GAP = 5
+MAX_SUBSTEP = min(PADDLE_HEIGHT, BALL_SIZE, BRICK_HEIGHT)  # Longest ball move per collision check
+
+# Per-step event arrays, length N each
+StepEvents = namedtuple("StepEvents", "wall_bounce paddle_hit bricks_broken lost_ball done")
+
+
+def brick_positions(rows=BRICK_ROWS, columns=BRICK_COLUMNS):
+    # Top-left corners in create_bricks() order
+    col, row = np.meshgrid(np.arange(columns), np.arange(rows))
+    x = col.ravel() * (BRICK_WIDTH + BRICK_GAP) + BRICK_GAP
+    y = row.ravel() * (BRICK_HEIGHT + BRICK_GAP) + BRICK_GAP + 50
+    return x.astype(np.int64), y.astype(np.int64)
+
+
+class BreakoutSim:
+    def __init__(self, n, rows=BRICK_ROWS, seed=None, auto_reset=True):
+        self.n = n
+        self.rows = rows
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        self.brick_x, self.brick_y = brick_positions(rows)
+
+        self.ball_x = np.zeros(n, dtype=np.int64)
+        self.ball_y = np.zeros(n, dtype=np.int64)
+        self.ball_dx = np.zeros(n, dtype=np.float64)
+        self.ball_dy = np.zeros(n, dtype=np.float64)
+        self.paddle_x = np.zeros(n, dtype=np.int64)
+        self.bricks = np.zeros((n, len(self.brick_x)), dtype=bool)
+        self.bricks_broken = np.zeros(n, dtype=np.int64)
+        self.lost_balls = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        # Start a new board, like choosing "Start Game" on the menu
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.bricks[mask] = True
+        self.bricks_broken[mask] = 0
+        self.lost_balls[mask] = 0
+        self.paddle_x[mask] = (SCREEN_WIDTH - PADDLE_WIDTH) // 2
+        self._serve(mask)
+
+    def _serve(self, mask):
+        # Ball() / the respawn after a lost ball
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+        self.ball_x[mask] = SCREEN_WIDTH // 2 - BALL_RADIUS
+        self.ball_y[mask] = SCREEN_HEIGHT // 2 - BALL_RADIUS
+        self.ball_dx[mask] = (self.rng.integers(0, 2, size=count) * 2 - 1) * BALL_SPEED_X
+        self.ball_dy[mask] = -BALL_SPEED_Y
+
+    def step(self, actions):
+        # actions: target paddle centerx (the mouse x in the game)
+        n = self.n
+        half = PADDLE_WIDTH // 2
+        center = np.clip(np.asarray(actions, dtype=np.int64), half, SCREEN_WIDTH - half)
+        self.paddle_x[:] = center - half
+
+        steps = np.maximum(1, np.ceil(np.maximum(np.abs(self.ball_dx), np.abs(self.ball_dy)) / MAX_SUBSTEP)).astype(np.int64)
+        fx = self.ball_x.astype(np.float64)
+        fy = self.ball_y.astype(np.float64)
+        wall = np.zeros(n, dtype=bool)
+        paddle = np.zeros(n, dtype=bool)
+        lost = np.zeros(n, dtype=bool)
+        broken = np.zeros(n, dtype=np.int64)
+        for k in range(int(steps.max())):
+            active = (steps > k) & ~lost
+            fx += np.where(active, self.ball_dx / steps, 0)
+            fy += np.where(active, self.ball_dy / steps, 0)
+            self.ball_x = np.where(active, rect_round(fx), self.ball_x)
+            self.ball_y = np.where(active, rect_round(fy), self.ball_y)
+
+            # Walls: sides flip dx, the top flips dy
+            side = active & ((self.ball_x <= 0) | (self.ball_x + BALL_SIZE >= SCREEN_WIDTH))
+            np.negative(self.ball_dx, out=self.ball_dx, where=side)
+            top = active & (self.ball_y <= 0)
+            np.negative(self.ball_dy, out=self.ball_dy, where=top)
+            wall |= side | top
+
+            # Bottom: lose the ball, respawn and skip the rest of the tick
+            bottom = active & (self.ball_y + BALL_SIZE >= SCREEN_HEIGHT)
+            if bottom.any():
+                self._serve(bottom)
+                self.lost_balls += bottom
+                lost |= bottom
+                active &= ~bottom
+
+            hit = active & colliderect(self.ball_x, self.ball_y, BALL_SIZE, BALL_SIZE,
+                                       self.paddle_x, PADDLE_Y, PADDLE_WIDTH, PADDLE_HEIGHT)
+            np.negative(self.ball_dy, out=self.ball_dy, where=hit)
+            paddle |= hit
+
+            # Bricks: the first live brick in list order that overlaps is removed
+            overlap = self.bricks & colliderect(self.ball_x[:, None], self.ball_y[:, None], BALL_SIZE, BALL_SIZE,
+                                                self.brick_x, self.brick_y, BRICK_WIDTH, BRICK_HEIGHT)
+            overlap &= active[:, None]
+            struck = overlap.any(axis=1)
+            if struck.any():
+                idx = np.flatnonzero(struck)
+                self.bricks[idx, overlap[idx].argmax(axis=1)] = False
+                np.negative(self.ball_dy, out=self.ball_dy, where=struck)
+                broken += struck
+        self.bricks_broken += broken
+
+        done = ~self.bricks.any(axis=1)
+        events = StepEvents(wall, paddle, broken, lost, done)
+        if self.auto_reset and done.any():
+            self.reset(done)
+        return events
+
+    def run(self, frames, policy=None):
+        # Fast batch rollout. policy(sim) -> actions; the default keeps the
+        # paddle under the ball
+        for _ in range(frames):
+            actions = self.ball_x + BALL_RADIUS if policy is None else policy(self)
+            self.step(actions)
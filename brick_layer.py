@@ -0,0 +1,72 @@
+# Brick wall pre-rendered into a persistent layer.
+#
+# The layer is a copy of the background with every brick drawn into it, and
+# the game uses it as the renderer's background: the full renderer blits it
+# once per frame whatever the brick count, and the dirty-rect renderer
+# restores from it, so a ball passing over bricks costs nothing extra.
+# Removing a brick erases just its rect back to the background; redraw()
+# repaints one brick whose appearance changed (colour, texture, hit points).
+# Both return the logical rect to pass to renderer.invalidate().
+#
+# Bricks only need a logical `rect` and draw(surface), drawing inside that
+# rect through the view. The layer is kept at the view's render scale and
+# rebuilt from the brick list when the scale changes.
+
+
+class BrickLayer:
+    def __init__(self, background, view):
+        self.background = background  # logical size
+        self.view = view
+        self.bricks = []
+        self.surface = None
+        self.scale = None
+        self.rebuilds = 0
+
+    # A new board; bricks is the game's live list, from which bricks are
+    # taken out before remove() is called for them
+    def reset(self, bricks):
+        self.bricks = bricks
+        if self.surface is not None and self.scale == self.view.scale:
+            self._build(self.surface)
+
+    # The layer at the current render scale
+    def get(self):
+        if self.surface is None or self.scale != self.view.scale:
+            self.scale = self.view.scale
+            self.surface = self.view.sprite(self.background).copy()
+            self._build(self.surface)
+        return self.surface
+
+    def remove(self, brick):
+        if self.surface is not None:
+            self._erase(brick.rect)
+        return brick.rect
+
+    def redraw(self, brick):
+        if self.surface is not None:
+            self._erase(brick.rect)
+            brick.draw(self.surface)
+        return brick.rect
+
+    # Bring the layer in line with a different set of the same bricks (a
+    # spectated board), touching only the ones that changed
+    def sync(self, bricks):
+        old = set(self.bricks)
+        new = set(bricks)
+        self.bricks = bricks
+        changed = []
+        for brick in old - new:
+            changed.append(self.remove(brick))
+        for brick in new - old:
+            changed.append(self.redraw(brick))
+        return changed
+
+    def _erase(self, rect):
+        area = self.view.rect(rect)
+        self.surface.blit(self.view.sprite(self.background), area, area)
+
+    def _build(self, surface):
+        surface.blit(self.view.sprite(self.background), (0, 0))
+        for brick in self.bricks:
+            brick.draw(surface)
+        self.rebuilds += 1
@@ -0,0 +1,179 @@
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+import pygame
+
+# Asynchronous frame capture (--capture), for attract-mode loops, bug
+# reports and offline rendering.
+#
+# The game loop calls frame(surface) after presenting. That copies the
+# window's pixels as they are into the next free buffer of a fixed ring (one
+# memcpy, about 0.4 ms at 800x600) and queues it; a writer thread converts
+# queued frames to RGB and writes them out as a PNG sequence, one raw RGB24
+# file, or the stdin of an encoder command, then hands the buffer back. When
+# every buffer is still waiting to be written the writer has fallen behind:
+# the "drop" policy skips the frame (PNG names keep the frame number, so gaps
+# show) and "throttle" holds the game until a buffer frees up. PNGs are
+# encoded here with zlib rather than pygame.image.save, which holds the GIL
+# for the whole encode and would stall the game loop from the writer thread.
+#
+# Raw and piped output need one frame size, so frames of another size (the
+# window was resized) are scaled to the first one's. The command for piped
+# output gets {width}, {height} and {fps} filled in, e.g.
+#   --capture-format pipe --capture "ffmpeg -f rawvideo -pix_fmt rgb24
+#   -s {width}x{height} -r {fps} -i - attract.mp4"
+# Offline rendering: --headless --replay FILE --fps 0 --capture DIR renders
+# every frame of the replay as fast as the writer keeps up.
+
+FORMATS = {(16, 8, 0): "BGRA", (0, 8, 16): "RGBA"}  # 32-bit pixel shifts -> frombuffer format
+PNG_LEVEL = 1  # zlib level: about 5 ms for an 800x600 frame
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# RGB24 pixels as an 8-bit truecolor PNG (every row with filter type 0)
+def encode_png(rgb, size):
+    width, height = size
+    stride = width * 3
+    pixels = memoryview(rgb)
+    rows = b"".join(b"\0" + pixels[i:i + stride] for i in range(0, stride * height, stride))
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + _png_chunk(b"IDAT", zlib.compress(rows, PNG_LEVEL)) + _png_chunk(b"IEND", b""))
+
+
+class FrameCapture:
+    def __init__(self, target, kind="png", buffers=8, policy="drop", fps=60):
+        self.target = target
+        self.kind = kind
+        self.policy = policy
+        self.fps = fps
+        self.size = None  # size of raw and piped frames: the first frame's
+        self.out = None
+        self.process = None
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(bytearray())  # grown to the frame size on first use
+        self.queued = queue.Queue()
+        self.frames = 0
+        self.written = 0
+        self.dropped = 0
+        self.stalls = 0  # frames the game waited on the writer for
+        self.error = None
+        if kind == "png":
+            os.makedirs(target, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self.thread.start()
+
+    def frame(self, surface):
+        number = self.frames
+        self.frames += 1
+        if self.error:
+            return
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            if self.policy == "drop":
+                self.dropped += 1
+                return
+            self.stalls += 1
+            buffer = self.free.get()
+        fmt = FORMATS.get(surface.get_shifts()[:3]) if surface.get_bytesize() == 4 else None
+        if fmt:
+            view = surface.get_view("1")
+            pixels = memoryview(view).cast("B")
+            buffer[:] = pixels
+            pixels.release()
+            del view  # unlocks the surface
+            width = surface.get_pitch() // 4  # rows may be padded
+        else:
+            buffer[:] = pygame.image.tobytes(surface, "RGB")
+            fmt = "RGB"
+            width = surface.get_width()
+        self.queued.put((number, buffer, fmt, width, surface.get_size()))
+
+    def _run(self):
+        while True:
+            item = self.queued.get()
+            if item is None:
+                return
+            number, buffer, fmt, width, size = item
+            if not self.error:
+                try:
+                    self._write(number, buffer, fmt, width, size)
+                except (OSError, ValueError, zlib.error, pygame.error) as e:
+                    self.error = e
+                    print(f"Frame capture stopped: {e}", file=sys.stderr)
+            self.free.put(buffer)
+
+    def _write(self, number, buffer, fmt, width, size):
+        image = pygame.image.frombuffer(buffer, (width, size[1]), fmt)
+        if width != size[0]:
+            image = image.subsurface((0, 0), size)
+        if self.kind == "png":
+            with open(os.path.join(self.target, f"frame_{number:06d}.png"), "wb") as f:
+                f.write(encode_png(pygame.image.tobytes(image, "RGB"), size))
+        else:
+            if self.out is None:
+                self.size = size
+                self.out = self._open(size)
+            if size != self.size:
+                image = pygame.transform.scale(image, self.size)
+            self.out.write(pygame.image.tobytes(image, "RGB"))
+        self.written += 1
+
+    def _open(self, size):
+        if self.kind == "raw":
+            return open(self.target, "wb")
+        command = self.target.format(width=size[0], height=size[1], fps=self.fps)
+        self.process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE)
+        return self.process.stdin
+
+    # Writes out everything queued, then closes the file or the encoder's input
+    def close(self):
+        self.queued.put(None)
+        self.thread.join()
+        if self.out:
+            try:
+                self.out.close()
+            except OSError:
+                pass
+        if self.process:
+            self.process.wait()
+
+    def summary(self):
+        text = f"Captured {self.written} of {self.frames} frames"
+        if self.size:
+            text += f" ({self.size[0]}x{self.size[1]} RGB24)"
+        return f"{text}, {self.dropped} dropped, {self.stalls} waits for the writer"
+
+
+# The capture for this run, if any; fps is the frame rate given to encoders
+def from_args(args, fps):
+    if not args.capture:
+        return None
+    if args.fast_forward:
+        print("--capture needs rendered frames; ignored with --fast-forward", file=sys.stderr)
+        return None
+    policy = args.capture_policy or ("throttle" if args.replay else "drop")
+    return FrameCapture(args.capture, args.capture_format, args.capture_buffers, policy, fps)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    group = parser.add_argument_group("frame capture")
+    group.add_argument("--capture", metavar="TARGET",
+                       help="record presented frames: a directory (png), a file (raw) or a command (pipe)")
+    group.add_argument("--capture-format", choices=("png", "raw", "pipe"), default="png",
+                       help="png: numbered PNG files; raw: concatenated RGB24 frames; pipe: RGB24 frames to a "
+                            "command's stdin ({width}, {height} and {fps} are filled in)")
+    group.add_argument("--capture-buffers", type=int, default=8, metavar="N", help="frames buffered for the writer")
+    group.add_argument("--capture-policy", choices=("drop", "throttle"),
+                       help="when the writer falls behind, drop frames or slow the game down "
+                            "(default: throttle for replays, drop otherwise)")
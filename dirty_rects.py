@@ -0,0 +1,162 @@
+import pygame
+
+# Frame renderers with a shared sprite-submission interface.
+#
+# Each frame the game submits sprites with renderer.sprite(key, rect, token,
+# draw, *args): `rect` bounds everything draw(surface, *args) touches and
+# `token` describes its appearance (None = changes every frame). render()
+# then presents the frame; it is draw() followed by present(), which callers
+# may invoke separately to time the blit path and the display update apart.
+#
+# FullRenderer redraws the whole background and every sprite, then flips.
+# DirtyRenderer keeps last frame's sprites, restores from the cached
+# background only the regions that moved, changed or disappeared, redraws
+# the affected sprites in order and calls pygame.display.update() with a
+# merged, minimal rect list.
+
+
+class FullRenderer:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.sprites = []
+        self.updated_rects = 0
+
+    def set_background(self, background):
+        self.background = background
+
+    def invalidate(self, rect=None):
+        pass  # everything is redrawn anyway
+
+    def sprite(self, key, rect, token, draw, *args):
+        self.sprites.append((key, rect, token, draw, args))
+
+    def render(self):
+        self.draw()
+        self.present()
+
+    def draw(self):
+        sprites = self.sprites
+        self.sprites = []
+        self._render_all(sprites)
+
+    def present(self):
+        pygame.display.flip()
+
+    def _render_all(self, sprites):
+        self.screen.blit(self.background, (0, 0))
+        for key, rect, token, draw, args in sprites:
+            draw(self.screen, *args)
+        self.updated_rects = 1
+
+
+# Discards every frame; for headless fast-forward replays
+class NullRenderer(FullRenderer):
+    def draw(self):
+        self.sprites = []
+        self.updated_rects = 0
+
+    def present(self):
+        pass
+
+
+class DirtyRenderer(FullRenderer):
+    def __init__(self, screen, background, merge_slack=1.25):
+        super().__init__(screen, background)
+        self.merge_slack = merge_slack  # merge two rects if the union wastes < 25% area
+        self.previous = {}
+        self.invalid = []
+        self.full_redraw = True
+        self.screen_rect = screen.get_rect()
+        self.pending = None  # rects to present; None = the whole screen
+
+    def set_background(self, background):
+        self.background = background
+        self.full_redraw = True
+
+    def invalidate(self, rect=None):
+        # Background changed under rect (or everywhere)
+        if rect is None:
+            self.full_redraw = True
+        else:
+            self.invalid.append(pygame.Rect(rect))
+
+    def draw(self):
+        sprites = self.sprites
+        self.sprites = []
+        current = {}
+        for key, rect, token, draw, args in sprites:
+            current[key] = (pygame.Rect(rect), token)
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.invalid = []
+            self.previous = current
+            self.pending = None
+            self._render_all(sprites)
+            return
+
+        # Regions to restore: old rects of anything that moved, changed or went
+        # away, new rects of anything changed, and invalidated background
+        restore = self.invalid
+        self.invalid = []
+        changed = set()
+        for key, (rect, token) in current.items():
+            old = self.previous.get(key)
+            if token is None or old is None or old != (rect, token):
+                changed.add(key)
+                restore.append(rect)
+                if old is not None:
+                    restore.append(old[0])
+        for key, (rect, token) in self.previous.items():
+            if key not in current:
+                restore.append(rect)
+
+        # Unchanged sprites touched by a (merged) restored region must be
+        # redrawn too, which may in turn restore more; iterate to a fixed point
+        pending = [key for key in current if key not in changed]
+        rects = self._merge(restore)
+        while pending:
+            touched = [key for key in pending if current[key][0].collidelist(rects) != -1]
+            if not touched:
+                break
+            for key in touched:
+                changed.add(key)
+                rects.append(current[key][0])
+            pending = [key for key in pending if key not in changed]
+            rects = self._merge(rects)
+
+        for rect in rects:
+            self.screen.blit(self.background, rect, rect)
+        for key, rect, token, draw, args in sprites:
+            if key in changed:
+                draw(self.screen, *args)
+        self.previous = current
+        self.pending = rects
+        self.updated_rects = len(rects)
+
+    def present(self):
+        if self.pending is None:
+            pygame.display.flip()
+        elif self.pending:
+            pygame.display.update(self.pending)
+
+    def _merge(self, rects):
+        # Clip to the screen, then greedily merge overlapping or nearly-adjacent rects
+        rects = [r.clip(self.screen_rect) for r in rects]
+        rects = [r for r in rects if r.width > 0 and r.height > 0]
+        merged = True
+        while merged:
+            merged = False
+            out = []
+            for rect in rects:
+                for i, other in enumerate(out):
+                    union = rect.union(other)
+                    if union.width * union.height <= (rect.width * rect.height + other.width * other.height) * self.merge_slack:
+                        out[i] = union
+                        merged = True
+                        break
+                else:
+                    out.append(rect)
+            rects = out
+        return rects
@@ -0,0 +1,335 @@
+import argparse
+import multiprocessing
+import os
+import time
+import traceback
+
+import numpy as np
+
+import breakout_sim
+import pong_sim
+
+# Reset/step environments over the headless game rules (pong_sim.py,
+# breakout_sim.py), for training and evaluating paddle agents.
+#
+# Env is a single match with the Gymnasium call signatures:
+#   obs, info = env.reset(); obs, reward, terminated, truncated, info = env.step(action)
+# VecEnv steps a batch of matches in-process with one vectorized sim call.
+# SubprocVecEnv shards a batch across worker processes, each running a VecEnv
+# whose arrays are views into shared memory: actions go in and observations,
+# rewards and flags come out through those buffers, and the per-step messages
+# are one-byte commands, so nothing is pickled per step. Throughput scales
+# with workers as long as each shard is large enough to amortize the
+# round trip.
+#
+# Actions are the paddle target position (mouse y for Pong's left paddle,
+# mouse x for Breakout). Observations are float32 state vectors; pass
+# pixels=(width, height) to also get RGB frames drawn on an offscreen pygame
+# surface. Batched envs reset finished matches automatically; the last
+# observation of a finished match is in info["final_obs"].
+
+DEFAULT_MAX_STEPS = 10_000
+
+
+class PongTask:
+    # obs: ball x, y, dx, dy, left paddle y, right paddle y, left score, right score
+    obs_size = 8
+    action_low, action_high = 0, pong_sim.SCREEN_HEIGHT
+
+    def __init__(self, n, seed=None, ai_speed=pong_sim.AI_SPEED, win_score=pong_sim.WIN_SCORE):
+        self.sim = pong_sim.PongSim(n, ai_speed=ai_speed, win_score=win_score, seed=seed, auto_reset=False)
+
+    def reset(self, mask=None):
+        self.sim.reset(mask)
+
+    def step(self, actions, rewards):
+        events = self.sim.step(actions)
+        rewards[:] = events.left_point
+        rewards -= events.right_point
+        return events.done
+
+    def observe(self, out):
+        sim = self.sim
+        for column, values in enumerate((sim.ball_x, sim.ball_y, sim.ball_dx, sim.ball_dy,
+                                         sim.left_y, sim.right_y, sim.left_score, sim.right_score)):
+            out[:, column] = values
+
+    def draw(self, surface, i, scale):
+        import pygame
+        sim = self.sim
+        surface.fill((0, 0, 0))
+        size = (max(1, round(pong_sim.PADDLE_WIDTH * scale[0])), max(1, round(pong_sim.PADDLE_HEIGHT * scale[1])))
+        for x, y in ((pong_sim.LEFT_PADDLE_X, sim.left_y[i]), (pong_sim.RIGHT_PADDLE_X, sim.right_y[i])):
+            pygame.draw.rect(surface, (255, 255, 255), ((round(x * scale[0]), round(y * scale[1])), size))
+        ball = (max(1, round(pong_sim.BALL_SIZE * scale[0])), max(1, round(pong_sim.BALL_SIZE * scale[1])))
+        pygame.draw.rect(surface, (100, 255, 100), ((round(sim.ball_x[i] * scale[0]), round(sim.ball_y[i] * scale[1])), ball))
+
+
+class BreakoutTask:
+    # obs: ball x, y, dx, dy, paddle x, then one 0/1 per brick in creation order
+    action_low, action_high = 0, breakout_sim.SCREEN_WIDTH
+
+    def __init__(self, n, seed=None, rows=breakout_sim.BRICK_ROWS):
+        self.sim = breakout_sim.BreakoutSim(n, rows=rows, seed=seed, auto_reset=False)
+        self.obs_size = 5 + self.sim.bricks.shape[1]
+
+    def reset(self, mask=None):
+        self.sim.reset(mask)
+
+    def step(self, actions, rewards):
+        events = self.sim.step(actions)
+        rewards[:] = events.bricks_broken
+        rewards -= events.lost_ball
+        return events.done
+
+    def observe(self, out):
+        sim = self.sim
+        for column, values in enumerate((sim.ball_x, sim.ball_y, sim.ball_dx, sim.ball_dy, sim.paddle_x)):
+            out[:, column] = values
+        out[:, 5:] = sim.bricks
+
+    def draw(self, surface, i, scale):
+        import pygame
+        sim = self.sim
+        surface.fill((0, 0, 0))
+        brick = (max(1, round(breakout_sim.BRICK_WIDTH * scale[0])), max(1, round(breakout_sim.BRICK_HEIGHT * scale[1])))
+        for b in np.flatnonzero(sim.bricks[i]):
+            pos = (round(sim.brick_x[b] * scale[0]), round(sim.brick_y[b] * scale[1]))
+            pygame.draw.rect(surface, (255, 255, 255), (pos, brick))
+        paddle = (max(1, round(breakout_sim.PADDLE_WIDTH * scale[0])), max(1, round(breakout_sim.PADDLE_HEIGHT * scale[1])))
+        pygame.draw.rect(surface, (255, 255, 255),
+                         ((round(sim.paddle_x[i] * scale[0]), round(breakout_sim.PADDLE_Y * scale[1])), paddle))
+        ball = (max(1, round(breakout_sim.BALL_SIZE * scale[0])), max(1, round(breakout_sim.BALL_SIZE * scale[1])))
+        pygame.draw.ellipse(surface, (255, 0, 0), ((round(sim.ball_x[i] * scale[0]), round(sim.ball_y[i] * scale[1])), ball))
+
+
+TASKS = {"pong": PongTask, "breakout": BreakoutTask}
+SCREEN_SIZES = {"pong": (pong_sim.SCREEN_WIDTH, pong_sim.SCREEN_HEIGHT),
+                "breakout": (breakout_sim.SCREEN_WIDTH, breakout_sim.SCREEN_HEIGHT)}
+
+
+# name -> (shape, dtype) of every per-step buffer for n envs
+def buffer_layout(game, n, pixels=None, **task_kwargs):
+    obs_size = TASKS[game](1, **task_kwargs).obs_size
+    layout = {
+        "actions": ((n,), np.float64),
+        "obs": ((n, obs_size), np.float32),
+        "final_obs": ((n, obs_size), np.float32),
+        "rewards": ((n,), np.float32),
+        "terminated": ((n,), np.bool_),
+        "truncated": ((n,), np.bool_),
+        "steps": ((n,), np.int64),
+    }
+    if pixels:
+        layout["pixels"] = ((n, pixels[1], pixels[0], 3), np.uint8)
+    return layout
+
+
+class VecEnv:
+    # buffers: optional {name: array} to write results into (see buffer_layout)
+    def __init__(self, game, n, seed=None, max_steps=DEFAULT_MAX_STEPS, pixels=None, auto_reset=True,
+                 buffers=None, **task_kwargs):
+        self.game = game
+        self.n = n
+        self.max_steps = max_steps
+        self.auto_reset = auto_reset
+        self.task = TASKS[game](n, seed=seed, **task_kwargs)
+        self.buffers = dict(buffers or {})
+        for name, (shape, dtype) in buffer_layout(game, n, pixels, **task_kwargs).items():
+            if name not in self.buffers:
+                self.buffers[name] = np.zeros(shape, dtype)
+        self.obs = self.buffers["obs"]
+        self.final_obs = self.buffers["final_obs"]
+        self.rewards = self.buffers["rewards"]
+        self.terminated = self.buffers["terminated"]
+        self.truncated = self.buffers["truncated"]
+        self.steps = self.buffers["steps"]
+        self.pixels = self.buffers.get("pixels")
+        self.surface = None
+        if pixels:
+            import pygame
+            self.surface = pygame.Surface(pixels)
+            screen = SCREEN_SIZES[game]
+            self.scale = (pixels[0] / screen[0], pixels[1] / screen[1])
+
+    def reset(self):
+        self.task.reset()
+        self.steps[:] = 0
+        self.task.observe(self.obs)
+        self._render(range(self.n))
+        return self.obs
+
+    def step(self, actions):
+        np.copyto(self.terminated, self.task.step(actions, self.rewards))
+        self.steps += 1
+        np.greater_equal(self.steps, self.max_steps, out=self.truncated)
+        self.truncated &= ~self.terminated
+        self.task.observe(self.obs)
+        ended = self.terminated | self.truncated
+        if self.auto_reset and ended.any():
+            self.final_obs[ended] = self.obs[ended]
+            self.task.reset(ended)
+            self.steps[ended] = 0
+            self.task.observe(self.obs)
+        self._render(range(self.n))
+        return self.obs, self.rewards, self.terminated, self.truncated, {"final_obs": self.final_obs}
+
+    def _render(self, indices):
+        if self.surface is None:
+            return
+        import pygame
+        for i in indices:
+            self.task.draw(self.surface, i, self.scale)
+            self.pixels[i] = pygame.surfarray.pixels3d(self.surface).transpose(1, 0, 2)
+
+    def close(self):
+        pass
+
+
+class Env:
+    def __init__(self, game, seed=None, max_steps=DEFAULT_MAX_STEPS, pixels=None, **task_kwargs):
+        self.batch = VecEnv(game, 1, seed=seed, max_steps=max_steps, pixels=pixels, auto_reset=False, **task_kwargs)
+        self.action_low, self.action_high = self.batch.task.action_low, self.batch.task.action_high
+        self.obs_size = self.batch.task.obs_size
+
+    def _observation(self):
+        if self.batch.pixels is not None:
+            return self.batch.obs[0].copy(), self.batch.pixels[0].copy()
+        return self.batch.obs[0].copy()
+
+    def reset(self):
+        self.batch.reset()
+        return self._observation(), {}
+
+    def step(self, action):
+        batch = self.batch
+        batch.step([action])
+        return self._observation(), float(batch.rewards[0]), bool(batch.terminated[0]), bool(batch.truncated[0]), {}
+
+    def close(self):
+        pass
+
+
+def _worker(conn, game, start, stop, seed, max_steps, pixels, raw, layout, task_kwargs):
+    try:
+        buffers = {name: np.frombuffer(raw[name], dtype).reshape(shape)[start:stop]
+                   for name, (shape, dtype) in layout.items()}
+        env = VecEnv(game, stop - start, seed=seed, max_steps=max_steps, pixels=pixels, buffers=buffers, **task_kwargs)
+        actions = buffers["actions"]
+        conn.send_bytes(b"")
+        while True:
+            command = conn.recv_bytes()
+            if command == b"s":
+                env.step(actions)
+            elif command == b"r":
+                env.reset()
+            else:
+                break
+            conn.send_bytes(b"")
+    except Exception:
+        conn.send_bytes(b"!" + traceback.format_exc().encode())
+    finally:
+        conn.close()
+
+
+class SubprocVecEnv:
+    def __init__(self, game, n, workers=None, seed=None, max_steps=DEFAULT_MAX_STEPS, pixels=None, context=None,
+                 **task_kwargs):
+        ctx = multiprocessing.get_context(context)
+        workers = max(1, min(workers or os.cpu_count() or 1, n))
+        self.n = n
+        layout = buffer_layout(game, n, pixels, **task_kwargs)
+        raw = {name: ctx.RawArray("b", max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+               for name, (shape, dtype) in layout.items()}
+        self.buffers = {name: np.frombuffer(raw[name], dtype).reshape(shape)
+                        for name, (shape, dtype) in layout.items()}
+        self.actions = self.buffers["actions"]
+        self.obs = self.buffers["obs"]
+        self.pixels = self.buffers.get("pixels")
+
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        self.conns = []
+        self.processes = []
+        for w in range(workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child, game, bounds[w], bounds[w + 1], seeds[w], max_steps, pixels, raw,
+                                        layout, task_kwargs))
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+        self._wait()
+
+    def _wait(self):
+        for conn in self.conns:
+            reply = conn.recv_bytes()
+            if reply:
+                self.close()
+                raise RuntimeError("environment worker failed:\n" + reply[1:].decode())
+
+    def _broadcast(self, command):
+        for conn in self.conns:
+            conn.send_bytes(command)
+        self._wait()
+
+    def reset(self):
+        self._broadcast(b"r")
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self._broadcast(b"s")
+        b = self.buffers
+        return b["obs"], b["rewards"], b["terminated"], b["truncated"], {"final_obs": b["final_obs"]}
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send_bytes(b"c")
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.conns = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Steps per second for a tracking policy, in-process and across worker counts
+def main():
+    parser = argparse.ArgumentParser(description="Environment throughput benchmark")
+    parser.add_argument("game", choices=sorted(TASKS))
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="*", help="worker counts to try (default: 1, 2, 4, ... cores)")
+    parser.add_argument("--pixels", type=int, nargs=2, metavar=("W", "H"))
+    args = parser.parse_args()
+
+    def policy(env):
+        column = 1 if args.game == "pong" else 0
+        return env.obs[:, column] + 10
+
+    counts = args.workers or [2 ** k for k in range(8) if 2 ** k <= (os.cpu_count() or 1)]
+    runs = [("in-process", lambda: VecEnv(args.game, args.envs, seed=0, pixels=args.pixels))]
+    runs += [(f"{w} workers", lambda w=w: SubprocVecEnv(args.game, args.envs, workers=w, seed=0, pixels=args.pixels))
+             for w in counts]
+    for label, make in runs:
+        env = make()
+        env.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            env.step(policy(env))
+        elapsed = time.perf_counter() - start
+        env.close()
+        print(f"{label:>12}: {args.envs * args.steps / elapsed:12,.0f} env steps/s")
+
+
+if __name__ == "__main__":
+    main()
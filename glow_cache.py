@@ -0,0 +1,45 @@
+import pygame
+
+# Reusable per-pixel-alpha surfaces for glow effects.
+#
+# fill() hands out one SRCALPHA surface per (size, color, alpha), filled once.
+# sprite() memoizes any pre-rendered surface under a caller-chosen key, built
+# on first use by a callback. The render path then only blits; nothing is
+# allocated per frame. Surfaces built for a render scale are only good for
+# that scale: set_scale() drops them all when it changes, so a dynamic
+# resolution scaler stepping through its ladder doesn't keep a set per step.
+
+
+class SurfacePool:
+    def __init__(self):
+        self.surfaces = {}
+        self.allocations = 0
+        self.scale = None
+
+    def set_scale(self, scale):
+        if scale != self.scale:
+            self.clear()
+            self.scale = scale
+
+    def fill(self, size, color, alpha=255):
+        key = ("fill", tuple(size), tuple(color[:3]), alpha)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill((*color[:3], alpha))
+            self.surfaces[key] = surface
+            self.allocations += 1
+        return surface
+
+    # build(surface) draws into a fresh surface of `size`
+    def sprite(self, key, size, build, flags=pygame.SRCALPHA):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, flags)
+            build(surface)
+            self.surfaces[key] = surface
+            self.allocations += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from particles import map_rgb_array
+
+# Vectorized gradient backgrounds with a small cache.
+#
+# The color ramp for a gradient is computed once as an array and broadcast
+# into the surface's pixels in one operation, so a background can be rebuilt
+# on resize or theme change without a hitch; repeated requests for the same
+# size and colors come straight from the cache.
+
+
+# stops is a list of colors spread evenly or of (position, color) pairs with
+# positions from 0.0 to 1.0; both become a hashable tuple of pairs
+def normalize_stops(stops):
+    if len(stops) < 2:
+        raise ValueError("a gradient needs at least two color stops")
+    if isinstance(stops[0][1], (tuple, list)):
+        return tuple((float(p), tuple(c[:3])) for p, c in stops)
+    return tuple((i / (len(stops) - 1), tuple(c[:3])) for i, c in enumerate(stops))
+
+
+# Colors per line, shape (length, 3)
+def gradient_ramp(length, stops):
+    stops = normalize_stops(stops)
+    positions = [p for p, _ in stops]
+    colors = np.array([c for _, c in stops], dtype=np.float64)
+
+    lines = np.arange(length, dtype=np.float64)
+    ramp = np.empty((length, 3))
+    ramp[:] = colors[0]
+    for k in range(len(colors) - 1):
+        start = positions[k] * length
+        span = (positions[k + 1] - positions[k]) * length
+        if span <= 0:
+            continue
+        # Same per-line rate as the original fill_gradient: a + rate * line
+        rate = (colors[k + 1] - colors[k]) / span
+        seg = lines >= start
+        ramp[seg] = colors[k] + rate * (lines[seg, None] - start)
+    # Channels are clamped and truncated like pygame does with float colors
+    return np.clip(ramp, 0, 255).astype(np.uint8)
+
+
+# Drop-in replacement for the per-scanline fill_gradient in the Pong script
+def fill_gradient(surface, color, gradient, rect=None, vertical=True, forward=True):
+    if rect is None:
+        rect = surface.get_rect()
+    stops = [color, gradient] if forward else [gradient, color]
+    length = rect.height if vertical else rect.width
+    if length <= 0 or rect.width <= 0 or rect.height <= 0:
+        return
+    ramp = gradient_ramp(length, stops)
+    surface.blit(_ramp_surface(ramp, tuple(rect.size), vertical), rect.topleft)
+
+
+def _ramp_surface(ramp, size, vertical):
+    surface = pygame.Surface(size)
+    if surface.get_bytesize() != 4:
+        pixels = np.broadcast_to(ramp[None, :, :] if vertical else ramp[:, None, :], size + (3,))
+        pygame.surfarray.blit_array(surface, np.ascontiguousarray(pixels))
+        return surface
+    line_colors = map_rgb_array(surface, ramp)
+    rows = pygame.surfarray.pixels2d(surface).T  # (height, width), row-major like memory
+    rows[:] = line_colors[:, None] if vertical else line_colors[None, :]
+    del rows  # unlock the surface
+    return surface
+
+
+class GradientCache:
+    def __init__(self, max_size=8):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def get(self, size, stops, vertical=True):
+        stops = normalize_stops(stops)
+        key = (tuple(size), stops, vertical)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            length = size[1] if vertical else size[0]
+            surface = _ramp_surface(gradient_ramp(length, stops), tuple(size), vertical)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
@@ -0,0 +1,254 @@
+import argparse
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+# Breakout level packs.
+#
+# A pack is one file holding any number of levels, each a grid of cells with
+# a brick type (0 = empty) and hit points. Grids are stored as raw uint8
+# (type, hp) pairs, so the pack is memory-mapped and a level's grid is a
+# zero-copy numpy view: opening a pack of hundreds of levels reads only its
+# index, and playing a level pages in just that grid. build_board() turns a
+# grid into brick geometry in one vectorized pass. Campaign plays the levels
+# in order and prepares the next board on the asset loader while the current
+# one is played.
+#
+# File layout: MAGIC, header struct, one index entry per level (grid offset,
+# columns, rows, name), then the grids, row-major.
+#
+# Text levels are for authoring (`python levels.py pack OUT a.txt b.txt`):
+# one line per row, one character per cell. "." or a space is empty, 1-9 is
+# a standard brick with that many hit points, and A-Z is brick type 2-27
+# with one hit point.
+
+MAGIC = b"XLVL"
+VERSION = 1
+HEADER = struct.Struct("<BI")  # version, level count
+ENTRY = struct.Struct("<QHH32s")  # grid offset, columns, rows, name (UTF-8, NUL padded)
+CELL = np.dtype([("type", "u1"), ("hp", "u1")])
+
+# Board geometry (same values as the game): the classic 10 columns of 75x30
+# bricks with 5 pixel gaps starting at y=50. Wider or taller boards shrink
+# their cells to fit the screen width and MAX_BOARD_HEIGHT.
+BOARD_WIDTH = 800
+BOARD_TOP = 50
+MAX_BOARD_HEIGHT = 420  # 12 classic rows
+CELL_WIDTH = 80
+CELL_HEIGHT = 35
+GAP = 5
+# Largest grid that still leaves every cell a brick at least one pixel across
+MAX_COLUMNS = BOARD_WIDTH // 2
+MAX_ROWS = MAX_BOARD_HEIGHT // 2
+
+Level = namedtuple("Level", "name grid")  # grid: (rows, columns) array of CELL
+
+# A level laid out for play, as arrays in row-major cell order; index is each
+# brick's cell number (row * columns + column). Cell (row, column) starts at
+# (left + column * cell_width, BOARD_TOP + row * cell_height).
+Board = namedtuple("Board", "name columns rows left cell_width cell_height brick_width brick_height x y kind hp index")
+
+
+def cell_size(columns, rows):
+    cell_width = min(CELL_WIDTH, BOARD_WIDTH // columns)
+    cell_height = min(CELL_HEIGHT, MAX_BOARD_HEIGHT // rows)
+    gap = GAP if min(cell_width, cell_height) >= GAP * 4 else 1
+    return cell_width, cell_height, gap
+
+
+def check_size(name, columns, rows):
+    if not (1 <= columns <= MAX_COLUMNS and 1 <= rows <= MAX_ROWS):
+        raise ValueError(f"level {name!r} is {columns}x{rows}; levels can be 1x1 to {MAX_COLUMNS}x{MAX_ROWS}")
+
+
+def build_board(level):
+    grid = level.grid
+    rows, columns = grid.shape
+    cell_width, cell_height, gap = cell_size(columns, rows)
+    left = (BOARD_WIDTH - columns * cell_width) // 2
+    cells = grid.reshape(-1)
+    index = np.flatnonzero(cells["type"])
+    row, column = np.divmod(index, columns)
+    bricks = cells[index]
+    return Board(level.name, columns, rows, left, cell_width, cell_height, cell_width - gap, cell_height - gap,
+                 left + column * cell_width + gap, BOARD_TOP + row * cell_height + gap,
+                 bricks["type"], np.maximum(bricks["hp"], 1), index)
+
+
+def classic_level(rows, columns, name="Classic"):
+    check_size(name, columns, rows)
+    grid = np.ones((rows, columns), dtype=CELL)
+    return Level(name, grid)
+
+
+def parse_text(name, text):
+    lines = [line.rstrip("\n") for line in text.splitlines() if line.strip()]
+    columns = max((len(line) for line in lines), default=0)
+    check_size(name, columns, len(lines))
+    chars = np.full((len(lines), columns), ord("."), dtype=np.uint8)
+    for row, line in enumerate(lines):
+        chars[row, :len(line)] = np.frombuffer(line.encode("ascii"), dtype=np.uint8)
+    grid = np.zeros(chars.shape, dtype=CELL)
+    digits = (chars >= ord("1")) & (chars <= ord("9"))
+    letters = (chars >= ord("A")) & (chars <= ord("Z"))
+    grid["type"][digits] = 1
+    grid["hp"][digits] = chars[digits] - ord("0")
+    grid["type"][letters] = chars[letters] - ord("A") + 2
+    grid["hp"][letters] = 1
+    return Level(name, grid)
+
+
+class LevelPack:
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self.data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a level pack")
+        pos = len(MAGIC) + HEADER.size
+        if len(self.data) < pos:
+            raise ValueError(f"{path} is truncated")
+        version, count = HEADER.unpack_from(self.data, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported level pack version {version}")
+        if len(self.data) < pos + count * ENTRY.size:
+            raise ValueError(f"{path} is truncated")
+        # Every grid is checked here, so playing the pack can't fail halfway
+        self.entries = []
+        for _ in range(count):
+            offset, columns, rows, name = ENTRY.unpack_from(self.data, pos)
+            name = name.rstrip(b"\0").decode(errors="ignore")
+            check_size(name, columns, rows)
+            if offset + rows * columns * CELL.itemsize > len(self.data):
+                raise ValueError(f"{path} is truncated (level {name!r})")
+            self.entries.append((offset, columns, rows, name))
+            pos += ENTRY.size
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, i):
+        offset, columns, rows, name = self.entries[i]
+        grid = self.data[offset:offset + rows * columns * CELL.itemsize].view(CELL).reshape(rows, columns)
+        return Level(name, grid)
+
+
+def write_pack(path, levels):
+    levels = list(levels)
+    index = bytearray(MAGIC + HEADER.pack(VERSION, len(levels)))
+    offset = len(index) + ENTRY.size * len(levels)
+    for level in levels:
+        rows, columns = level.grid.shape
+        index += ENTRY.pack(offset, columns, rows, level.name.encode()[:32])
+        offset += level.grid.nbytes
+    with open(path, "wb") as f:
+        f.write(index)
+        for level in levels:
+            f.write(np.ascontiguousarray(level.grid, dtype=CELL).tobytes())
+
+
+# Largest grid in a pack or list of levels
+def max_cells(levels):
+    return max((level.grid.size for level in levels), default=0)
+
+
+# A pack, or a single text level
+def open_levels(path):
+    if path.endswith(".txt"):
+        with open(path) as f:
+            return [parse_text(os.path.splitext(os.path.basename(path))[0], f.read())]
+    return LevelPack(path)
+
+
+class Campaign:
+    # prepare(board) builds the game's objects for a level; it runs on the
+    # loader thread for every level after the first
+    def __init__(self, levels, loader, prepare, start=0):
+        self.levels = levels
+        self.loader = loader
+        self.prepare = prepare
+        self.start = start
+        self.index = start
+        self.preloading = None
+
+    def _build(self, index):
+        return self.prepare(build_board(self.levels[index]))
+
+    def _job(self, index):
+        return f"level {index + 1}"
+
+    def restart(self):
+        self.index = self.start
+
+    # The current level's objects (waiting for the preload if it's still
+    # running); starts preparing the next one
+    def current(self):
+        if self.preloading == self.index:
+            prepared = self.loader.take(self._job(self.index))
+        else:
+            if self.preloading is not None:
+                self.loader.take(self._job(self.preloading))  # restarted; drop the unused preload
+            prepared = self._build(self.index)
+        self.preloading = None
+        if self.index + 1 < len(self.levels):
+            self.preloading = self.index + 1
+            self.loader.submit(self._job(self.index + 1), self._build, self.index + 1)
+        return prepared
+
+    def advance(self):
+        if self.index + 1 >= len(self.levels):
+            return False
+        self.index += 1
+        return True
+
+    def name(self):
+        return self.levels[self.index].name
+
+
+# Command line options for the game
+def add_arguments(parser):
+    group = parser.add_argument_group("levels")
+    group.add_argument("--levels", metavar="PACK", help="play a level pack (or a .txt level) instead of the classic board")
+    group.add_argument("--level", type=int, default=1, help="level to start from (1 = the first)")
+
+
+def _random_levels(count, columns, rows, seed):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        grid = np.zeros((rows, columns), dtype=CELL)
+        density = rng.uniform(0.4, 1.0)
+        filled = rng.random((rows, columns)) < density
+        grid["type"][filled] = rng.integers(1, 6, size=int(filled.sum()))
+        grid["hp"][filled] = rng.integers(1, 4, size=int(filled.sum()))
+        yield Level(f"Random {i + 1}", grid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Breakout level packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="build a pack from text levels")
+    pack.add_argument("output")
+    pack.add_argument("levels", nargs="+", metavar="LEVEL.txt")
+    make = commands.add_parser("make", help="generate a pack of random levels (for testing)")
+    make.add_argument("output")
+    make.add_argument("--count", type=int, default=200)
+    make.add_argument("--columns", type=int, default=40)
+    make.add_argument("--rows", type=int, default=24)
+    make.add_argument("--seed", type=int, default=0)
+    info = commands.add_parser("info", help="list a pack's levels")
+    info.add_argument("pack")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        write_pack(args.output, (level for path in args.levels for level in open_levels(path)))
+    elif args.command == "make":
+        write_pack(args.output, _random_levels(args.count, args.columns, args.rows, args.seed))
+    else:
+        for i, level in enumerate(open_levels(args.pack)):
+            rows, columns = level.grid.shape
+            print(f"{i + 1:4}  {level.name:32}  {columns}x{rows}, {np.count_nonzero(level.grid['type'])} bricks")
+
+
+if __name__ == "__main__":
+    main()
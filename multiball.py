@@ -0,0 +1,171 @@
+import numpy as np
+
+from levels import BOARD_TOP
+from pong_sim import rect_round, colliderect
+
+# Multiball: any number of balls on one Breakout board, as NumPy arrays.
+#
+# BrickGrid indexes a level's bricks (see levels.Board) by grid cell, with
+# their rects and hit points in arrays; a cleared cell holds -1. BallSwarm
+# moves every ball by the single ball's rules in bbreak.py: sub-steps of at
+# most max_substep pixels, side walls flip dx and the top flips dy, the
+# bottom loses the ball (it is served again), the paddle flips dy, and a ball
+# hits at most one brick per sub-step, the first in creation order, and
+# flips dy. Positions are kept as floats, with x and y their rounded box
+# corner, so a serve at any angle keeps it. Each sub-step is one vectorized
+# pass over all balls: walls and paddle, then a broad phase that looks up
+# only the grid cells each ball's box covers, then a narrow phase testing
+# those few bricks' exact rects. Cost grows with the number of balls, not
+# bricks.
+
+NO_BRICK = np.iinfo(np.int64).max
+
+
+class BrickGrid:
+    def __init__(self, board, ball_size):
+        self.columns = board.columns
+        self.rows = board.rows
+        self.left = board.left
+        self.cell_width = board.cell_width
+        self.cell_height = board.cell_height
+        self.width = board.brick_width
+        self.height = board.brick_height
+        self.x = board.x
+        self.y = board.y
+        self.hp = board.hp.astype(np.int64)
+        self.cell_of = board.index
+        self.cells = np.full(board.rows * board.columns, -1, dtype=np.int64)
+        self.cells[board.index] = np.arange(len(board.index))
+        self.remaining = len(board.index)
+        # Cells a ball's box can overlap along each axis, from the one its corner is in
+        dc = np.arange(ball_size // self.cell_width + 2)
+        dr = np.arange(ball_size // self.cell_height + 2)
+        self.offsets = (dr[:, None] * self.columns + dc[None, :]).ravel()
+        self.offset_columns = np.broadcast_to(dc[None, :], (len(dr), len(dc))).ravel()
+        self.offset_rows = np.broadcast_to(dr[:, None], (len(dr), len(dc))).ravel()
+        self.top = BOARD_TOP
+        self.bottom = BOARD_TOP + board.rows * board.cell_height
+
+    # (balls, k) indices of the live bricks in the cells under each box, -1 for none
+    def candidates(self, x, y):
+        column = (x - self.left) // self.cell_width
+        row = (y - self.top) // self.cell_height
+        c = column[:, None] + self.offset_columns
+        r = row[:, None] + self.offset_rows
+        inside = (c >= 0) & (c < self.columns) & (r >= 0) & (r < self.rows)
+        return np.where(inside, self.cells[np.where(inside, r * self.columns + c, 0)], -1)
+
+    # Take one hit point per ball from each brick hit; returns the bricks hit
+    # and the ones that broke
+    def hit(self, bricks):
+        np.subtract.at(self.hp, bricks, 1)
+        hit = np.unique(bricks)
+        broken = hit[self.hp[hit] <= 0]
+        self.cells[self.cell_of[broken]] = -1
+        self.remaining -= len(broken)
+        return hit, broken
+
+
+class BallSwarm:
+    def __init__(self, count, size, speed, field_size, rng):
+        self.size = size
+        self.speed = speed  # (dx, dy) of a classic serve
+        self.width, self.height = field_size
+        self.rng = rng
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.dx = np.zeros(count, dtype=np.float64)
+        self.dy = np.zeros(count, dtype=np.float64)
+        self.fx = np.zeros(count, dtype=np.float64)
+        self.fy = np.zeros(count, dtype=np.float64)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self.serve()
+
+    def __len__(self):
+        return len(self.x)
+
+    # Serve from the center, upwards; spread horizontally so the balls part ways
+    def serve(self, mask=None):
+        if mask is None:
+            mask = np.ones(len(self.x), dtype=bool)
+        count = int(np.count_nonzero(mask))
+        self.fx[mask] = self.x[mask] = self.width // 2 - self.size // 2
+        self.fy[mask] = self.y[mask] = self.height // 2 - self.size // 2
+        self.dx[mask] = self.rng.choice((-1, 1), count) * self.rng.uniform(0.2, 1.0, count) * self.speed[0]
+        self.dy[mask] = -self.speed[1]
+        self.prev_x[mask] = self.x[mask]
+        self.prev_y[mask] = self.y[mask]
+
+    # Returns (wall bounces, paddle hits, balls lost, bricks hit, bricks broken)
+    def step(self, paddle, grid, max_substep):
+        size = self.size
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        steps = np.maximum(1, np.ceil(np.maximum(np.abs(self.dx), np.abs(self.dy)) / max_substep)).astype(np.int64)
+        fx = self.fx
+        fy = self.fy
+        lost = np.zeros(len(self.x), dtype=bool)
+        walls = paddles = 0
+        hits = []
+        for k in range(int(steps.max())):
+            active = (steps > k) & ~lost
+            fx += np.where(active, self.dx / steps, 0)
+            fy += np.where(active, self.dy / steps, 0)
+            self.x = np.where(active, rect_round(fx), self.x)
+            self.y = np.where(active, rect_round(fy), self.y)
+
+            side = active & ((self.x <= 0) | (self.x + size >= self.width))
+            np.negative(self.dx, out=self.dx, where=side)
+            top = active & (self.y <= 0)
+            np.negative(self.dy, out=self.dy, where=top)
+            walls += int(np.count_nonzero(side | top))
+
+            bottom = active & (self.y + size >= self.height)
+            lost |= bottom
+            active &= ~bottom
+
+            on_paddle = active & colliderect(self.x, self.y, size, size, *paddle)
+            np.negative(self.dy, out=self.dy, where=on_paddle)
+            paddles += int(np.count_nonzero(on_paddle))
+
+            # Broad phase: only balls over the board, only the cells under them
+            near = np.flatnonzero(active & (self.y < grid.bottom) & (self.y + size > grid.top))
+            if len(near) == 0 or grid.remaining == 0:
+                continue
+            bx = self.x[near]
+            by = self.y[near]
+            candidates = grid.candidates(bx, by)
+            # Narrow phase: exact rects of the candidate bricks
+            brick = np.maximum(candidates, 0)
+            overlap = (candidates >= 0) & colliderect(bx[:, None], by[:, None], size, size,
+                                                      grid.x[brick], grid.y[brick], grid.width, grid.height)
+            first = np.where(overlap, candidates, NO_BRICK).min(axis=1)
+            struck = first != NO_BRICK
+            if struck.any():
+                balls = near[struck]
+                self.dy[balls] = -self.dy[balls]
+                hits.append(grid.hit(first[struck]))
+
+        if lost.any():
+            self.serve(lost)
+        if hits:
+            hit = np.unique(np.concatenate([h for h, b in hits]))
+            broken = np.concatenate([b for h, b in hits])
+        else:
+            hit = broken = np.zeros(0, dtype=np.int64)
+        return walls, paddles, int(np.count_nonzero(lost)), hit, broken
+
+    # The ball the paddle should go for: the lowest one coming down
+    def lowest_falling(self):
+        return int(np.argmax(np.where(self.dy > 0, self.y, -1)))
+
+    # Logical box around every ball's interpolated position
+    def bounds(self, x, y):
+        left, top = int(x.min()), int(y.min())
+        return left, top, int(x.max()) - left + self.size + 1, int(y.max()) - top + self.size + 1
+
+    def interpolated(self, alpha):
+        x = np.rint(self.prev_x + (self.x - self.prev_x) * alpha).astype(np.int64)
+        y = np.rint(self.prev_y + (self.y - self.prev_y) * alpha).astype(np.int64)
+        return x, y
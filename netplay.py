@@ -0,0 +1,411 @@
+import random
+import socket
+import time
+
+from replay import write_varint, read_varint, zigzag, unzigzag
+
+# Two-player network Pong over UDP.
+#
+# The host runs the authoritative game; the client controls the right paddle.
+#
+# Client -> host, every INPUT_INTERVAL ticks: b"I", the newest snapshot it has
+# (the host's delta baseline), the newest input tick and the paddle targets
+# (mouse y) of its last unacknowledged ticks, newest first, as zigzag deltas.
+# Each input is resent until acknowledged, so a lost packet costs nothing as
+# long as a later one arrives. The host applies one client input per tick.
+#
+# Host -> client, tick_rate times a second: b"S", sequence number, distance
+# back to the baseline snapshot (0 = none), the newest client input tick
+# applied, a bitmask of the FIELDS that differ from the baseline and their
+# zigzag deltas. The baseline is the newest snapshot the client acknowledged,
+# so a typical snapshot (ball and paddles moved) is under 20 bytes.
+#
+# The client draws the ball and the host's paddle interpolate_ms behind its
+# estimate of the host clock, between the two snapshots around that time. Its
+# own paddle is predicted: inputs apply locally at once, and each snapshot
+# resets the paddle to the host's value and re-applies the inputs the host
+# hasn't acknowledged yet.
+#
+# NetLink can add one-way latency, jitter (which also reorders packets) and
+# random loss to everything a side sends, for testing over localhost. Delayed
+# packets go out on the next poll, so the delay has a resolution of one frame.
+
+FIELDS = ("tick", "state", "ball_x", "ball_y", "ball_dx", "ball_dy", "left_y", "right_y", "left_score", "right_score")
+STATES = ("menu", "playing", "game_over")
+VELOCITY_SCALE = 256  # ball dx/dy are sent as fixed point
+INPUT_INTERVAL = 2  # client ticks per input packet
+MAX_INPUTS = 16  # inputs per packet, newest first
+HISTORY = 64  # snapshots kept for delta baselines and interpolation
+MAX_BACKLOG = 8  # host skips ahead if client inputs pile up beyond this
+PEER_TIMEOUT = 3.0  # seconds of silence before the peer counts as gone
+UDP_OVERHEAD = 28  # IPv4 + UDP header bytes, counted in the bandwidth stats
+DEFAULT_PORT = 5555
+
+
+class NetLink:
+    def __init__(self, sock, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.sock = sock
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)  # separate from the game's RNG
+        self.queue = []  # (due time, data, address)
+        self.started = time.perf_counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.dropped = 0
+
+    def send(self, data, address):
+        self.packets_sent += 1
+        self.bytes_sent += len(data) + UDP_OVERHEAD
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay <= 0:
+            self._sendto(data, address)
+        else:
+            self.queue.append((time.perf_counter() + delay, data, address))
+
+    def _sendto(self, data, address):
+        try:
+            self.sock.sendto(data, address)
+        except OSError:
+            pass  # peer gone or port unreachable; UDP doesn't care
+
+    def flush(self):
+        if not self.queue:
+            return
+        now = time.perf_counter()
+        due = [packet for packet in self.queue if packet[0] <= now]
+        if due:
+            self.queue = [packet for packet in self.queue if packet[0] > now]
+            for _, data, address in sorted(due, key=lambda packet: packet[0]):
+                self._sendto(data, address)
+
+    # Sends what is due and returns the datagrams waiting on the socket
+    def poll(self):
+        self.flush()
+        packets = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                continue  # e.g. ICMP port unreachable reported on Windows
+            self.packets_received += 1
+            self.bytes_received += len(data) + UDP_OVERHEAD
+            packets.append((data, address))
+        return packets
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (f"Network: {self.bytes_sent / elapsed:.0f} B/s up, {self.bytes_received / elapsed:.0f} B/s down "
+                f"(incl. UDP/IP headers), {self.packets_sent} packets sent, {self.packets_received} received, "
+                f"{self.dropped} dropped by simulation")
+
+    def close(self):
+        self.sock.close()
+
+
+def encode_snapshot(seq, baseline_seq, baseline, values, input_ack):
+    buf = bytearray(b"S")
+    write_varint(buf, seq)
+    write_varint(buf, seq - baseline_seq if baseline is not None else 0)
+    write_varint(buf, input_ack)
+    if baseline is None:
+        baseline = (0,) * len(FIELDS)
+    mask = 0
+    deltas = []
+    for i, (value, base) in enumerate(zip(values, baseline)):
+        if value != base:
+            mask |= 1 << i
+            deltas.append(value - base)
+    write_varint(buf, mask)
+    for delta in deltas:
+        write_varint(buf, zigzag(delta))
+    return bytes(buf)
+
+
+# Returns (seq, baseline seq or None, input ack, values); values is None if
+# the baseline is one we no longer have. A malformed snapshot raises
+# IndexError (truncated) or ValueError (out-of-range game state).
+def decode_snapshot(data, history):
+    seq, pos = read_varint(data, 1)
+    back, pos = read_varint(data, pos)
+    input_ack, pos = read_varint(data, pos)
+    mask, pos = read_varint(data, pos)
+    if back:
+        baseline = history.get(seq - back)
+        if baseline is None:
+            return seq, seq - back, input_ack, None
+    else:
+        baseline = (0,) * len(FIELDS)
+    values = list(baseline)
+    for i in range(len(FIELDS)):
+        if mask & (1 << i):
+            delta, pos = read_varint(data, pos)
+            values[i] += unzigzag(delta)
+    state = values[FIELDS.index("state")]
+    if not 0 <= state < len(STATES):
+        raise ValueError(f"snapshot {seq} has unknown game state {state}")
+    return seq, seq - back if back else None, input_ack, tuple(values)
+
+
+def encode_inputs(snapshot_ack, last_tick, targets):
+    # targets: newest first
+    buf = bytearray(b"I")
+    write_varint(buf, snapshot_ack)
+    write_varint(buf, last_tick)
+    write_varint(buf, len(targets))
+    previous = 0
+    for target in targets:
+        write_varint(buf, zigzag(target - previous))
+        previous = target
+    return bytes(buf)
+
+
+def decode_inputs(data):
+    snapshot_ack, pos = read_varint(data, 1)
+    last_tick, pos = read_varint(data, pos)
+    count, pos = read_varint(data, pos)
+    targets = []
+    previous = 0
+    for _ in range(count):
+        delta, pos = read_varint(data, pos)
+        previous += unzigzag(delta)
+        targets.append(previous)
+    return snapshot_ack, {last_tick - i: target for i, target in enumerate(targets) if last_tick - i > 0}
+
+
+def _socket(port=0):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("", port))
+    sock.setblocking(False)
+    return sock
+
+
+# HOST, HOST:PORT, [IPV6] or [IPV6]:PORT; a bare IPv6 address has no port
+def parse_address(text, default_port=DEFAULT_PORT):
+    if text.startswith("["):
+        host, _, port = text[1:].partition("]")
+        port = port[1:]  # after the ":"
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+    return host, int(port) if port else default_port
+
+
+class HostSession:
+    def __init__(self, port, sim_rate, tick_rate=20, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.link = NetLink(_socket(port), latency, jitter, loss, seed)
+        self.snapshot_interval = max(1, round(sim_rate / tick_rate))
+        self.last_heard = 0.0
+        self.tick = 0
+        self.seq = 0
+        self._forget_peer()
+
+    @property
+    def connected(self):
+        return self.peer is not None
+
+    def poll(self):
+        for data, address in self.link.poll():
+            if not data.startswith(b"I"):
+                continue
+            if self.peer is None:
+                print(f"Player joined from {address[0]}:{address[1]}")
+                self.peer = address
+            elif address != self.peer:
+                continue  # one guest at a time
+            self.last_heard = time.perf_counter()
+            try:
+                snapshot_ack, inputs = decode_inputs(data)
+            except IndexError:
+                continue  # truncated
+            if snapshot_ack in self.sent and (self.acked is None or snapshot_ack > self.acked):
+                self.acked = snapshot_ack
+            for tick, target in inputs.items():
+                if tick > self.input_tick:
+                    self.inputs[tick] = target
+        if len(self.inputs) > MAX_BACKLOG:
+            # Nothing consumes inputs outside play (menu, game over); keep the
+            # newest MAX_BACKLOG ticks, all next_input() would use of them
+            newest = max(self.inputs)
+            self.inputs = {tick: target for tick, target in self.inputs.items() if tick > newest - MAX_BACKLOG}
+        if self.peer is not None and time.perf_counter() - self.last_heard > PEER_TIMEOUT:
+            print("Player left")
+            self._forget_peer()
+
+    def _forget_peer(self):
+        self.peer = None
+        self.sent = {}  # seq -> values, for delta baselines
+        self.acked = None  # newest snapshot the client has
+        self.inputs = {}  # client tick -> paddle target
+        self.input_tick = 0  # newest client input applied
+        self.target = None
+
+    # The guest's paddle target for this tick, or None without a guest
+    def next_input(self):
+        if self.peer is None:
+            return None
+        if self.inputs:
+            newest = max(self.inputs)
+            if newest - self.input_tick > MAX_BACKLOG:
+                self.input_tick = newest - MAX_BACKLOG // 2
+            later = [tick for tick in self.inputs if tick > self.input_tick]
+            if later:
+                self.input_tick = min(later)
+                self.target = self.inputs[self.input_tick]
+            self.inputs = {tick: target for tick, target in self.inputs.items() if tick > self.input_tick}
+        return self.target
+
+    # Called once per simulation tick with the game state as FIELDS values
+    def end_tick(self, values):
+        self.tick += 1
+        if self.peer is None or self.tick % self.snapshot_interval:
+            return
+        self.seq += 1
+        values = (self.tick, *values)
+        baseline = self.sent.get(self.acked)
+        self.link.send(encode_snapshot(self.seq, self.acked, baseline, values, self.input_tick), self.peer)
+        self.sent[self.seq] = values
+        self.sent.pop(self.seq - HISTORY, None)
+
+    def close(self):
+        print(self.link.summary())
+        self.link.close()
+
+
+# Clamped paddle top for a target center y, the same rule the host applies
+def apply_input(target, height, screen_height):
+    return min(max(target - height // 2, 0), screen_height - height)
+
+
+class ClientSession:
+    def __init__(self, address, sim_rate, paddle_height, screen_height, interpolate_ms=100, latency=0.0,
+                 jitter=0.0, loss=0.0, seed=None):
+        self.link = NetLink(_socket(), latency, jitter, loss, seed)
+        self.address = (socket.gethostbyname(address[0]), address[1])
+        self.paddle_height = paddle_height
+        self.screen_height = screen_height
+        self.delay = interpolate_ms * sim_rate / 1000  # in host ticks
+        self.tick = 0
+        self.clock = None  # estimate of the host tick
+        self.received = {}  # seq -> values
+        self.newest = None  # seq
+        self.pending = {}  # tick -> target, not yet acknowledged
+        self.input_ack = 0
+        self.predicted = None
+        self.last_heard = 0.0
+        self.stale = 0  # snapshots that arrived late or without their baseline
+
+    @property
+    def connected(self):
+        return self.newest is not None and time.perf_counter() - self.last_heard < PEER_TIMEOUT
+
+    def poll(self):
+        for data, address in self.link.poll():
+            if address != self.address or not data.startswith(b"S"):
+                continue
+            try:
+                seq, _, input_ack, values = decode_snapshot(data, self.received)
+            except (IndexError, ValueError):
+                self.stale += 1
+                continue
+            self.last_heard = time.perf_counter()
+            if values is None or (self.newest is not None and seq <= self.newest):
+                self.stale += values is None or seq not in self.received
+                if values is not None:
+                    self.received[seq] = values  # late, still useful for interpolation
+                continue
+            self.received[seq] = values
+            self.newest = seq
+            for old in [old for old in self.received if old <= seq - HISTORY]:
+                del self.received[old]
+            self._reconcile(values, input_ack)
+            host_tick = values[0]
+            if self.clock is None or abs(host_tick - self.clock) > 2 * self.delay + 10:
+                self.clock = float(host_tick)
+            else:
+                self.clock += (host_tick - self.clock) * 0.1
+
+    def _reconcile(self, values, input_ack):
+        self.input_ack = max(self.input_ack, input_ack)
+        self.pending = {tick: target for tick, target in self.pending.items() if tick > self.input_ack}
+        y = values[FIELDS.index("right_y")]
+        for tick in sorted(self.pending):
+            y = apply_input(self.pending[tick], self.paddle_height, self.screen_height)
+        self.predicted = y
+
+    # One local tick: record and predict the paddle input, send inputs now and then
+    def send_input(self, target):
+        self.tick += 1
+        if self.clock is not None:
+            self.clock += 1
+        self.pending[self.tick] = target
+        self.pending.pop(self.tick - HISTORY, None)  # never acknowledged, e.g. no host yet
+        if self.predicted is not None:
+            self.predicted = apply_input(target, self.paddle_height, self.screen_height)
+        if self.tick % INPUT_INTERVAL == 0:
+            recent = sorted(self.pending, reverse=True)[:MAX_INPUTS]
+            targets = [self.pending[tick] for tick in recent]
+            self.link.send(encode_inputs(self.newest or 0, self.tick, targets), self.address)
+
+    # Interpolated host state {field: value} at the render time, or None
+    # before the first snapshot. Positions are blended; everything else comes
+    # from the older snapshot, and no blending across a serve.
+    def view(self):
+        if self.newest is None:
+            return None
+        render_tick = self.clock - self.delay
+        snapshots = sorted(self.received.values())
+        older = snapshots[0]
+        newer = None
+        for values in snapshots:
+            if values[0] <= render_tick:
+                older = values
+            else:
+                newer = values
+                break
+        result = dict(zip(FIELDS, older))
+        if newer is not None and older[0] <= render_tick:
+            same_rally = older[1:2] + older[8:] == newer[1:2] + newer[8:]
+            t = (render_tick - older[0]) / (newer[0] - older[0])
+            if same_rally:
+                for name in ("ball_x", "ball_y", "left_y"):
+                    i = FIELDS.index(name)
+                    result[name] = round(older[i] + (newer[i] - older[i]) * t)
+        result["ball_dx"] /= VELOCITY_SCALE
+        result["ball_dy"] /= VELOCITY_SCALE
+        result["state"] = STATES[result["state"]]
+        result["right_y"] = self.predicted
+        return result
+
+    def close(self):
+        print(self.link.summary() + f", {self.stale} snapshots late or undecodable")
+        self.link.close()
+
+
+# Host state as FIELDS values (without the tick)
+def pack_state(state, ball, left_paddle, right_paddle, left_score, right_score):
+    return (STATES.index(state), ball.rect.x, ball.rect.y, round(ball.dx * VELOCITY_SCALE),
+            round(ball.dy * VELOCITY_SCALE), left_paddle.rect.y, right_paddle.rect.y, left_score, right_score)
+
+
+# Command line options for the network mode
+def add_arguments(parser):
+    group = parser.add_argument_group("network play")
+    group.add_argument("--host", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                       help=f"host a two-player game; the guest plays the right paddle (default port {DEFAULT_PORT})")
+    group.add_argument("--connect", metavar="HOST[:PORT]", help="join a hosted game")
+    group.add_argument("--tick-rate", type=int, default=20, help="host snapshots per second")
+    group.add_argument("--interpolate-ms", type=int, default=100,
+                       help="client: how far behind the host to draw the ball and the host's paddle")
+    group.add_argument("--net-latency", type=int, default=0, metavar="MS", help="add this much one-way delay to sent packets")
+    group.add_argument("--net-jitter", type=int, default=0, metavar="MS", help="add up to +/- this much random delay")
+    group.add_argument("--net-loss", type=float, default=0.0, metavar="FRACTION", help="drop this fraction of sent packets")
@@ -0,0 +1,113 @@
+import argparse
+import time
+
+import pygame
+
+# Idle-aware frame pacing.
+#
+# Fixed pacing (the default) is the classic loop: every frame is rendered and
+# clock.tick() holds it to --fps. Adaptive pacing gives every game state its
+# own frame cap (--state-fps, idle screens default to IDLE_FPS) and lets idle
+# screens (menus, trophies, game over) sleep between changes: after the cap,
+# the pacer blocks in pygame.event.wait() until input arrives or the next
+# change the game scheduled is due, so a static screen costs a wakeup every
+# MAX_SLEEP seconds and nothing more.
+#
+# Each frame the game calls schedule(delay) for whatever will change on its
+# own (a blinking prompt's next flip), or schedule(0) for anything that needs
+# every frame (a moving background, network sessions, loading); an event
+# that arrives during the wait is put back on the queue for the next frame.
+# Time an idle screen spends waiting (its cap and the event wait) is passed
+# to the timestep as idle time, so the ticks it covers are simulated in full
+# rather than dropped as a stall. In the other states the cap's sleep is
+# ordinary frame time. summary() reports the wait per state, so each cap can
+# be judged on its own.
+
+IDLE_FPS = 30
+MAX_SLEEP = 1.0  # longest wait without input or a scheduled change
+
+# Called with the game state at the start of every wait(), before the clock
+# ticks; bench.py uses it to tell which state each frame belongs to
+on_wait = None
+
+
+class FramePacer:
+    def __init__(self, clock, timestep, fps, idle_states=(), state_fps=None, adaptive=False):
+        self.clock = clock
+        self.timestep = timestep
+        self.fps = fps
+        self.idle_states = frozenset(idle_states)
+        self.state_fps = {state: IDLE_FPS for state in self.idle_states}
+        self.state_fps.update(state_fps or {})
+        self.adaptive = adaptive
+        self.deadline = time.perf_counter() + MAX_SLEEP
+        self.last = time.perf_counter()
+        self.sleeps = 0  # idle waits that ran to their timeout
+        self.wakeups = 0  # idle waits cut short by input
+        self.waits = {}  # state -> [frames, seconds waited]
+
+    # Something on screen changes by itself `delay` seconds from now
+    def schedule(self, delay):
+        self.deadline = min(self.deadline, time.perf_counter() + delay)
+
+    # Waits out the rest of the frame for `state`; returns the frame time in seconds
+    def wait(self, state):
+        if on_wait:
+            on_wait(state)
+        if not self.adaptive:
+            return self.clock.tick(self.fps) / 1000.0
+        start = time.perf_counter()
+        self.clock.tick(self.state_fps.get(state, self.fps))
+        if state in self.idle_states:
+            timeout = self.deadline - time.perf_counter()
+            if timeout > 0.001:
+                event = pygame.event.wait(int(timeout * 1000))
+                if event.type == pygame.NOEVENT:
+                    self.sleeps += 1
+                else:
+                    pygame.event.post(event)
+                    self.wakeups += 1
+        now = time.perf_counter()
+        totals = self.waits.setdefault(state, [0, 0.0])
+        totals[0] += 1
+        totals[1] += now - start
+        if state in self.idle_states:
+            self.timestep.idle += now - start
+        frame_time = now - self.last
+        self.last = now
+        self.deadline = now + MAX_SLEEP
+        return frame_time
+
+    def summary(self):
+        parts = []
+        for state, (frames, waited) in self.waits.items():
+            kind = "idle" if state in self.idle_states else "in the frame cap"
+            parts.append(f"{state}: {frames} frames, {waited:.1f} s {kind}")
+        return f"Frame pacing: {'; '.join(parts)} ({self.sleeps} idle sleeps, {self.wakeups} input wakeups)"
+
+
+def _state_fps(text):
+    state, _, fps = text.partition("=")
+    if not state or not fps:
+        raise argparse.ArgumentTypeError(f"expected STATE=FPS, got {text!r}")
+    return state, int(fps)
+
+
+# The pacer for this run; replays and fast-forward always use fixed pacing
+# so their frames don't depend on timing, and captures so their video has a
+# steady frame rate
+def from_args(args, clock, timestep, idle_states):
+    fps = 0 if args.fast_forward else args.fps
+    adaptive = args.pacing == "adaptive" and not args.replay and not args.capture
+    return FramePacer(clock, timestep, fps, idle_states, dict(args.state_fps or ()), adaptive)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    group = parser.add_argument_group("frame pacing")
+    group.add_argument("--pacing", choices=("fixed", "adaptive"), default="fixed",
+                       help="fixed: render every frame at --fps; adaptive: per-state caps, and idle screens "
+                            "redraw only on input or animation")
+    group.add_argument("--state-fps", type=_state_fps, action="append", metavar="STATE=FPS",
+                       help=f"adaptive pacing: frame cap for a game state (idle screens default to {IDLE_FPS}, "
+                            "others to --fps); repeatable")
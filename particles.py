@@ -0,0 +1,158 @@
+import numpy as np
+import pygame
+
+# Fixed-capacity particle pool.
+#
+# Position, velocity and lifetime live in NumPy arrays; the first `count`
+# slots are alive. update() is one vectorized pass plus swap-remove
+# compaction (dead slots are refilled from the tail), and draw() stamps every
+# particle into the surface's pixel array in one go, so tens of thousands of
+# particles cost about the same per frame as a handful of draw calls.
+
+# Above this many live particles draw() writes pixels directly; below it a
+# Surface.blits batch of a pre-rendered dot sprite is cheaper than locking.
+PIXEL_DRAW_THRESHOLD = 256
+
+
+# Pixel offsets covered by pygame.draw.circle(radius) around its center
+def dot_offsets(radius):
+    size = radius * 2 + 1
+    dot = pygame.Surface((size, size))
+    dot.set_colorkey((0, 0, 0))
+    pygame.draw.circle(dot, (255, 255, 255), (radius, radius), radius)
+    mask = pygame.mask.from_surface(dot)
+    offsets = [(ox - radius, oy - radius) for ox in range(size) for oy in range(size) if mask.get_at((ox, oy))]
+    return np.array([o[0] for o in offsets], dtype=np.int32), np.array([o[1] for o in offsets], dtype=np.int32)
+
+
+# Vectorized Surface.map_rgb: uint8 RGB array (..., 3) -> pixel values for a
+# 32-bit surface
+def map_rgb_array(surface, rgb):
+    shifts, losses, masks = surface.get_shifts(), surface.get_losses(), surface.get_masks()
+    rgb = rgb.astype(np.uint32)
+    return (((rgb[..., 0] >> losses[0]) << shifts[0]) | ((rgb[..., 1] >> losses[1]) << shifts[1]) |
+            ((rgb[..., 2] >> losses[2]) << shifts[2]) | np.uint32(masks[3]))
+
+
+# Write a dot at every (px, py) straight into a 32-bit surface's pixels.
+# color is one mapped pixel value or one per dot; later dots win on overlap.
+def stamp_dots(surface, px, py, offset_x, offset_y, color):
+    clip = surface.get_clip()
+    per_dot = np.ndim(color) > 0
+    # Dots entirely inside the clip rect (nearly all of them) are written
+    # through flat indices; the few on the edge are clipped per pixel
+    left = clip.left - int(offset_x.min())
+    top = clip.top - int(offset_y.min())
+    span_x = clip.width - int(offset_x.max() - offset_x.min())
+    span_y = clip.height - int(offset_y.max() - offset_y.min())
+    interior = ((px - left).astype(np.uint32) < max(span_x, 0)) & ((py - top).astype(np.uint32) < max(span_y, 0))
+    pixels = pygame.surfarray.pixels2d(surface)
+    rows = pixels.T  # (height, width) view, C-contiguous when pitch == width * 4
+    if rows.flags.c_contiguous:
+        width = rows.shape[1]
+        flat = rows.reshape(-1)
+        index = (py[interior] * width + px[interior])[:, None] + (offset_y * width + offset_x)
+        flat[index.ravel()] = np.repeat(color[interior], len(offset_x)) if per_dot else color
+        edge = ~interior
+    else:
+        edge = np.ones(len(px), dtype=bool)
+    if edge.any():
+        xs = (px[edge][:, None] + offset_x).ravel()
+        ys = (py[edge][:, None] + offset_y).ravel()
+        inside = (xs >= clip.left) & (xs < clip.right) & (ys >= clip.top) & (ys < clip.bottom)
+        values = np.repeat(color[edge], len(offset_x))[inside] if per_dot else color
+        pixels[xs[inside], ys[inside]] = values
+    del pixels, rows  # unlock the surface
+
+
+class ParticleSystem:
+    def __init__(self, capacity, color, radius=2, speed=2.0, lifetime=(20, 40), rng=None):
+        self.capacity = capacity
+        self.color = color
+        self.radius = radius
+        self.speed = speed
+        self.lifetime = lifetime
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int32)
+
+        # Dot sprite, drawn with pygame.draw.circle so it matches the old look,
+        # and its pixel offsets for the pixel-array path
+        size = radius * 2 + 1
+        self.sprite = pygame.Surface((size, size))
+        self.sprite.set_colorkey((0, 0, 0))
+        pygame.draw.circle(self.sprite, color, (radius, radius), radius)
+        self.offset_x, self.offset_y = dot_offsets(radius)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # Rect covering every live particle's dot, or None when there are none
+    def bounds(self):
+        n = self.count
+        if n == 0:
+            return None
+        px = self.x[:n].astype(np.int32)
+        py = self.y[:n].astype(np.int32)
+        left = int(px.min() + self.offset_x.min())
+        top = int(py.min() + self.offset_y.min())
+        right = int(px.max() + self.offset_x.max()) + 1
+        bottom = int(py.max() + self.offset_y.max()) + 1
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def emit(self, x, y, n):
+        # Spawn n particles at (x, y); extras are dropped once the pool is full
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+        s = slice(self.count, self.count + n)
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = self.rng.uniform(-self.speed, self.speed, n)
+        self.vy[s] = self.rng.uniform(-self.speed, self.speed, n)
+        self.life[s] = self.rng.integers(self.lifetime[0], self.lifetime[1] + 1, n)
+        self.count += n
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.life[:n] -= 1
+
+        alive = self.life[:n] > 0
+        alive_count = int(np.count_nonzero(alive))
+        if alive_count == n:
+            return
+        # Swap-remove: holes in [0, alive_count) take the survivors past it
+        holes = np.flatnonzero(~alive[:alive_count])
+        movers = np.flatnonzero(alive[alive_count:]) + alive_count
+        for arr in (self.x, self.y, self.vx, self.vy, self.life):
+            arr[holes] = arr[movers]
+        self.count = alive_count
+
+    # scale maps particle coordinates to the surface's pixels
+    def draw(self, surface, scale=1):
+        n = self.count
+        if n == 0:
+            return
+        if scale == 1:
+            px = self.x[:n].astype(np.int32)  # int() truncation, like the old Particle.draw
+            py = self.y[:n].astype(np.int32)
+        else:
+            px = (self.x[:n] * scale).astype(np.int32)
+            py = (self.y[:n] * scale).astype(np.int32)
+        if n < PIXEL_DRAW_THRESHOLD or surface.get_bytesize() != 4:
+            r = self.radius
+            surface.blits([(self.sprite, (x - r, y - r)) for x, y in zip(px.tolist(), py.tolist())], doreturn=False)
+            return
+
+        stamp_dots(surface, px, py, self.offset_x, self.offset_y, surface.map_rgb(self.color))
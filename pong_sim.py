@@ -0,0 +1,201 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Headless, vectorized Pong rules.
+#
+# Mirrors Paddle/Ball in ultraponghdrv010.3.25.py (including pygame.Rect's
+# integer coordinates and round-half-away-from-zero on assignment), but keeps
+# N independent matches as struct-of-arrays state so one step() call advances
+# all of them. No pygame import: safe for batch evaluation on headless boxes.
+
+# Constants (same values as the game)
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PADDLE_WIDTH = 10
+PADDLE_HEIGHT = 100
+BALL_RADIUS = 5
+BALL_SIZE = BALL_RADIUS * 2
+BALL_SPEED = 3
+AI_SPEED = 4
+WIN_SCORE = 5
+LEFT_PADDLE_X = 20
+RIGHT_PADDLE_X = SCREEN_WIDTH - 30
+MAX_SUBSTEP = min(PADDLE_WIDTH, BALL_SIZE)  # Longest ball move per collision check
+
+# Angle table per speed tier (hit_count < 4, < 12, >= 12), built exactly like
+# Ball.bounce_paddle so cos/sin match math.cos/math.sin bit for bit.
+def _angle_table(max_angle_deg):
+    return [
+        -max_angle_deg,
+        -round(max_angle_deg * 2 / 3),
+        -round(max_angle_deg / 3),
+        0,
+        0,
+        round(max_angle_deg / 3),
+        round(max_angle_deg * 2 / 3),
+        max_angle_deg
+    ]
+
+TIER_MAX_ANGLES = (30, 45, 60)
+TIER_SPEED_BONUS = np.array([0, 1, 2], dtype=np.int64)
+ANGLE_TABLE = np.array([_angle_table(a) for a in TIER_MAX_ANGLES], dtype=np.int64)
+COS_TABLE = np.array([[math.cos(math.radians(a)) for a in row] for row in ANGLE_TABLE.tolist()])
+SIN_TABLE = np.array([[math.sin(math.radians(a)) for a in row] for row in ANGLE_TABLE.tolist()])
+
+# Per-step event flags, one array of length N each
+StepEvents = namedtuple("StepEvents", "wall_bounce paddle_hit segment left_point right_point done")
+
+
+def rect_round(v):
+    # pygame.Rect rounds float assignments half away from zero
+    whole = np.trunc(v)
+    frac = v - whole
+    return (whole + np.sign(frac) * (np.abs(frac) >= 0.5)).astype(np.int64)
+
+
+def colliderect(ax, ay, aw, ah, bx, by, bw, bh):
+    # pygame.Rect.colliderect over arrays of rects (broadcasts)
+    return (ax < bx + bw) & (ay < by + bh) & (ax + aw > bx) & (ay + ah > by)
+
+
+class PongSim:
+    def __init__(self, n, ai_speed=AI_SPEED, win_score=WIN_SCORE, seed=None, auto_reset=True):
+        self.n = n
+        self.win_score = win_score
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        # ai_speed may be a scalar or one value per match (for tuning sweeps)
+        self.ai_speed = np.broadcast_to(np.asarray(ai_speed, dtype=np.int64), (n,)).copy()
+
+        self.ball_x = np.zeros(n, dtype=np.int64)
+        self.ball_y = np.zeros(n, dtype=np.int64)
+        self.ball_dx = np.zeros(n, dtype=np.float64)
+        self.ball_dy = np.zeros(n, dtype=np.float64)
+        self.speed = np.full(n, BALL_SPEED, dtype=np.int64)
+        self.hit_count = np.zeros(n, dtype=np.int64)
+        self.left_y = np.zeros(n, dtype=np.int64)
+        self.right_y = np.zeros(n, dtype=np.int64)
+        self.left_score = np.zeros(n, dtype=np.int64)
+        self.right_score = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        # Start a new match, like pressing SPACE on the menu
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.left_score[mask] = 0
+        self.right_score[mask] = 0
+        self.left_y[mask] = SCREEN_HEIGHT // 2 - PADDLE_HEIGHT // 2
+        self.right_y[mask] = SCREEN_HEIGHT // 2 - PADDLE_HEIGHT // 2
+        self._serve(mask)
+
+    def _serve(self, mask):
+        # Ball.reset: note dx uses the speed *before* it is reset to BALL_SPEED
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+        direction = self.rng.integers(0, 2, size=count) * 2 - 1
+        self.ball_x[mask] = SCREEN_WIDTH // 2 - BALL_RADIUS
+        self.ball_y[mask] = SCREEN_HEIGHT // 2 - BALL_RADIUS
+        self.ball_dx[mask] = direction * self.speed[mask]
+        self.ball_dy[mask] = 0
+        self.hit_count[mask] = 0
+        self.speed[mask] = BALL_SPEED
+
+    def _bounce_paddle(self, candidates, paddle_y, left):
+        paddle_x = LEFT_PADDLE_X if left else RIGHT_PADDLE_X
+        hit = candidates & colliderect(self.ball_x, self.ball_y, BALL_SIZE, BALL_SIZE,
+                                       paddle_x, paddle_y, PADDLE_WIDTH, PADDLE_HEIGHT)
+        if not hit.any():
+            return hit, None
+        idx = np.flatnonzero(hit)
+        hits = self.hit_count[idx] + 1
+        self.hit_count[idx] = hits
+
+        hit_pos = self.ball_y[idx] + BALL_RADIUS - paddle_y[idx]
+        segment = np.floor_divide(hit_pos, PADDLE_HEIGHT / 8).astype(np.int64)
+        tier = (hits >= 4).astype(np.int64) + (hits >= 12)
+        speed = self.speed[idx] + TIER_SPEED_BONUS[tier]
+        self.speed[idx] = speed
+
+        column = segment % 8
+        self.ball_dx[idx] = speed * COS_TABLE[tier, column] * (1 if left else -1)
+        self.ball_dy[idx] = speed * SIN_TABLE[tier, column]
+        return hit, (idx, segment)
+
+    def step(self, left_actions, right_actions=None):
+        # left_actions: target paddle centery (the mouse y in the game).
+        # right_actions: same for the right paddle; None runs the AI_SPEED tracker.
+        n = self.n
+        half = PADDLE_HEIGHT // 2
+        max_y = SCREEN_HEIGHT - PADDLE_HEIGHT
+
+        left = np.asarray(left_actions, dtype=np.int64) - half
+        np.clip(left, 0, max_y, out=self.left_y)
+
+        if right_actions is None:
+            right_center = self.right_y + half
+            ball_center = self.ball_y + BALL_RADIUS
+            delta = np.where(right_center < ball_center, self.ai_speed,
+                             np.where(right_center > ball_center, -self.ai_speed, 0))
+            np.clip(self.right_y + delta, 0, max_y, out=self.right_y)
+        else:
+            right = np.asarray(right_actions, dtype=np.int64) - half
+            np.clip(right, 0, max_y, out=self.right_y)
+
+        # Ball.update: sub-stepped move with wall and paddle checks after each
+        # sub-step; one sub-step per tick at normal speeds
+        steps = np.maximum(1, np.ceil(np.maximum(np.abs(self.ball_dx), np.abs(self.ball_dy)) / MAX_SUBSTEP)).astype(np.int64)
+        fx = self.ball_x.astype(np.float64)
+        fy = self.ball_y.astype(np.float64)
+        wall = np.zeros(n, dtype=bool)
+        left_hit = np.zeros(n, dtype=bool)
+        right_hit = np.zeros(n, dtype=bool)
+        segment = np.full(n, -1, dtype=np.int64)
+        for k in range(int(steps.max())):
+            active = steps > k if k else np.ones(n, dtype=bool)
+            fx += np.where(active, self.ball_dx / steps, 0)
+            fy += np.where(active, self.ball_dy / steps, 0)
+            self.ball_x = np.where(active, rect_round(fx), self.ball_x)
+            self.ball_y = np.where(active, rect_round(fy), self.ball_y)
+
+            # Ball.bounce_wall
+            hit_wall = active & ((self.ball_y <= 0) | (self.ball_y + BALL_SIZE >= SCREEN_HEIGHT))
+            np.negative(self.ball_dy, out=self.ball_dy, where=hit_wall)
+            wall |= hit_wall
+
+            # Ball.bounce_paddle(left) or Ball.bounce_paddle(right), once per tick
+            candidates = active & ~(left_hit | right_hit)
+            hit, info = self._bounce_paddle(candidates, self.left_y, left=True)
+            if info is not None:
+                segment[info[0]] = info[1]
+                left_hit |= hit
+            hit, info = self._bounce_paddle(candidates & ~hit, self.right_y, left=False)
+            if info is not None:
+                segment[info[0]] = info[1]
+                right_hit |= hit
+
+        # Ball.check_score
+        right_point = self.ball_x <= 0
+        left_point = ~right_point & (self.ball_x + BALL_SIZE >= SCREEN_WIDTH)
+        self.right_score += right_point
+        self.left_score += left_point
+        self._serve(right_point | left_point)
+
+        done = (self.left_score >= self.win_score) | (self.right_score >= self.win_score)
+        events = StepEvents(wall, left_hit | right_hit, segment, left_point, right_point, done)
+        if self.auto_reset and done.any():
+            self.reset(done)
+        return events
+
+    def run(self, frames, policy=None):
+        # Fast batch rollout. policy(sim) -> left actions; the default keeps
+        # the left paddle centred on the ball.
+        for _ in range(frames):
+            if policy is None:
+                actions = self.ball_y + BALL_RADIUS
+            else:
+                actions = policy(self)
+            self.step(actions)
@@ -0,0 +1,201 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+import pygame
+
+# Full-screen post-processing: bloom and a CRT look.
+#
+# Runs on the finished frame at the render resolution, so what it costs
+# depends on the tier and the resolution, not on how much is on screen.
+# Bloom: the frame is area-downsampled in C (smoothscale) by the tier's
+# factor; its brightness above THRESHOLD is blurred with a separable
+# Gaussian (one horizontal and one vertical NumPy pass of shifted-slice
+# multiply-adds over the small buffer), turned into tinted pixels through a
+# lookup table, scaled back up and added onto the frame (BLEND_RGB_ADD
+# saturates). The green channel stands in for luminance: it carries most of
+# it, and white and the glow colour are both full green. CRT: an overlay of
+# darkened scanlines, plus a vignette at high, built once per frame size and
+# multiplied onto the frame (BLEND_RGB_MULT).
+#
+# PostProcess measures what each tier costs per frame. In "auto" it starts
+# at high and drops a tier whenever the current one's cost, averaged over
+# SAMPLE_FRAMES, goes above AUTO_SHARE of the frame budget, down to off. It
+# steps back up after RAISE_AFTER averages in a row under HEADROOM of that
+# share (off counts as free), like resolution.ResolutionScaler; a tier that
+# is dropped again right after a raise doubles the wait before the next try.
+# The first WARMUP_FRAMES after a tier or size change aren't measured: they
+# build the scratch surfaces, and at startup share the CPU with the loader.
+
+# factor: downsampling; radius: blur taps each side, in downsampled pixels;
+# scanlines: brightness of every other row (1 = none)
+Tier = namedtuple("Tier", "factor radius scanlines vignette")
+TIERS = {
+    "low": Tier(8, 2, 1.0, 0.0),
+    "medium": Tier(4, 4, 0.8, 0.0),
+    "high": Tier(2, 8, 0.7, 0.35),
+}
+LOWER = {"high": "medium", "medium": "low", "low": "off"}
+HIGHER = {lower: higher for higher, lower in LOWER.items()}
+THRESHOLD = 150  # brightness where bloom starts
+STRENGTH = 2.5
+SAMPLE_FRAMES = 30
+WARMUP_FRAMES = 30
+AUTO_SHARE = 0.25
+RAISE_AFTER = 4  # consecutive comfortable averages before stepping up
+HEADROOM = 0.6  # "comfortable" is under this fraction of the share
+MAX_PATIENCE = 32  # cap on how much failed raises stretch the wait
+
+
+def gaussian_kernel(radius):
+    x = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-0.5 * (x / (radius / 2)) ** 2)
+    return kernel / kernel.sum()
+
+
+# Convolve an array with a symmetric kernel along one axis (zero edges)
+def blur_axis(values, kernel, axis):
+    radius = len(kernel) // 2
+    values = np.swapaxes(values, 0, axis)
+    n = len(values)
+    padded = np.pad(values, [(radius, radius)] + [(0, 0)] * (values.ndim - 1))
+    out = values * kernel[radius]
+    pair = np.empty_like(values)
+    for i in range(1, radius + 1):
+        np.add(padded[radius + i:radius + i + n], padded[radius - i:radius - i + n], out=pair)
+        pair *= kernel[radius + i]
+        out += pair
+    return np.swapaxes(out, 0, axis)
+
+
+class PostProcess:
+    # budget: seconds of work per frame (for auto)
+    def __init__(self, mode, tint=(255, 255, 255), budget=None):
+        self.auto = mode == "auto"
+        self.tier = "high" if self.auto else mode
+        self.tint = tint
+        self.palettes = {}  # pixel format -> glow level (0-255) to tinted pixel value
+        self.budget = budget
+        self.kernels = {}
+        self.surfaces = {}  # scratch and overlay surfaces for the current tier and size
+        self.current = None  # (tier, size) they were made for
+        self.costs = {}  # tier -> seconds per frame over the last SAMPLE_FRAMES
+        self.samples = []
+        self.skip = WARMUP_FRAMES
+        self.comfortable = 0
+        self.patience = 1  # RAISE_AFTER multiplier, doubled by failed raises
+        self.raised = False  # the tier was just stepped up and not yet measured
+        self.changes = 0
+
+    @property
+    def enabled(self):
+        return self.tier != "off"
+
+    def apply(self, surface):
+        if self.tier == "off":
+            if self.auto:
+                self._measure(0.0)
+            return
+        start = time.perf_counter()
+        tier = TIERS[self.tier]
+        size = surface.get_size()
+        if (self.tier, size) != self.current:
+            self.surfaces.clear()
+            self.current = (self.tier, size)
+            self.skip = WARMUP_FRAMES
+        self._bloom(surface, tier, size)
+        if tier.scanlines < 1 or tier.vignette:
+            overlay = self._surface("crt", size, surface, self._build_crt, tier)
+            surface.blit(overlay, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+        self._measure(time.perf_counter() - start)
+
+    def _bloom(self, surface, tier, size):
+        small_size = (max(1, size[0] // tier.factor), max(1, size[1] // tier.factor))
+        small = self._surface("small", small_size, surface)
+        pygame.transform.smoothscale(surface, small_size, small)
+        bright = pygame.surfarray.pixels_green(small).astype(np.float32)  # (width, height)
+        bright -= THRESHOLD
+        np.maximum(bright, 0, out=bright)
+        kernel = self.kernels.get(tier.radius)
+        if kernel is None:
+            kernel = self.kernels[tier.radius] = gaussian_kernel(tier.radius)
+        glow = blur_axis(blur_axis(bright, kernel, 0), kernel, 1)
+        glow *= STRENGTH
+        np.minimum(glow, 255, out=glow)
+        pixels = pygame.surfarray.pixels2d(small)
+        pixels[...] = self._palette(small)[glow.astype(np.uint8)]
+        del pixels  # unlocks the surface
+        large = self._surface("large", size, surface)
+        pygame.transform.smoothscale(small, size, large)
+        surface.blit(large, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+    def _build_crt(self, overlay, tier):
+        width, height = overlay.get_size()
+        shade = np.ones((width, height), dtype=np.float32)
+        shade[:, 1::2] = tier.scanlines
+        if tier.vignette:
+            x = np.linspace(-1, 1, width, dtype=np.float32)[:, None]
+            y = np.linspace(-1, 1, height, dtype=np.float32)[None, :]
+            shade *= 1 - tier.vignette * np.minimum((x * x + y * y) / 2, 1)
+        # BLEND_RGB_MULT computes dest * src / 256, so 255 is a little under 1
+        level = np.minimum(shade * 256, 255).astype(np.uint8)
+        pygame.surfarray.blit_array(overlay, np.repeat(level[:, :, None], 3, axis=2))
+
+    def _palette(self, surface):
+        key = (surface.get_bitsize(), surface.get_masks())
+        palette = self.palettes.get(key)
+        if palette is None:
+            palette = np.array([surface.map_rgb([c * level // 255 for c in self.tint]) for level in range(256)],
+                               dtype=np.uint32)
+            self.palettes[key] = palette
+        return palette
+
+    # Scratch and overlay surfaces in the frame's pixel format
+    def _surface(self, key, size, like, build=None, *args):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = pygame.Surface(size, 0, like)
+            if build:
+                build(surface, *args)
+        return surface
+
+    def _measure(self, elapsed):
+        if self.skip:
+            self.skip -= 1
+            return
+        self.samples.append(elapsed)
+        if len(self.samples) < SAMPLE_FRAMES:
+            return
+        cost = sum(self.samples) / len(self.samples)
+        self.samples = []
+        if self.tier != "off":
+            self.costs[self.tier] = cost
+        if not self.auto or not self.budget:
+            return
+        share = self.budget * AUTO_SHARE
+        if cost > share and self.tier != "off":
+            if self.raised:
+                self.patience = min(self.patience * 2, MAX_PATIENCE)
+            self._change(LOWER[self.tier])
+            return
+        if self.raised:
+            self.patience = 1  # the raise held
+            self.raised = False
+        if cost < share * HEADROOM and self.tier != "high":
+            self.comfortable += 1
+            if self.comfortable >= RAISE_AFTER * self.patience:
+                self._change(HIGHER[self.tier])
+                self.raised = True
+        else:
+            self.comfortable = 0
+
+    def _change(self, tier):
+        self.tier = tier
+        self.comfortable = 0
+        self.raised = False
+        self.skip = WARMUP_FRAMES
+        self.changes += 1
+
+    def summary(self):
+        costs = ", ".join(f"{tier} {cost * 1000:.2f} ms" for tier, cost in self.costs.items())
+        return f"Post-processing: {self.tier} ({self.changes} tier changes), cost per frame: {costs or 'not measured'}"
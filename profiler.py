@@ -0,0 +1,165 @@
+import csv
+import json
+import time
+from array import array
+
+import pygame
+
+# Per-phase frame profiler.
+#
+# The game loop calls start_frame() at the top of each frame and mark(phase)
+# after each piece of work; the time since the previous mark is added to that
+# phase, so a phase that runs several times per frame (once per physics tick,
+# say) accumulates. Durations live in a preallocated ring buffer of the last
+# `capacity` frames: recording a mark is one perf_counter call and one array
+# add, cheap enough to leave on all the time.
+#
+# draw() renders an overlay (frame-time graph plus per-phase bars averaged
+# over the last second); export() writes the ring buffer as a Chrome trace
+# (.json, open in chrome://tracing or Perfetto) or as CSV.
+
+PHASES = ("events", "input", "physics", "audio", "effects", "submit", "draw", "present", "wait")
+PHASE_COLORS = {
+    "events": (90, 160, 255),
+    "input": (60, 220, 220),
+    "physics": (255, 200, 40),
+    "audio": (255, 90, 200),
+    "effects": (120, 230, 90),
+    "submit": (255, 140, 60),
+    "draw": (230, 60, 60),
+    "present": (180, 120, 255),
+    "wait": (90, 90, 90),
+}
+DEFAULT_EXPORT = "frame_profile.json"
+OVERLAY_SIZE = (300, 210)
+GRAPH_MS = 33.3  # frame time at the top of the graph
+
+
+class FrameProfiler:
+    def __init__(self, phases=PHASES, capacity=600):
+        self.phases = tuple(phases)
+        self.index = {phase: i for i, phase in enumerate(self.phases)}
+        self.capacity = capacity
+        self.durations = array("d", bytes(8 * capacity * len(self.phases)))
+        self.starts = array("d", bytes(8 * capacity))
+        self.frames = 0  # frames started so far; the newest is frames - 1
+        self.offset = 0
+        self.last = time.perf_counter()
+        self.origin = self.last
+        self.visible = False
+        self.font = None
+        self.overlay = None
+
+    def start_frame(self):
+        now = time.perf_counter()
+        row = self.frames % self.capacity
+        n = len(self.phases)
+        self.offset = row * n
+        for i in range(self.offset, self.offset + n):
+            self.durations[i] = 0.0
+        self.starts[row] = now - self.origin
+        self.frames += 1
+        self.last = now
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.durations[self.offset + self.index[phase]] += now - self.last
+        self.last = now
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    # F3 toggles the overlay, F4 exports to path; True if the key was ours
+    def handle_key(self, key, path):
+        if key == pygame.K_F3:
+            self.toggle()
+        elif key == pygame.K_F4:
+            self.export(path)
+            print(f"Frame profile written to {path}")
+        else:
+            return False
+        return True
+
+    # (start, [durations per phase]) for completed frames, oldest first, in seconds
+    def history(self, count=None):
+        done = min(self.frames - 1, self.capacity - 1)  # the newest frame is still running
+        if count is not None:
+            done = min(done, count)
+        n = len(self.phases)
+        rows = []
+        for frame in range(self.frames - 1 - done, self.frames - 1):
+            row = frame % self.capacity
+            rows.append((self.starts[row], self.durations[row * n:(row + 1) * n].tolist()))
+        return rows
+
+    def export(self, path):
+        rows = self.history()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "start_ms", *(f"{p}_ms" for p in self.phases), "total_ms"])
+                first = self.frames - 1 - len(rows)
+                for i, (start, durations) in enumerate(rows):
+                    writer.writerow([first + i, f"{start * 1000:.3f}", *(f"{d * 1000:.3f}" for d in durations),
+                                     f"{sum(durations) * 1000:.3f}"])
+            return
+        # Chrome trace: one complete event per frame, and per phase within it.
+        # Accumulated phases are laid out back to back in PHASES order.
+        events = []
+        for start, durations in rows:
+            ts = start * 1e6
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1, "ts": ts, "dur": sum(durations) * 1e6})
+            for phase, duration in zip(self.phases, durations):
+                if duration > 0:
+                    events.append({"name": phase, "ph": "X", "pid": 1, "tid": 2, "ts": ts, "dur": duration * 1e6})
+                    ts += duration * 1e6
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    # The overlay is laid out at OVERLAY_SIZE and scaled to `size` if given
+    # (the game's render scale)
+    def draw(self, surface, pos, size=OVERLAY_SIZE):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+            self.overlay = pygame.Surface(OVERLAY_SIZE, pygame.SRCALPHA)
+        overlay = self.overlay
+        width, height = OVERLAY_SIZE
+        overlay.fill((0, 0, 0, 180))
+        rows = self.history(width - 10)
+        if rows:
+            totals = [sum(durations) * 1000 for start, durations in rows]
+            recent = rows[-60:]
+            averages = [sum(d[i] for s, d in recent) * 1000 / len(recent) for i in range(len(self.phases))]
+            work = sum(averages) - averages[self.index["wait"]] if "wait" in self.index else sum(averages)
+            text = f"frame {sum(averages):.2f} ms  work {work:.2f} ms  max {max(totals[-60:]):.2f} ms"
+            overlay.blit(self.font.render(text, True, (255, 255, 255)), (5, 4))
+
+            # Frame-time graph, newest on the right, with a 60 fps reference line
+            graph_top, graph_height = 20, 70
+            scale = graph_height / GRAPH_MS
+            for x, total in enumerate(totals, start=width - 5 - len(totals)):
+                bar = min(graph_height, round(total * scale))
+                color = (90, 220, 90) if total <= 1000 / 60 + 0.5 else (240, 80, 60)
+                pygame.draw.line(overlay, color, (x, graph_top + graph_height), (x, graph_top + graph_height - bar))
+            y60 = graph_top + graph_height - round(1000 / 60 * scale)
+            pygame.draw.line(overlay, (255, 255, 255, 120), (5, y60), (width - 5, y60))
+
+            # Per-phase bars, averaged over the last 60 frames
+            y = graph_top + graph_height + 6
+            bar_scale = (width - 110) / max(max(averages), 1.0)
+            for phase, average in zip(self.phases, averages):
+                overlay.blit(self.font.render(f"{phase} {average:.2f}", True, PHASE_COLORS.get(phase, (255, 255, 255))),
+                             (5, y))
+                pygame.draw.rect(overlay, PHASE_COLORS.get(phase, (255, 255, 255)),
+                                 (100, y + 2, max(1, round(average * bar_scale)), 8))
+                y += 12
+        if tuple(size) != OVERLAY_SIZE:
+            overlay = pygame.transform.smoothscale(overlay, size)
+        surface.blit(overlay, pos)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler overlay (toggle with F3)")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="export the profile here on exit: .json Chrome trace or .csv (F4 exports any time)")
@@ -0,0 +1,206 @@
+import struct
+import zlib
+
+import pygame
+
+# Compact input replays.
+#
+# A replay is the session's RNG seed plus, per rendered frame, how many
+# physics ticks ran, the mouse position and the key events. Frames are
+# delta-encoded (one flag byte, zigzag varints for mouse deltas and events)
+# and the stream is zlib-compressed; a still frame costs a single byte before
+# compression. Because physics runs on fixed ticks and all gameplay
+# randomness comes from the seed, feeding the same frames back reproduces the
+# session exactly, as fast as the CPU allows if nothing waits on the clock.
+#
+# File layout: MAGIC, header struct, game name, compressed frame stream.
+
+MAGIC = b"XRPL"
+VERSION = 1
+HEADER = struct.Struct("<BQHB")  # version, seed, sim rate, game name length
+
+TICKS_MASK = 0x0F  # 15 means "15 + varint"
+MOUSE_CHANGED = 0x10
+HAS_EVENTS = 0x20
+
+EVENT_QUIT = 0
+EVENT_KEYDOWN = 1
+
+
+# Unsigned LEB128 varints and zigzag signed-to-unsigned mapping
+def write_varint(buf, value):
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+class ReplayWriter:
+    def __init__(self, path, game, seed, sim_rate):
+        self.file = open(path, "wb")
+        name = game.encode()
+        self.file.write(MAGIC + HEADER.pack(VERSION, seed, sim_rate, len(name)) + name)
+        self.compressor = zlib.compressobj(9)
+        self.buffer = bytearray()
+        self.mouse = (0, 0)
+        self.frames = 0
+
+    # events: (EVENT_*, key) pairs
+    def frame(self, ticks, mouse, events):
+        buf = self.buffer
+        flags = min(ticks, TICKS_MASK)
+        if mouse != self.mouse:
+            flags |= MOUSE_CHANGED
+        if events:
+            flags |= HAS_EVENTS
+        buf.append(flags)
+        if ticks >= TICKS_MASK:
+            write_varint(buf, ticks - TICKS_MASK)
+        if flags & MOUSE_CHANGED:
+            write_varint(buf, zigzag(mouse[0] - self.mouse[0]))
+            write_varint(buf, zigzag(mouse[1] - self.mouse[1]))
+            self.mouse = mouse
+        if events:
+            write_varint(buf, len(events))
+            for kind, key in events:
+                write_varint(buf, kind)
+                if kind == EVENT_KEYDOWN:
+                    write_varint(buf, key)
+        self.frames += 1
+        if len(buf) >= 4096:
+            self.file.write(self.compressor.compress(bytes(buf)))
+            buf.clear()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(self.compressor.compress(bytes(self.buffer)))
+        self.file.write(self.compressor.flush())
+        self.buffer.clear()
+        self.file.close()
+
+
+class ReplayReader:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        version, self.seed, self.sim_rate, name_length = HEADER.unpack_from(data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        start = 4 + HEADER.size
+        self.game = data[start:start + name_length].decode()
+        self.data = zlib.decompress(data[start + name_length:])
+
+    # Yields (ticks, mouse, events) per recorded frame
+    def __iter__(self):
+        data = self.data
+        pos = 0
+        mouse = (0, 0)
+        while pos < len(data):
+            flags = data[pos]
+            pos += 1
+            ticks = flags & TICKS_MASK
+            if ticks == TICKS_MASK:
+                extra, pos = read_varint(data, pos)
+                ticks += extra
+            if flags & MOUSE_CHANGED:
+                dx, pos = read_varint(data, pos)
+                dy, pos = read_varint(data, pos)
+                mouse = (mouse[0] + unzigzag(dx), mouse[1] + unzigzag(dy))
+            events = []
+            if flags & HAS_EVENTS:
+                count, pos = read_varint(data, pos)
+                for _ in range(count):
+                    kind, pos = read_varint(data, pos)
+                    key = 0
+                    if kind == EVENT_KEYDOWN:
+                        key, pos = read_varint(data, pos)
+                    events.append((kind, key))
+            yield ticks, mouse, events
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    parser.add_argument("--record", metavar="FILE", help="record this session's inputs to a replay file")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recorded replay instead of live input")
+    parser.add_argument("--seed", type=int, help="RNG seed (random per session by default)")
+    parser.add_argument("--fast-forward", action="store_true", help="with --replay: run uncapped and skip rendering")
+    parser.add_argument("--headless", action="store_true", help="use SDL's dummy video/audio drivers (no window)")
+
+
+# Per-frame input for the game loops: events, physics ticks and mouse position
+class LiveControls:
+    def __init__(self, timestep, writer=None):
+        self.timestep = timestep
+        self.writer = writer
+        self.map_mouse = None  # window pixels -> game coordinates, if they differ
+        self.mouse = (0, 0)
+        self.ticks = 0
+        self.frames = 0
+
+    def poll(self, frame_time):
+        events = pygame.event.get()
+        self.mouse = pygame.mouse.get_pos()
+        if self.map_mouse:
+            self.mouse = self.map_mouse(self.mouse)
+        self.ticks = self.timestep.advance(frame_time)
+        self.frames += 1
+        if self.writer:
+            recorded = []
+            for event in events:
+                if event.type == pygame.QUIT:
+                    recorded.append((EVENT_QUIT, 0))
+                elif event.type == pygame.KEYDOWN:
+                    recorded.append((EVENT_KEYDOWN, event.key))
+            self.writer.frame(self.ticks, self.mouse, recorded)
+        return events
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+class PlaybackControls(LiveControls):
+    def __init__(self, timestep, reader):
+        super().__init__(timestep)
+        self.frames_iter = iter(reader)
+        self.finished = False
+
+    def poll(self, frame_time):
+        pygame.event.pump()  # keep the window responsive; live input is ignored
+        frame = next(self.frames_iter, None)
+        if frame is None:
+            self.finished = True
+            self.ticks = 0
+            return [pygame.event.Event(pygame.QUIT)]
+        self.ticks, self.mouse, recorded = frame
+        self.timestep.ticks += self.ticks
+        self.frames += 1
+        events = []
+        for kind, key in recorded:
+            if kind == EVENT_QUIT:
+                events.append(pygame.event.Event(pygame.QUIT))
+            else:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+        return events
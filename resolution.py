@@ -0,0 +1,254 @@
+import weakref
+
+import pygame
+
+from dirty_rects import FullRenderer
+
+# Logical-resolution rendering with dynamic resolution scaling.
+#
+# The games simulate and lay out everything in fixed logical coordinates
+# (SCREEN_WIDTH x SCREEN_HEIGHT). Display owns the real window, which can be
+# any size or fullscreen, and letterboxes the logical aspect ratio into it.
+# ScaledRenderer draws each frame into a canvas of logical size x view.scale
+# and scales that into the window; when the canvas matches the window it is
+# the window surface itself, so rendering at native resolution costs no
+# extra copy.
+#
+# View is what the draw callbacks use to turn logical positions and sizes
+# into canvas pixels, plus per-scale caches: fonts re-opened at the scaled
+# point size (text stays sharp), scaled copies of pre-rendered surfaces, and
+# anything else a game wants rebuilt per scale. At scale 1 every mapping
+# returns its argument unchanged.
+#
+# ResolutionScaler picks the scale. It averages the frame's work time (all
+# of it except waiting for the next frame) and steps one level down the
+# ladder when that is over budget, or up after a long stretch comfortably
+# under it. The ladder runs from half to all of the window's native scale,
+# so a 4K fullscreen window tops out at rendering 4K.
+
+LEVELS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)  # fractions of the native scale
+SAMPLE_FRAMES = 30  # frames averaged per decision
+RAISE_AFTER = 4  # consecutive comfortable samples before stepping up
+HEADROOM = 0.6  # "comfortable" is under this fraction of the budget
+
+
+class View:
+    def __init__(self, logical_size, scale=1.0):
+        self.logical_size = tuple(logical_size)
+        self.fonts = {}  # logical Font -> (name, size)
+        self.set_scale(scale)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        self.identity = scale == 1
+        self.size = self.size_of(self.logical_size)
+        self.scaled = weakref.WeakKeyDictionary()
+        self.cache = {}
+
+    def point(self, pos):
+        if self.identity:
+            return pos
+        return round(pos[0] * self.scale), round(pos[1] * self.scale)
+
+    def length(self, value):
+        if self.identity:
+            return value
+        return max(1, round(value * self.scale))
+
+    def size_of(self, size):
+        return self.length(size[0]), self.length(size[1])
+
+    # Edges are rounded separately, so adjacent logical rects stay adjacent
+    def rect(self, rect):
+        if self.identity:
+            return rect
+        x, y, w, h = rect
+        left, top = round(x * self.scale), round(y * self.scale)
+        return pygame.Rect(left, top, round((x + w) * self.scale) - left, round((y + h) * self.scale) - top)
+
+    # A copy of a logical-size surface at the current scale
+    def sprite(self, surface):
+        if self.identity:
+            return surface
+        scaled = self.scaled.get(surface)
+        if scaled is None:
+            size = self.size_of(surface.get_size())
+            if surface.get_bitsize() >= 24 and surface.get_colorkey() is None:
+                scaled = pygame.transform.smoothscale(surface, size)
+            else:
+                scaled = pygame.transform.scale(surface, size)
+            self.scaled[surface] = scaled
+        return scaled
+
+    def blit(self, surface, sprite, pos):
+        surface.blit(self.sprite(sprite), self.point(pos))
+
+    # A Font for layout in logical units; font() gives its scaled twin
+    def load_font(self, name, size):
+        font = pygame.font.Font(name, size)
+        self.fonts[font] = (name, size)
+        return font
+
+    def font(self, font):
+        if self.identity:
+            return font
+        name, size = self.fonts[font]
+        return self.cached(("font", font), lambda: pygame.font.Font(name, self.length(size)))
+
+    def cached(self, key, build):
+        value = self.cache.get(key)
+        if value is None:
+            value = self.cache[key] = build()
+        return value
+
+
+class Display:
+    def __init__(self, logical_size, caption, window_size=None, fullscreen=False, resizable=True):
+        self.logical_size = tuple(logical_size)
+        if fullscreen:
+            self.surface = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            flags = pygame.RESIZABLE if resizable else 0
+            self.surface = pygame.display.set_mode(window_size or self.logical_size, flags)
+        pygame.display.set_caption(caption)
+        self.offscreen = None
+        self._layout()
+
+    def _layout(self):
+        width, height = self.surface.get_size()
+        self.native_scale = min(width / self.logical_size[0], height / self.logical_size[1])
+        size = (round(self.logical_size[0] * self.native_scale), round(self.logical_size[1] * self.native_scale))
+        self.target = pygame.Rect(((width - size[0]) // 2, (height - size[1]) // 2), size)
+        self.surface.fill((0, 0, 0))  # letterbox bars
+
+    def resized(self):
+        self.surface = pygame.display.get_surface()
+        self._layout()
+
+    # Window pixel -> logical coordinates (for the mouse)
+    def to_logical(self, pos):
+        return (int((pos[0] - self.target.x) / self.native_scale),
+                int((pos[1] - self.target.y) / self.native_scale))
+
+    # Surface to draw a frame of `size` into
+    def canvas(self, size):
+        if tuple(size) == self.target.size == self.surface.get_size():
+            return self.surface
+        if self.offscreen is None or self.offscreen.get_size() != tuple(size):
+            self.offscreen = pygame.Surface(size).convert(self.surface)
+        return self.offscreen
+
+    def present(self, canvas):
+        if canvas is not self.surface:
+            if canvas.get_size() == self.target.size:
+                self.surface.blit(canvas, self.target)
+            else:
+                pygame.transform.scale(canvas, self.target.size, self.surface.subsurface(self.target))
+        pygame.display.flip()
+
+
+class ResolutionScaler:
+    # mode: "auto", "native", or a fixed scale (float)
+    def __init__(self, display, view, budget, mode="auto"):
+        self.display = display
+        self.view = view
+        self.budget = budget
+        self.mode = mode
+        self.samples = []
+        self.comfortable = 0
+        self.changes = 0
+        self.level = len(LEVELS) - 1
+        self.apply()
+        self.changes = 0  # made while running
+
+    def apply(self):
+        if self.mode == "auto" or self.mode == "native":
+            scale = self.display.native_scale * LEVELS[self.level]
+        else:
+            scale = float(self.mode)
+        if scale != self.view.scale:
+            self.view.set_scale(scale)
+            self.changes += 1
+        self.samples = []
+        self.skip = 1  # the next frame pays for rebuilding the per-scale caches
+
+    def window_resized(self):
+        self.display.resized()
+        self.apply()
+
+    # Called once per frame with the seconds spent on everything but waiting
+    def update(self, work):
+        if self.mode != "auto":
+            return
+        if self.skip:
+            self.skip -= 1
+            return
+        self.samples.append(work)
+        if len(self.samples) < SAMPLE_FRAMES:
+            return
+        average = sum(self.samples) / len(self.samples)
+        self.samples = []
+        if average > self.budget and self.level > 0:
+            self.level -= 1
+            self.comfortable = 0
+            self.apply()
+        elif average < self.budget * HEADROOM and self.level < len(LEVELS) - 1:
+            self.comfortable += 1
+            if self.comfortable >= RAISE_AFTER:
+                self.level += 1
+                self.comfortable = 0
+                self.apply()
+        else:
+            self.comfortable = 0
+
+    def describe(self):
+        width, height = self.view.size
+        return f"{width}x{height} ({self.view.scale:.2f}x logical)"
+
+
+class ScaledRenderer(FullRenderer):
+    def __init__(self, display, view, background):
+        self.display = display
+        self.view = view
+        super().__init__(display.canvas(view.size), background)
+
+    def draw(self):
+        self.screen = self.display.canvas(self.view.size)  # follows scale changes and window resizes
+        super().draw()
+
+    # A background already at the render size (a per-scale layer the game
+    # keeps itself) is used as it is
+    def _render_all(self, sprites):
+        background = self.background
+        if background.get_size() != self.view.size:
+            background = self.view.sprite(background)
+        self.screen.blit(background, (0, 0))
+        for key, rect, token, draw, args in sprites:
+            draw(self.screen, *args)
+        self.updated_rects = 1
+
+    def present(self):
+        self.display.present(self.screen)
+
+
+def _window_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def _resolution_mode(text):
+    if text in ("auto", "native"):
+        return text
+    return float(text)
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    group = parser.add_argument_group("display")
+    group.add_argument("--window", type=_window_size, metavar="WxH", help="window size (default: the logical size)")
+    group.add_argument("--fullscreen", action="store_true", help="fullscreen at the desktop resolution")
+    group.add_argument("--resolution", type=_resolution_mode, default="auto",
+                       help="render resolution: auto (scale to hold the frame budget), native (the window's), "
+                            "or a fixed multiple of the logical size; replays use native for auto")
+    group.add_argument("--frame-budget", type=float, metavar="MS",
+                       help="auto resolution: frame work time to stay under (default: 90%% of the frame time)")
@@ -0,0 +1,66 @@
+import pygame
+
+from sound_cache import SoundCache
+
+# Sound effects for both games, synthesized together.
+#
+# SoundBank gets every effect of a game from a SoundCache (see
+# sound_cache.py) in one call, so whatever isn't cached is rendered into one
+# contiguous int16 buffer in a single pass: each sound is synthesized
+# straight into its slice of a mono buffer (no per-sound int16 arrays,
+# stacking or tobytes() copies) and the whole bank is interleaved to stereo
+# with one np.repeat. Each pygame Sound is built directly from its slice of
+# that buffer. pygame always copies sample data into its own chunk, so that
+# slice copy is the only one and the bank buffer is dropped afterwards;
+# SoundBank.samples() returns zero-copy views of what the mixer actually
+# plays.
+#
+# VoicePool caps how many effects play at once and reuses channels: a sound
+# already playing per_sound times restarts its oldest instance, and when
+# every voice is busy the oldest one is cut off.
+
+
+class SoundBank:
+    # specs: {name: synthesis parameters}; needs an initialized 16-bit mixer.
+    # Without a cache the sounds are synthesized and kept in memory only.
+    def __init__(self, specs, cache=None):
+        if cache is None:
+            cache = SoundCache(max_size=len(specs))
+        self.sounds = dict(zip(specs, cache.get_many(specs.values())))
+        self.nbytes = sum(self.samples(name).nbytes for name in self.sounds)
+
+    def __getitem__(self, name):
+        return self.sounds[name]
+
+    def __contains__(self, name):
+        return name in self.sounds
+
+    def samples(self, name):
+        return pygame.sndarray.samples(self.sounds[name])
+
+
+class VoicePool:
+    def __init__(self, voices=8, per_sound=3):
+        pygame.mixer.set_num_channels(voices)
+        self.channels = [pygame.mixer.Channel(i) for i in range(voices)]
+        self.sounds = [None] * voices  # sound last started on each channel
+        self.started = [0] * voices  # play order, for finding the oldest voice
+        self.per_sound = per_sound
+        self.plays = 0
+        self.stolen = 0
+
+    def play(self, sound):
+        self.plays += 1
+        busy = [channel.get_busy() for channel in self.channels]
+        same = [i for i, s in enumerate(self.sounds) if s is sound and busy[i]]
+        if len(same) >= self.per_sound:
+            voice = min(same, key=self.started.__getitem__)
+        elif not all(busy):
+            voice = busy.index(False)
+        else:
+            voice = min(range(len(self.channels)), key=self.started.__getitem__)
+            self.stolen += 1
+        self.channels[voice].play(sound)
+        self.sounds[voice] = sound
+        self.started[voice] = self.plays
+        return self.channels[voice]
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+# Procedural sound synthesis with a bounded, keyed cache.
+#
+# Sounds are keyed by every synthesis parameter plus the mixer's sample rate
+# and channel count, so asking for a sound again is a dictionary lookup
+# instead of rebuilding the time base, envelope and PCM buffer. Misses are
+# synthesized together into one contiguous int16 buffer (synthesize_bank)
+# and each becomes a pygame Sound from its slice of it. Rendered PCM can
+# optionally be kept on disk so later launches skip synthesis entirely.
+# get() and get_many() are safe to call from a loader thread while the game
+# loop also uses the cache.
+
+PARAMS = ("freq", "duration", "volume", "wave_type", "attack", "decay", "sustain_level", "release")
+
+
+# ADSR tone as float samples in [-volume, volume]
+def synthesize(freq=440, duration=0.1, volume=0.05, wave_type='sine', attack=0.01, decay=0.05,
+               sustain_level=0.5, release=0.01, sample_rate=44100):
+    num_samples = int(sample_rate * duration)
+    t = np.linspace(0, duration, num_samples, endpoint=False)
+
+    # Generate base wave
+    if wave_type == 'square':
+        wave = np.sign(np.sin(2 * np.pi * freq * t))
+    elif wave_type == 'saw':
+        wave = 2 * (t * freq - np.floor(0.5 + t * freq)) - 1  # Normalized to [-1,1]
+    else:
+        wave = np.sin(2 * np.pi * freq * t)
+
+    # ADSR envelope: attack, decay to sustain_level, hold, release
+    envelope = np.full(num_samples, float(sustain_level))
+    attack_samples = min(int(sample_rate * attack), num_samples)
+    if attack_samples > 0:
+        envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
+    decay_end = min(attack_samples + int(sample_rate * decay), num_samples)
+    if decay_end > attack_samples:
+        envelope[attack_samples:decay_end] = np.linspace(1, sustain_level, decay_end - attack_samples)
+    release_start = max(0, num_samples - int(sample_rate * release))
+    if release_start < num_samples:
+        envelope[release_start:] = np.linspace(sustain_level, 0, num_samples - release_start)
+
+    wave *= envelope * volume
+    return wave
+
+
+# specs: list of synthesize() parameter dicts. Returns the PCM as int16 of
+# shape (samples, channels) and the start offsets of each sound plus the
+# total length. Each sound is synthesized straight into its slice of one
+# mono buffer, and the whole bank is interleaved with a single np.repeat.
+def synthesize_bank(specs, sample_rate=44100, channels=2):
+    lengths = [int(sample_rate * spec.get('duration', 0.1)) for spec in specs]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(int)
+    mono = np.empty(offsets[-1], np.int16)
+    for spec, start, stop in zip(specs, offsets[:-1], offsets[1:]):
+        np.multiply(synthesize(sample_rate=sample_rate, **spec), 32767, out=mono[start:stop], casting='unsafe')
+    return np.repeat(mono, channels).reshape(-1, channels), offsets  # interleaved
+
+
+class SoundCache:
+    # Needs an initialized 16-bit mixer
+    def __init__(self, max_size=64, cache_dir=None):
+        self.sample_rate, size, self.channels = pygame.mixer.get_init()
+        if size != -16:
+            raise ValueError("SoundCache needs a signed 16-bit mixer")
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.sounds = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError:
+                self.cache_dir = None  # read-only home etc: memory cache only
+
+    def key(self, freq=440, duration=0.1, volume=0.05, wave_type='sine', attack=0.01, decay=0.05,
+            sustain_level=0.5, release=0.01):
+        return (float(freq), float(duration), float(volume), wave_type, float(attack), float(decay),
+                float(sustain_level), float(release), self.sample_rate, self.channels)
+
+    # Takes synthesize()'s parameters, positionally or by name
+    def get(self, *args, **kwargs):
+        return self.get_many([dict(zip(PARAMS, args), **kwargs)])[0]
+
+    def prewarm(self, specs):
+        # specs: iterable of kwargs dicts for get()
+        self.get_many(specs)
+
+    # One Sound per spec, in order; the ones not cached are synthesized together
+    def get_many(self, specs):
+        specs = list(specs)
+        keys = [self.key(**spec) for spec in specs]
+        with self.lock:
+            found = {}
+            for key in keys:
+                if key in found:
+                    continue
+                sound = self.sounds.get(key)
+                if sound is not None:
+                    self.hits += 1
+                    self.sounds.move_to_end(key)
+                else:
+                    sound = self._load(key)
+                if sound is not None:
+                    found[key] = sound
+            missing = [(key, spec) for key, spec in zip(keys, specs) if key not in found]
+            if missing:
+                missing = list(dict(missing).items())  # a spec asked for twice is synthesized once
+                self.misses += len(missing)
+                pcm, offsets = synthesize_bank([spec for key, spec in missing], self.sample_rate, self.channels)
+                for (key, spec), start, stop in zip(missing, offsets[:-1], offsets[1:]):
+                    self._save(key, pcm[start:stop])
+                    found[key] = pygame.mixer.Sound(buffer=pcm[start:stop])
+            for key in keys:
+                self.sounds[key] = found[key]
+                self.sounds.move_to_end(key)
+            while len(self.sounds) > self.max_size:
+                self.sounds.popitem(last=False)  # evict least recently used
+            return [found[key] for key in keys]
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return os.path.join(self.cache_dir, digest + ".npy")
+
+    # A Sound from the disk cache, if it has the key
+    def _load(self, key):
+        path = self._path(key) if self.cache_dir else None
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            pcm = np.load(path)
+        except (OSError, ValueError):
+            return None  # corrupt entry, re-synthesize and overwrite
+        if pcm.dtype != np.int16 or pcm.ndim != 2 or pcm.shape[1] != self.channels:
+            return None
+        self.hits += 1
+        return pygame.mixer.Sound(buffer=pcm)
+
+    def _save(self, key, pcm):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp = path + ".%d.tmp" % os.getpid()
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, pcm)
+            os.replace(tmp, path)
+        except OSError:
+            pass
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+
+from netplay import parse_address
+from replay import write_varint, read_varint, zigzag, unzigzag
+
+# Live spectator feed for both games.
+#
+# BroadcastServer runs an asyncio TCP server on its own thread. The game loop
+# calls publish() once per tick, which only stores the newest state (a tuple
+# of ints and the remaining-bricks bitmask), so it costs the game nothing
+# however many spectators are connected. The broadcaster wakes `rate` times a
+# second; when a new state was published it encodes one frame and writes the
+# same bytes to every spectator's transport. It never waits for a slow
+# spectator: one whose unsent backlog is over max_buffered skips frames
+# until it catches up (each frame is complete, so skipping is safe), and one
+# stuck for stall_timeout seconds is disconnected.
+#
+# Stream: one JSON hello line (game, field names, state names, brick count,
+# game-specific layout), then frames, each a u32 length and the payload:
+# zigzag varints for the fields followed by the brick bitmask.
+#
+# FeedReader is the non-blocking client side used by the games' --spectate
+# mode, which draws the feed with the games' own drawing code.
+# `python spectate.py HOST[:PORT] --clients 300` is a load test.
+
+VERSION = 2
+DEFAULT_PORT = 5556
+LENGTH = struct.Struct("<I")
+
+
+def encode_frame(values, mask=b""):
+    payload = bytearray()
+    for value in values:
+        write_varint(payload, zigzag(value))
+    payload += mask
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode_frame(payload, count):
+    values = []
+    pos = 0
+    for _ in range(count):
+        value, pos = read_varint(payload, pos)
+        values.append(unzigzag(value))
+    return values, bytes(payload[pos:])
+
+
+def brick_mask(alive):
+    # alive: iterable of bools in brick creation order
+    mask = bytearray()
+    for i, live in enumerate(alive):
+        if i % 8 == 0:
+            mask.append(0)
+        if live:
+            mask[-1] |= 1 << (i % 8)
+    return bytes(mask)
+
+
+def mask_bits(mask, count):
+    return [bool(mask[i // 8] & (1 << (i % 8))) for i in range(count)]
+
+
+class Spectator:
+    def __init__(self, writer):
+        self.writer = writer
+        self.frames = 0
+        self.dropped = 0
+        self.stalled_since = None
+
+
+class BroadcastServer:
+    def __init__(self, game, fields, states, port=DEFAULT_PORT, rate=60, bricks=0, layout=None,
+                 max_buffered=16384, stall_timeout=10.0, host="0.0.0.0"):
+        self.fields = fields
+        self.states = states
+        self.hello = (json.dumps({"game": game, "version": VERSION, "fields": list(fields), "states": list(states),
+                                  "bricks": bricks, "layout": layout or {}}) + "\n").encode()
+        self.rate = rate
+        self.max_buffered = max_buffered
+        self.stall_timeout = stall_timeout
+        self.latest = None  # (values, mask), replaced by publish()
+        self.encoded = None  # newest frame as sent
+        self.spectators = set()
+        self.frames = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.peak = 0
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="broadcast", daemon=True)
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(self._start(host, port), self.loop).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    # Called from the game loop, once per tick; states are passed by name
+    def publish(self, state, values, mask=b""):
+        self.latest = ((self.states.index(state), *values), mask)
+
+    async def _start(self, host, port):
+        server = await asyncio.start_server(self._serve, host, port)
+        self.task = asyncio.ensure_future(self._broadcast())
+        self.task.add_done_callback(self._broadcast_done)
+        return server
+
+    # The broadcaster only stops on close(); anything else would freeze every spectator
+    def _broadcast_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Broadcast stopped: {task.exception()!r}", file=sys.stderr)
+
+    async def _serve(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        spectator = Spectator(writer)
+        writer.write(self.hello)
+        if self.encoded:
+            writer.write(self.encoded)
+        self.spectators.add(spectator)
+        self.peak = max(self.peak, len(self.spectators))
+        try:
+            while await reader.read(1024):
+                pass  # spectators have nothing to say; EOF means they left
+        except ConnectionError:
+            pass
+        finally:
+            self.spectators.discard(spectator)
+            writer.close()
+
+    async def _broadcast(self):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        sent = None
+        while True:
+            next_time = max(next_time + 1 / self.rate, loop.time())
+            await asyncio.sleep(next_time - loop.time())
+            latest = self.latest
+            if latest is None or latest is sent:
+                continue
+            sent = latest
+            self.encoded = encode_frame(*latest)
+            self.frames += 1
+            now = loop.time()
+            for spectator in list(self.spectators):
+                self._send(spectator, self.encoded, now)
+
+    def _send(self, spectator, data, now):
+        transport = spectator.writer.transport
+        if transport.is_closing():
+            self.spectators.discard(spectator)
+            return
+        if transport.get_write_buffer_size() > self.max_buffered:
+            spectator.dropped += 1
+            self.dropped += 1
+            if spectator.stalled_since is None:
+                spectator.stalled_since = now
+            elif now - spectator.stalled_since > self.stall_timeout:
+                self.spectators.discard(spectator)
+                self.disconnected += 1
+                transport.abort()
+            return
+        spectator.stalled_since = None
+        spectator.frames += 1
+        transport.write(data)
+
+    def summary(self):
+        return (f"Broadcast: {self.frames} frames to up to {self.peak} spectators, {self.dropped} frames skipped "
+                f"for slow spectators, {self.disconnected} disconnected")
+
+    def close(self):
+        async def stop():
+            self.task.cancel()
+            self.server.close()
+            for spectator in list(self.spectators):
+                spectator.writer.transport.abort()
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class FeedReader:
+    def __init__(self, address, game, timeout=5.0):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.sock.setblocking(False)
+        self.game = game
+        self.buffer = bytearray()
+        self.hello = None
+        self.frames = 0
+        self.closed = False
+
+    # The newest frame as {field: value, "state": name, "bricks": [bool, ...]},
+    # or None if nothing new arrived
+    def poll(self):
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+            self.buffer += data
+        if self.hello is None:
+            end = self.buffer.find(b"\n")
+            if end < 0:
+                return None
+            self.hello = json.loads(self.buffer[:end])
+            del self.buffer[:end + 1]
+            if self.hello["game"] != self.game:
+                raise ValueError(f"the feed is a {self.hello['game']} match")
+            if self.hello.get("version") != VERSION:
+                raise ValueError(f"the feed uses stream version {self.hello.get('version')}, not {VERSION}")
+        newest = None
+        pos = 0
+        while len(self.buffer) - pos >= LENGTH.size:
+            (size,) = LENGTH.unpack_from(self.buffer, pos)
+            if len(self.buffer) - pos - LENGTH.size < size:
+                break
+            newest = self.buffer[pos + LENGTH.size:pos + LENGTH.size + size]
+            pos += LENGTH.size + size
+            self.frames += 1
+        del self.buffer[:pos]
+        if newest is None:
+            return None
+        fields = self.hello["fields"]
+        values, mask = decode_frame(newest, len(fields) + 1)
+        frame = dict(zip(["state", *fields], values))
+        frame["state"] = self.hello["states"][frame["state"]]
+        frame["bricks"] = mask_bits(mask, self.hello["bricks"])
+        return frame
+
+    def close(self):
+        self.sock.close()
+
+
+# Command line options shared by both games
+def add_arguments(parser):
+    group = parser.add_argument_group("spectators")
+    group.add_argument("--broadcast", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                       help=f"stream this match to spectators over TCP (default port {DEFAULT_PORT})")
+    group.add_argument("--broadcast-rate", type=int, default=60, help="spectator frames per second")
+    group.add_argument("--spectate", metavar="HOST[:PORT]", help="watch a broadcast match instead of playing")
+
+
+# Load test: many spectators on one feed, some of which never read
+async def _load_test(address, clients, slow, seconds):
+    counts = [0] * clients
+    stop = time.perf_counter() + seconds
+
+    async def watch(i):
+        reader, writer = await asyncio.open_connection(*address)
+        if i < slow:
+            writer.transport.pause_reading()
+            await asyncio.sleep(seconds)
+        else:
+            await reader.readline()
+            while time.perf_counter() < stop:
+                try:
+                    header = await asyncio.wait_for(reader.readexactly(LENGTH.size), stop - time.perf_counter())
+                    await reader.readexactly(LENGTH.unpack(header)[0])
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                counts[i] += 1
+        writer.close()
+
+    await asyncio.gather(*(watch(i) for i in range(clients)))
+    return counts[slow:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectator feed load test")
+    parser.add_argument("address", metavar="HOST[:PORT]")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--slow", type=int, default=10, help="spectators that connect but never read")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    counts = asyncio.run(_load_test(parse_address(args.address, DEFAULT_PORT), args.clients, args.slow, args.seconds))
+    if counts:
+        print(f"{len(counts)} reading spectators: {min(counts)} to {max(counts)} frames each, "
+              f"{sum(counts) / len(counts) / args.seconds:.1f} frames/s on average")
+
+
+if __name__ == "__main__":
+    main()
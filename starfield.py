@@ -0,0 +1,63 @@
+import numpy as np
+import pygame
+
+from particles import dot_offsets, map_rgb_array, stamp_dots
+
+# Multi-layer scrolling starfield.
+#
+# Every star of every layer lives in one set of NumPy arrays. update() moves
+# and wraps all of them in one vectorized step; draw() writes them to the
+# screen as a single bulk pixel operation.
+
+# One layer per tuple: (count, min_speed, max_speed, min_brightness, max_brightness).
+# For parallax, make far layers dense, dim and slow and near layers sparse,
+# bright and fast.
+DEFAULT_LAYERS = [
+    (200, 0.1, 0.5, 100, 255),  # the original single layer
+]
+
+
+class Starfield:
+    def __init__(self, width, height, layers=DEFAULT_LAYERS, radius=1, rng=None):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.radius = radius
+        self.offset_x, self.offset_y = dot_offsets(radius)
+        self._format = None
+
+        speeds, brightness = [], []
+        for count, min_speed, max_speed, min_b, max_b in layers:
+            speeds.append(self.rng.uniform(min_speed, max_speed, count))
+            brightness.append(self.rng.integers(min_b, max_b + 1, count))
+        self.speed = np.concatenate(speeds).astype(np.float32)
+        self.brightness = np.concatenate(brightness).astype(np.uint32)
+        self.count = len(self.speed)
+        self.x = self.rng.integers(0, width + 1, self.count).astype(np.float32)
+        self.y = self.rng.integers(0, height + 1, self.count).astype(np.float32)
+        self.colors = None
+
+    def update(self):
+        self.x -= self.speed
+        wrapped = self.x < 0
+        n = int(np.count_nonzero(wrapped))
+        if n:
+            self.x[wrapped] = self.width
+            self.y[wrapped] = self.rng.integers(0, self.height + 1, n)
+
+    def _map_colors(self, surface):
+        # Grey levels -> mapped pixel values for this surface's format, once
+        fmt = (surface.get_shifts(), surface.get_losses(), surface.get_masks())
+        if fmt != self._format:
+            self.colors = map_rgb_array(surface, np.repeat(self.brightness[:, None], 3, axis=1))
+            self._format = fmt
+        return self.colors
+
+    # scale maps the field's coordinates to the surface's pixels
+    def draw(self, surface, scale=1):
+        x, y = (self.x, self.y) if scale == 1 else (self.x * scale, self.y * scale)
+        if surface.get_bytesize() != 4:
+            for x, y, b in zip(x.astype(np.int32).tolist(), y.astype(np.int32).tolist(), self.brightness.tolist()):
+                pygame.draw.circle(surface, (b, b, b), (x, y), self.radius)
+            return
+        stamp_dots(surface, x.astype(np.int32), y.astype(np.int32), self.offset_x, self.offset_y, self._map_colors(surface))
@@ -0,0 +1,86 @@
+import argparse
+import json
+
+import achievements
+from achievements import Achievement, AchievementTracker, StatsStore, milestone
+
+TROPHIES = [
+    milestone("First Blood", "Score a point", "points", 1),
+    milestone("Centurion", "Score 100 points", "points", 100),
+    Achievement("Marathon", "Win 3 games with 50 rallies", ("wins", "rallies"),
+                lambda stats: stats["wins"] >= 3 and stats["rallies"] >= 50),
+]
+
+
+def names(unlocked):
+    return [achievement.name for achievement in unlocked]
+
+
+def test_milestones_unlock_once():
+    tracker = AchievementTracker(TROPHIES, StatsStore(None))
+    assert names(tracker.record("points")) == ["First Blood"]
+    assert names(tracker.record("points", 98)) == []
+    assert names(tracker.record("points")) == ["Centurion"]
+    assert names(tracker.record("points", 500)) == []
+    assert tracker.stats["points"] == 600
+    assert tracker.watchers["points"] == []
+
+
+def test_condition_over_several_events():
+    tracker = AchievementTracker(TROPHIES, StatsStore(None))
+    tracker.record("rallies", 80)
+    assert names(tracker.record("wins", 2)) == []
+    assert names(tracker.record("wins")) == ["Marathon"]
+    assert tracker.watchers["rallies"] == [] and tracker.watchers["wins"] == []
+    assert tracker.is_unlocked("Marathon") and not tracker.is_unlocked("First Blood")
+
+
+def test_store_writes_atomically_and_reloads(tmp_path):
+    path = tmp_path / "stats" / "pong-stats.json"
+    tracker = AchievementTracker(TROPHIES, StatsStore(str(path), delay=60))
+    for _ in range(50):
+        tracker.record("points")
+    tracker.record("wins")
+    tracker.close()  # flushes without waiting out the delay
+    assert tracker.store.writes == 1  # every change batched into one write
+    assert [p.name for p in path.parent.iterdir()] == ["pong-stats.json"]  # no temp file left
+    data = json.loads(path.read_text())
+    assert data["stats"] == {"points": 50, "wins": 1} and list(data["unlocked"]) == ["First Blood"]
+
+    reloaded = AchievementTracker(TROPHIES, StatsStore(str(path)))
+    assert reloaded.stats == tracker.stats and reloaded.unlocked == tracker.unlocked
+    assert names(reloaded.record("points", 50)) == ["Centurion"]  # First Blood stays unlocked
+    reloaded.close()
+    assert json.loads(path.read_text())["stats"]["points"] == 100
+
+
+def test_unreadable_or_old_files_start_fresh(tmp_path, capsys):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json")
+    assert StatsStore(str(path), read_only=True).load() == {}
+    assert "Ignoring unreadable stats file" in capsys.readouterr().err
+    path.write_text(json.dumps({"version": achievements.VERSION + 1, "stats": {"points": 5}}))
+    assert StatsStore(str(path), read_only=True).load() == {}
+
+
+def test_read_only_store_shows_trophies_but_records_nothing(tmp_path):
+    path = tmp_path / "stats.json"
+    tracker = AchievementTracker(TROPHIES, StatsStore(str(path), delay=0))
+    tracker.record("points")
+    tracker.close()
+    saved = path.read_text()
+
+    replay = AchievementTracker(TROPHIES, StatsStore(str(path), read_only=True))
+    assert replay.store.thread is None
+    assert replay.is_unlocked("First Blood")
+    assert replay.record("points", 1000) == [] and replay.stats["points"] == 1
+    replay.close()
+    assert path.read_text() == saved
+
+
+def test_open_store_follows_the_run():
+    parser = argparse.ArgumentParser()
+    achievements.add_arguments(parser)
+    assert achievements.open_store(parser.parse_args(["--no-stats"]), "pong").path is None
+    store = achievements.open_store(parser.parse_args(["--stats", "x.json"]), "pong", playing=False)
+    assert store.path == "x.json" and store.read_only
@@ -0,0 +1,100 @@
+import numpy as np
+import pygame
+import pytest
+
+from breakout_sim import (BALL_RADIUS, BALL_SIZE, BALL_SPEED_X, BALL_SPEED_Y, BRICK_HEIGHT, BRICK_WIDTH, MAX_SUBSTEP,
+                          PADDLE_HEIGHT, PADDLE_WIDTH, PADDLE_Y, SCREEN_HEIGHT, SCREEN_WIDTH, BreakoutSim,
+                          brick_positions)
+from timestep import substep_count
+
+
+# The physics tick of bbreak.py on pygame.Rect, one board of one-hit bricks,
+# serving from the same RNG draws as the sim. Returns the state after every
+# tick until the board is cleared.
+def scalar_trace(seed, frames, policy_seed, rows):
+    rng = np.random.default_rng(seed)
+    policy = np.random.default_rng(policy_seed)
+    bricks = [pygame.Rect(x, y, BRICK_WIDTH, BRICK_HEIGHT) for x, y in zip(*[a.tolist() for a in brick_positions(rows)])]
+    paddle = pygame.Rect((SCREEN_WIDTH - PADDLE_WIDTH) // 2, PADDLE_Y, PADDLE_WIDTH, PADDLE_HEIGHT)
+    ball = pygame.Rect(SCREEN_WIDTH // 2 - BALL_RADIUS, SCREEN_HEIGHT // 2 - BALL_RADIUS, BALL_SIZE, BALL_SIZE)
+
+    def serve():
+        return float(int(rng.integers(0, 2, size=1)[0]) * 2 - 1) * BALL_SPEED_X, -BALL_SPEED_Y
+
+    dx, dy = serve()
+    broken = lost = 0
+    trace = []
+    for frame in range(frames):
+        mouse_x = int(policy.integers(-50, 850)) if frame % 3 else ball.centerx
+        paddle.centerx = max(PADDLE_WIDTH // 2, min(SCREEN_WIDTH - PADDLE_WIDTH // 2, mouse_x))
+        steps = substep_count(dx, dy, MAX_SUBSTEP)
+        x, y = ball.x, ball.y
+        for _ in range(steps):
+            x += dx / steps
+            y += dy / steps
+            ball.x = x
+            ball.y = y
+            if ball.left <= 0 or ball.right >= SCREEN_WIDTH:
+                dx = -dx
+            if ball.top <= 0:
+                dy = -dy
+            if ball.bottom >= SCREEN_HEIGHT:
+                lost += 1
+                ball.centerx = SCREEN_WIDTH // 2
+                ball.centery = SCREEN_HEIGHT // 2
+                dx, dy = serve()
+                break
+            if ball.colliderect(paddle):
+                dy = -dy
+            for brick in bricks:
+                if ball.colliderect(brick):
+                    dy = -dy
+                    bricks.remove(brick)
+                    broken += 1
+                    break
+        trace.append((ball.x, ball.y, dx, dy, broken, lost, len(bricks)))
+        if not bricks:
+            break
+    return trace
+
+
+def sim_trace(seed, frames, policy_seed, rows):
+    sim = BreakoutSim(1, rows=rows, seed=seed, auto_reset=False)
+    policy = np.random.default_rng(policy_seed)
+    trace = []
+    for frame in range(frames):
+        mouse_x = int(policy.integers(-50, 850)) if frame % 3 else int(sim.ball_x[0]) + BALL_RADIUS
+        events = sim.step([mouse_x])
+        trace.append((int(sim.ball_x[0]), int(sim.ball_y[0]), float(sim.ball_dx[0]), float(sim.ball_dy[0]),
+                      int(sim.bricks_broken[0]), int(sim.lost_balls[0]), int(sim.bricks[0].sum())))
+        if events.done[0]:
+            break
+    return trace
+
+
+@pytest.mark.parametrize("seed, rows", [(0, 2), (1, 5), (2, 2), (3, 5)])
+def test_matches_scalar_rules(seed, rows):
+    expected = scalar_trace(seed, 20000, seed + 100, rows)
+    assert sim_trace(seed, 20000, seed + 100, rows) == expected
+    assert expected[-1][-1] == 0  # played until the board was cleared
+
+
+def test_boards_are_independent():
+    # A batch of boards steps like the same boards one at a time
+    sim = BreakoutSim(8, seed=3, auto_reset=False)
+    singles = []
+    for i in range(8):
+        single = BreakoutSim(1, seed=0, auto_reset=False)
+        single.ball_dx[0] = sim.ball_dx[i]
+        singles.append(single)
+    policy = np.random.default_rng(4)
+    for frame in range(2000):
+        actions = policy.integers(-50, 850, 8)
+        events = sim.step(actions)
+        for i, single in enumerate(singles):
+            single.step(actions[i:i + 1])
+            if events.lost_ball[i]:
+                single.ball_dx[0] = sim.ball_dx[i]  # the serve came from the batch RNG
+            assert (single.ball_x[0], single.ball_y[0], single.ball_dx[0], single.ball_dy[0]) == \
+                   (sim.ball_x[i], sim.ball_y[i], sim.ball_dx[i], sim.ball_dy[i])
+            assert np.array_equal(single.bricks[0], sim.bricks[i])
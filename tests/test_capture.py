@@ -0,0 +1,100 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from capture import FrameCapture, encode_png
+
+
+# A capture whose writer waits at a gate before each frame, so the test
+# decides when it falls behind
+class GatedCapture(FrameCapture):
+    def __init__(self, *args, **kwargs):
+        self.gate = threading.Semaphore(0)
+        super().__init__(*args, **kwargs)
+
+    def _write(self, *args):
+        self.gate.acquire()
+        super()._write(*args)
+
+
+def frames(count, size=(64, 48)):
+    rng = np.random.default_rng(0)
+    surfaces = []
+    for _ in range(count):
+        surface = pygame.Surface(size, depth=32)
+        pygame.surfarray.blit_array(surface, rng.integers(0, 1 << 24, size))
+        surfaces.append(surface)
+    return surfaces
+
+
+def wait_for_free(capture, count):
+    while capture.free.qsize() < count:
+        time.sleep(0.001)
+
+
+def rgb(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+
+def test_drop_policy_skips_frames_when_every_buffer_is_busy(tmp_path):
+    path = tmp_path / "frames.rgb"
+    capture = GatedCapture(str(path), "raw", buffers=2, policy="drop")
+    surfaces = frames(6)
+    for surface in surfaces[:5]:
+        capture.frame(surface)  # the writer holds 1 buffer, 1 waits, 3 are dropped
+    assert capture.dropped == 3
+    for _ in range(2):
+        capture.gate.release()
+    wait_for_free(capture, 2)
+    capture.frame(surfaces[5])  # a buffer is free again
+    capture.gate.release()
+    capture.close()
+    assert (capture.frames, capture.written, capture.dropped, capture.stalls) == (6, 3, 3, 0)
+    assert path.read_bytes() == rgb(surfaces[0]) + rgb(surfaces[1]) + rgb(surfaces[5])
+
+
+def test_throttle_policy_waits_for_the_writer(tmp_path):
+    path = tmp_path / "frames.rgb"
+    capture = GatedCapture(str(path), "raw", buffers=2, policy="throttle")
+    surfaces = frames(6)
+
+    def open_gate():
+        time.sleep(0.05)  # the game blocks on the third frame meanwhile
+        for _ in surfaces:
+            capture.gate.release()
+
+    opener = threading.Thread(target=open_gate)
+    capture.frame(surfaces[0])
+    capture.frame(surfaces[1])
+    opener.start()
+    for surface in surfaces[2:]:
+        capture.frame(surface)
+    capture.close()
+    opener.join()
+    assert (capture.written, capture.dropped) == (6, 0)
+    assert capture.stalls >= 1
+    assert path.read_bytes() == b"".join(rgb(surface) for surface in surfaces)
+
+
+def test_png_frames_keep_their_numbers(tmp_path):
+    capture = GatedCapture(str(tmp_path), "png", buffers=1, policy="drop")
+    surfaces = frames(3)
+    capture.frame(surfaces[0])
+    capture.frame(surfaces[1])  # dropped: the only buffer is busy
+    capture.gate.release()
+    wait_for_free(capture, 1)
+    capture.frame(surfaces[2])
+    capture.gate.release()
+    capture.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["frame_000000.png", "frame_000002.png"]
+    loaded = pygame.image.load(str(tmp_path / "frame_000002.png"))
+    assert rgb(loaded) == rgb(surfaces[2])
+
+
+def test_encode_png_round_trip():
+    surface = frames(1, (37, 11))[0]  # odd width
+    loaded = pygame.image.load(io.BytesIO(encode_png(rgb(surface), surface.get_size())), "frame.png")
+    assert rgb(loaded) == rgb(surface)
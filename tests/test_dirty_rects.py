@@ -0,0 +1,57 @@
+import numpy as np
+import pygame
+
+from dirty_rects import DirtyRenderer, FullRenderer
+
+
+def test_merge_clips_and_unions():
+    renderer = DirtyRenderer(pygame.Surface((800, 600)), pygame.Surface((800, 600)))
+    rects = renderer._merge([pygame.Rect(-20, -20, 40, 40), pygame.Rect(10, 10, 30, 30), pygame.Rect(790, 590, 50, 50),
+                             pygame.Rect(900, 100, 10, 10), pygame.Rect(400, 300, 10, 10), pygame.Rect(411, 300, 10, 10),
+                             pygame.Rect(100, 500, 0, 40)])
+    assert sorted(rects) == sorted([pygame.Rect(0, 0, 40, 40), pygame.Rect(790, 590, 10, 10),
+                                    pygame.Rect(400, 300, 21, 10)])
+
+
+def test_merge_keeps_distant_rects_apart():
+    renderer = DirtyRenderer(pygame.Surface((800, 600)), pygame.Surface((800, 600)))
+    rects = renderer._merge([pygame.Rect(0, 0, 10, 10), pygame.Rect(700, 500, 10, 10)])
+    assert len(rects) == 2
+
+
+def fill(color):
+    def draw(surface, rect):
+        surface.fill(color, rect.clip(surface.get_rect()))  # fill() doesn't shrink rects hanging off the left
+    return draw
+
+
+def test_dirty_frames_match_full_redraws():
+    rng = np.random.default_rng(0)
+    background = pygame.Surface((320, 240))
+    for y in range(0, 240, 8):
+        background.fill((y, 40, 255 - y), (0, y, 320, 8))
+    full = FullRenderer(pygame.Surface((320, 240)), background)
+    dirty = DirtyRenderer(pygame.Surface((320, 240)), background)
+    boxes = {i: [int(rng.integers(-20, 320)), int(rng.integers(-20, 240)), int(rng.integers(5, 60)),
+                 int(rng.integers(5, 60)), tuple(rng.integers(0, 256, 3).tolist())] for i in range(30)}
+    for frame in range(300):
+        for i, box in boxes.items():
+            if i % 3 == 0:  # movers
+                box[0] += int(rng.integers(-6, 7))
+                box[1] += int(rng.integers(-6, 7))
+            elif i % 3 == 1 and frame % 25 == i:  # occasional recolor
+                box[4] = tuple(rng.integers(0, 256, 3).tolist())
+        if frame % 40 == 13:
+            # The background changes under a region
+            patch = pygame.Rect(int(rng.integers(0, 300)), int(rng.integers(0, 220)), 30, 20)
+            background.fill(tuple(rng.integers(0, 256, 3).tolist()), patch)
+            dirty.invalidate(patch)
+        for renderer in (full, dirty):
+            for i, (x, y, w, h, color) in boxes.items():
+                if i == 5 and frame % 30 < 10:
+                    continue  # comes and goes
+                rect = pygame.Rect(x, y, w, h)
+                renderer.sprite(i, rect, color, fill(color), rect)
+            renderer.draw()
+        assert pygame.image.tobytes(dirty.screen, "RGB") == pygame.image.tobytes(full.screen, "RGB"), f"frame {frame}"
+        assert dirty.updated_rects <= len(boxes) * 2 + 1
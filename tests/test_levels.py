@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import levels
+
+
+def random_level(rng, name, columns, rows):
+    grid = np.zeros((rows, columns), dtype=levels.CELL)
+    filled = rng.random((rows, columns)) < 0.7
+    grid["type"][filled] = rng.integers(1, 6, int(filled.sum()))
+    grid["hp"][filled] = rng.integers(1, 4, int(filled.sum()))
+    return levels.Level(name, grid)
+
+
+def test_pack_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    written = [random_level(rng, f"Level {i}", 5 + i * 7, 3 + i) for i in range(6)]
+    written.append(levels.classic_level(5, 10))
+    path = tmp_path / "pack.lvl"
+    levels.write_pack(str(path), written)
+
+    pack = levels.LevelPack(str(path))
+    assert len(pack) == len(written)
+    for original, level in zip(written, pack):
+        assert level.name == original.name
+        assert np.array_equal(level.grid, original.grid)
+    assert levels.max_cells(pack) == max(level.grid.size for level in written)
+
+
+def test_text_level():
+    level = levels.parse_text("t", "1.3\n A9\n")
+    assert level.grid.shape == (2, 3)
+    assert level.grid["type"].tolist() == [[1, 0, 1], [0, 2, 1]]
+    assert level.grid["hp"].tolist() == [[1, 0, 3], [0, 1, 9]]
+
+    board = levels.build_board(level)
+    assert board.index.tolist() == [0, 2, 4, 5]
+    assert board.hp.tolist() == [1, 3, 1, 9]
+
+
+def test_truncated_pack(tmp_path):
+    rng = np.random.default_rng(1)
+    path = tmp_path / "pack.lvl"
+    levels.write_pack(str(path), [random_level(rng, "a", 20, 10), random_level(rng, "b", 20, 10)])
+    data = path.read_bytes()
+    for size in (len(data) - 1, len(levels.MAGIC) + 2, len(levels.MAGIC) + levels.HEADER.size + 3):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            levels.LevelPack(str(path))
+
+
+@pytest.mark.parametrize("columns, rows", [(levels.MAX_COLUMNS + 1, 5), (10, levels.MAX_ROWS + 1), (0, 5)])
+def test_rejects_unplayable_sizes(tmp_path, columns, rows):
+    with pytest.raises(ValueError):
+        levels.classic_level(rows, columns)
+    path = tmp_path / "pack.lvl"
+    levels.write_pack(str(path), [levels.Level("big", np.ones((rows, columns), dtype=levels.CELL))])
+    with pytest.raises(ValueError):
+        levels.LevelPack(str(path))
+
+
+def test_largest_board_has_real_bricks():
+    board = levels.build_board(levels.classic_level(levels.MAX_ROWS, levels.MAX_COLUMNS))
+    assert board.brick_width >= 1 and board.brick_height >= 1
+    assert board.x.max() + board.brick_width <= levels.BOARD_WIDTH
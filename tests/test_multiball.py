@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import levels
+import multiball
+
+BALL_SIZE = 20
+FIELD = (800, 600)
+
+
+def random_level(rng, columns, rows, fill=0.6):
+    grid = np.zeros((rows, columns), dtype=levels.CELL)
+    live = rng.random((rows, columns)) < fill
+    grid["type"][live] = 1
+    grid["hp"][live] = rng.integers(1, 4, int(live.sum()))
+    return levels.Level("random", grid)
+
+
+# Every live brick tested against the ball's box, pair by pair; the first
+# in creation order or None
+def brute_force_first(grid, x, y, size):
+    live = grid.cells[grid.cell_of] == np.arange(len(grid.x))
+    overlap = live & (x < grid.x + grid.width) & (y < grid.y + grid.height) & (x + size > grid.x) & (y + size > grid.y)
+    found = np.flatnonzero(overlap)
+    return int(found[0]) if len(found) else None
+
+
+def broad_phase_first(grid, x, y, size):
+    candidates = grid.candidates(np.array([x]), np.array([y]))[0]
+    found = [int(c) for c in candidates if c >= 0 and multiball.colliderect(
+        x, y, size, size, grid.x[c], grid.y[c], grid.width, grid.height)]
+    return min(found) if found else None
+
+
+@pytest.mark.parametrize("columns, rows, size", [(10, 5, BALL_SIZE), (60, 40, BALL_SIZE), (200, 120, BALL_SIZE),
+                                                 (400, 210, 3), (3, 2, 300)])
+def test_broad_phase_finds_the_same_brick_as_every_pair(columns, rows, size):
+    rng = np.random.default_rng(columns)
+    board = levels.build_board(random_level(rng, columns, rows))
+    grid = multiball.BrickGrid(board, size)
+    # Knock out some bricks, as play would
+    grid.hit(rng.choice(len(board.index), len(board.index) // 3, replace=False).repeat(3))
+    for x, y in zip(rng.integers(-size, FIELD[0], 400), rng.integers(grid.top - size, grid.bottom + size, 400)):
+        assert broad_phase_first(grid, int(x), int(y), size) == brute_force_first(grid, int(x), int(y), size), (x, y)
+
+
+# A BrickGrid whose broad phase offers every live brick to every ball
+class BruteForceGrid(multiball.BrickGrid):
+    def candidates(self, x, y):
+        live = np.flatnonzero(self.cells[self.cell_of] == np.arange(len(self.x)))
+        return np.broadcast_to(live, (len(x), len(live))) if len(live) else np.full((len(x), 1), -1)
+
+
+def test_swarm_matches_brute_force_collision():
+    board = levels.build_board(random_level(np.random.default_rng(5), 30, 12, fill=0.8))
+    swarms = []
+    for grid_class in (multiball.BrickGrid, BruteForceGrid):
+        grid = grid_class(board, BALL_SIZE)
+        swarm = multiball.BallSwarm(64, BALL_SIZE, (5, 5), FIELD, np.random.default_rng(6))
+        swarms.append((swarm, grid))
+    paddle = (350, 550, 100, 10)
+    for frame in range(1500):
+        results = [swarm.step(paddle, grid, 10) for swarm, grid in swarms]
+        (a, grid_a), (b, grid_b) = swarms
+        assert results[0][:3] == results[1][:3], f"frame {frame}"
+        assert np.array_equal(results[0][3], results[1][3]) and np.array_equal(results[0][4], results[1][4])
+        assert np.array_equal(a.x, b.x) and np.array_equal(a.y, b.y) and np.array_equal(a.dy, b.dy)
+        assert np.array_equal(grid_a.hp, grid_b.hp)
+    assert grid_a.remaining < len(board.index)
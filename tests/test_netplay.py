@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+import netplay
+from netplay import FIELDS, STATES, decode_inputs, decode_snapshot, encode_inputs, encode_snapshot
+
+
+def random_values(rng, tick):
+    return (tick, int(rng.integers(0, len(STATES))), *rng.integers(-2000, 2000, len(FIELDS) - 2).tolist())
+
+
+def test_snapshot_round_trip():
+    rng = np.random.default_rng(0)
+    history = {}
+    sent = {}
+    for seq in range(1, 300):
+        values = random_values(rng, seq * 3)
+        if seq % 4 == 0:
+            values = sent[seq - 1]  # nothing changed: an empty delta
+        baseline_seq = max(1, seq - int(rng.integers(1, 10)))
+        baseline = sent.get(baseline_seq) if seq % 5 else None
+        data = encode_snapshot(seq, baseline_seq, baseline, values, seq * 2)
+        decoded_seq, decoded_baseline, input_ack, decoded = decode_snapshot(data, history)
+        assert (decoded_seq, input_ack, decoded) == (seq, seq * 2, tuple(values))
+        assert decoded_baseline == (baseline_seq if baseline is not None else None)
+        history[seq] = sent[seq] = tuple(values)
+
+
+def test_snapshot_delta_is_small():
+    baseline = (100, 1, 400, 300, 768, -256, 250, 250, 2, 3)
+    values = (101, 1, 403, 299, 768, -256, 250, 254, 2, 3)
+    data = encode_snapshot(11, 10, baseline, values, 7)
+    assert len(data) < 12
+    assert decode_snapshot(data, {10: baseline})[3] == values
+
+
+def test_snapshot_without_its_baseline():
+    data = encode_snapshot(50, 40, (1,) * len(FIELDS), (2,) * len(FIELDS), 0)
+    assert decode_snapshot(data, {}) == (50, 40, 0, None)
+
+
+def test_malformed_snapshots():
+    values = (5, len(STATES), 1, 2, 3, 4, 5, 6, 0, 0)  # state out of range
+    with pytest.raises(ValueError):
+        decode_snapshot(encode_snapshot(3, 0, None, values, 0), {})
+    good = encode_snapshot(3, 0, None, (5, 1, 1, 2, 3, 4, 5, 6, 0, 0), 0)
+    with pytest.raises(IndexError):
+        decode_snapshot(good[:-1], {})
+
+
+def test_inputs_round_trip():
+    targets = [300, 310, 295, 0, 600, 299]  # newest first
+    snapshot_ack, inputs = decode_inputs(encode_inputs(42, 120, targets))
+    assert snapshot_ack == 42
+    assert inputs == {120 - i: target for i, target in enumerate(targets)}
+
+
+def test_inputs_before_the_first_tick_are_dropped():
+    _, inputs = decode_inputs(encode_inputs(0, 2, [10, 20, 30, 40]))
+    assert inputs == {2: 10, 1: 20}
+
+
+def test_pack_state_matches_fields():
+    class Rect:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    class Thing:
+        def __init__(self, x, y, dx=0.0, dy=0.0):
+            self.rect = Rect(x, y)
+            self.dx, self.dy = dx, dy
+
+    packed = netplay.pack_state("playing", Thing(395, 295, 3.0, -1.5), Thing(20, 250), Thing(770, 260), 1, 4)
+    assert len(packed) == len(FIELDS) - 1
+    assert packed[0] == STATES.index("playing")
+    assert packed[3:5] == (3 * netplay.VELOCITY_SCALE, round(-1.5 * netplay.VELOCITY_SCALE))
+
+
+def test_idle_host_keeps_a_bounded_backlog():
+    # Nothing calls next_input() on the menu or game over screen
+    host = netplay.HostSession(0, 60)
+    client = netplay.ClientSession(("127.0.0.1", host.link.sock.getsockname()[1]), 60, 100, 600)
+    values = (STATES.index("menu"), 395, 295, 0, 0, 250, 250, 0, 0)
+    try:
+        for _ in range(1000):
+            client.send_input(300)
+            client.poll()
+            host.poll()
+            host.end_tick(values)
+        assert host.connected
+        assert len(host.inputs) <= netplay.MAX_BACKLOG
+        assert host.next_input() == 300
+        assert host.input_tick > client.tick - 2 * netplay.MAX_BACKLOG
+    finally:
+        host.link.close()
+        client.link.close()
+
+
+@pytest.mark.parametrize("text, address", [
+    ("example.com", ("example.com", netplay.DEFAULT_PORT)),
+    ("10.0.0.2:6000", ("10.0.0.2", 6000)),
+    ("::1", ("::1", netplay.DEFAULT_PORT)),
+    ("[::1]", ("::1", netplay.DEFAULT_PORT)),
+    ("[fe80::2]:6000", ("fe80::2", 6000)),
+])
+def test_parse_address(text, address):
+    assert netplay.parse_address(text) == address
@@ -0,0 +1,89 @@
+import time
+
+import pygame
+import pytest
+
+import pacing
+from pacing import FramePacer
+from timestep import FixedTimestep
+
+
+# A clock that records each cap and spends a fixed time in tick()
+class FakeClock:
+    def __init__(self, spend=0.005):
+        self.spend = spend
+        self.caps = []
+
+    def tick(self, fps=0):
+        self.caps.append(fps)
+        time.sleep(self.spend)
+        return self.spend * 1000.0
+
+
+@pytest.fixture
+def events():
+    pygame.display.init()
+    pygame.event.clear()
+    yield
+    pygame.display.quit()
+
+
+def pacer(adaptive=True, state_fps=None):
+    return FramePacer(FakeClock(), FixedTimestep(), 60, ("menu", "game_over"), state_fps, adaptive)
+
+
+def test_each_state_gets_its_cap():
+    frames = pacer(state_fps={"playing": 144, "game_over": 10})
+    for state in ("playing", "menu", "game_over", "paused"):
+        frames.schedule(0)
+        frames.wait(state)
+    assert frames.clock.caps == [144, pacing.IDLE_FPS, 10, 60]
+
+
+def test_fixed_pacing_ignores_states():
+    frames = pacer(adaptive=False, state_fps={"playing": 144})
+    for state in ("playing", "menu"):
+        assert frames.wait(state) == pytest.approx(0.005)
+    assert frames.clock.caps == [60, 60]
+    assert frames.waits == {} and frames.timestep.idle == 0.0
+
+
+def test_only_idle_states_credit_the_timestep(events):
+    frames = pacer()
+    frames.wait("playing")
+    assert frames.timestep.idle == 0.0
+    frames.schedule(0)
+    frames.wait("menu")
+    assert frames.timestep.idle == pytest.approx(frames.waits["menu"][1])
+    assert frames.waits["playing"][0] == frames.waits["menu"][0] == 1
+
+
+def test_idle_wait_sleeps_until_the_scheduled_change(events):
+    frames = pacer()
+    frames.schedule(0.05)
+    start = time.perf_counter()
+    frames.wait("menu")
+    assert time.perf_counter() - start >= 0.04
+    assert (frames.sleeps, frames.wakeups) == (1, 0)
+    assert frames.timestep.idle >= 0.04
+
+
+def test_input_cuts_an_idle_wait_short(events):
+    frames = pacer()
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    start = time.perf_counter()
+    frames.wait("menu")  # would sleep MAX_SLEEP without input
+    assert time.perf_counter() - start < pacing.MAX_SLEEP / 2
+    assert (frames.sleeps, frames.wakeups) == (0, 1)
+    # The event is still there for the game to handle
+    assert [event.type for event in pygame.event.get()] == [pygame.KEYDOWN]
+
+
+def test_summary_reports_each_state():
+    frames = pacer()
+    for state in ("menu", "playing", "playing"):
+        frames.schedule(0)
+        frames.wait(state)
+    summary = frames.summary()
+    assert "menu: 1 frames" in summary and "idle;" in summary
+    assert "playing: 2 frames" in summary and "in the frame cap" in summary
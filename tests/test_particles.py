@@ -0,0 +1,61 @@
+import numpy as np
+import pygame
+
+from particles import PIXEL_DRAW_THRESHOLD, ParticleSystem
+
+
+def live(system):
+    n = system.count
+    return sorted(zip(system.x[:n].tolist(), system.y[:n].tolist(), system.vx[:n].tolist(), system.vy[:n].tolist(),
+                      system.life[:n].tolist()))
+
+
+def live_slice(system, start):
+    s = slice(start, system.count)
+    return list(zip(system.x[s], system.y[s], system.vx[s], system.vy[s], system.life[s].tolist()))
+
+
+def test_compaction_keeps_exactly_the_survivors():
+    system = ParticleSystem(500, (255, 255, 255), rng=np.random.default_rng(0))
+    # The same particles as tuples of float32 scalars, stepped one by one
+    reference = []
+    for frame in range(200):
+        if frame % 7 == 0:
+            before = system.count
+            system.emit(400 + frame, 300 - frame, 30)
+            reference += live_slice(system, before)
+        system.update()
+        reference = [(x + vx, y + vy, vx, vy, life - 1) for x, y, vx, vy, life in reference if life > 1]
+        assert live(system) == sorted((float(x), float(y), float(vx), float(vy), life)
+                                      for x, y, vx, vy, life in reference)
+    assert system.count < system.capacity
+
+
+def test_emit_stops_at_capacity():
+    system = ParticleSystem(50, (255, 255, 255), lifetime=(100, 100), rng=np.random.default_rng(1))
+    system.emit(10, 10, 30)
+    system.emit(10, 10, 30)
+    assert len(system) == 50
+    system.emit(10, 10, 5)
+    assert len(system) == 50
+    system.update()
+    assert len(system) == 50
+    system.clear()
+    system.emit(10, 10, 5)
+    assert len(system) == 5
+
+
+def test_pixel_path_matches_circles():
+    system = ParticleSystem(2000, (255, 200, 40), rng=np.random.default_rng(2))
+    system.emit(400, 300, 1000)
+    for _ in range(30):
+        system.update()  # spread out, some past the edges
+    system.x[:5] = (-1, 0, 799, 801, 400)
+    system.y[:5] = (300, -2, 599, 300, 601)
+    assert len(system) >= PIXEL_DRAW_THRESHOLD
+    fast = pygame.Surface((800, 600), depth=32)
+    system.draw(fast)
+    slow = pygame.Surface((800, 600), depth=32)
+    for x, y in zip(system.x[:system.count].astype(np.int32), system.y[:system.count].astype(np.int32)):
+        pygame.draw.circle(slow, system.color, (int(x), int(y)), system.radius)
+    assert np.array_equal(pygame.surfarray.array2d(fast), pygame.surfarray.array2d(slow))
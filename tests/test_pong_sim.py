@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+import pygame
+import pytest
+
+import pong_sim
+from pong_sim import (AI_SPEED, BALL_RADIUS, BALL_SPEED, LEFT_PADDLE_X, MAX_SUBSTEP, PADDLE_HEIGHT, PADDLE_WIDTH,
+                      RIGHT_PADDLE_X, SCREEN_HEIGHT, SCREEN_WIDTH)
+from timestep import substep_count
+
+
+# Paddle and Ball from ultraponghdrv010.3.25.py, one match on pygame.Rect,
+# without sound. serve() gives the direction of each serve (-1 or 1).
+class ScalarPong:
+    def __init__(self, serve):
+        self.serve = serve
+        self.left = pygame.Rect(LEFT_PADDLE_X, SCREEN_HEIGHT // 2 - PADDLE_HEIGHT // 2, PADDLE_WIDTH, PADDLE_HEIGHT)
+        self.right = pygame.Rect(RIGHT_PADDLE_X, SCREEN_HEIGHT // 2 - PADDLE_HEIGHT // 2, PADDLE_WIDTH, PADDLE_HEIGHT)
+        self.ball = pygame.Rect(0, 0, BALL_RADIUS * 2, BALL_RADIUS * 2)
+        self.speed = BALL_SPEED
+        self.left_score = self.right_score = 0
+        self.reset_ball()
+
+    def reset_ball(self):
+        self.ball.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.dx = self.serve() * self.speed
+        self.dy = 0
+        self.hit_count = 0
+        self.speed = BALL_SPEED
+
+    def bounce_paddle(self, paddle):
+        if not self.ball.colliderect(paddle):
+            return False
+        self.hit_count += 1
+        segment = int((self.ball.centery - paddle.top) // (PADDLE_HEIGHT / 8))
+        if self.hit_count >= 12:
+            max_angle_deg = 60
+            self.speed += 2
+        elif self.hit_count >= 4:
+            max_angle_deg = 45
+            self.speed += 1
+        else:
+            max_angle_deg = 30
+        angles = [-max_angle_deg, -round(max_angle_deg * 2 / 3), -round(max_angle_deg / 3), 0, 0,
+                  round(max_angle_deg / 3), round(max_angle_deg * 2 / 3), max_angle_deg]
+        angle = math.radians(angles[segment % 8])
+        direction = 1 if paddle.left < SCREEN_WIDTH // 2 else -1
+        self.dx = direction * self.speed * math.cos(angle)
+        self.dy = self.speed * math.sin(angle)
+        return True
+
+    def step(self, target):
+        self.left.centery = target
+        if self.left.top < 0:
+            self.left.top = 0
+        if self.left.bottom > SCREEN_HEIGHT:
+            self.left.bottom = SCREEN_HEIGHT
+        if self.right.centery < self.ball.centery:
+            self.right.y = min(self.right.y + AI_SPEED, SCREEN_HEIGHT - PADDLE_HEIGHT)
+        elif self.right.centery > self.ball.centery:
+            self.right.y = max(self.right.y - AI_SPEED, 0)
+
+        steps = substep_count(self.dx, self.dy, MAX_SUBSTEP)
+        x, y = self.ball.x, self.ball.y
+        bounced = False
+        for _ in range(steps):
+            x += self.dx / steps
+            y += self.dy / steps
+            self.ball.x = x
+            self.ball.y = y
+            if self.ball.top <= 0 or self.ball.bottom >= SCREEN_HEIGHT:
+                self.dy = -self.dy
+            if not bounced:
+                bounced = self.bounce_paddle(self.left) or self.bounce_paddle(self.right)
+
+        if self.ball.left <= 0:
+            self.right_score += 1
+            self.reset_ball()
+        elif self.ball.right >= SCREEN_WIDTH:
+            self.left_score += 1
+            self.reset_ball()
+
+    def state(self):
+        return (self.ball.x, self.ball.y, self.dx, self.dy, self.speed, self.hit_count, self.left.y, self.right.y,
+                self.left_score, self.right_score)
+
+
+def sim_state(sim, i):
+    return (int(sim.ball_x[i]), int(sim.ball_y[i]), float(sim.ball_dx[i]), float(sim.ball_dy[i]), int(sim.speed[i]),
+            int(sim.hit_count[i]), int(sim.left_y[i]), int(sim.right_y[i]), int(sim.left_score[i]),
+            int(sim.right_score[i]))
+
+
+# Mouse targets: mostly tracking the ball (long rallies, fast balls), with a
+# jump somewhere random now and then (points)
+def targets(rng, sim, frame):
+    if frame % 50 == 0:
+        return rng.integers(0, SCREEN_HEIGHT, sim.n)
+    return sim.ball_y + BALL_RADIUS + rng.integers(-45, 45, sim.n)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_scalar_rules(seed):
+    # One match per sim, so the reference can draw its serves from the same RNG
+    sim = pong_sim.PongSim(1, seed=seed, auto_reset=False)
+    serves = np.random.default_rng(seed)
+    game = ScalarPong(lambda: int(serves.integers(0, 2, size=1)[0]) * 2 - 1)
+    policy = np.random.default_rng(seed + 100)
+    hits = points = 0
+    for frame in range(5000):
+        actions = targets(policy, sim, frame)
+        events = sim.step(actions)
+        game.step(int(actions[0]))
+        assert sim_state(sim, 0) == game.state(), f"frame {frame}"
+        hits += int(events.paddle_hit[0])
+        points += int(events.left_point[0] | events.right_point[0])
+    assert hits and points
+
+
+def test_batch_matches_scalar_rules():
+    n = 16
+    sim = pong_sim.PongSim(n, seed=7, auto_reset=False)
+    # Serves come from the sim's RNG in batch order; the reference copies them
+    games = []
+    for i in range(n):
+        games.append(ScalarPong(lambda i=i: 1 if sim.ball_dx[i] > 0 else -1))
+    policy = np.random.default_rng(8)
+    max_speed = 0
+    for frame in range(5000):
+        actions = targets(policy, sim, frame)
+        sim.step(actions)
+        for i, game in enumerate(games):
+            game.step(int(actions[i]))
+            assert sim_state(sim, i) == game.state(), f"frame {frame}, match {i}"
+        max_speed = max(max_speed, int(sim.speed.max()))
+    assert max_speed > MAX_SUBSTEP  # fast balls took the sub-stepped path
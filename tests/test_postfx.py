@@ -0,0 +1,100 @@
+import pygame
+import pytest
+
+import postfx
+from postfx import RAISE_AFTER, SAMPLE_FRAMES, WARMUP_FRAMES, PostProcess
+
+BUDGET = 0.016
+SHARE = BUDGET * postfx.AUTO_SHARE
+SLOW = SHARE * 2
+FAST = SHARE * postfx.HEADROOM / 2
+
+
+# Frames costing `cost` until `averages` samples have been taken, each after
+# whatever warmup is pending
+def feed(post, cost, averages=1):
+    for _ in range(averages):
+        for _ in range(post.skip + SAMPLE_FRAMES):
+            post._measure(0.0 if post.tier == "off" else cost)
+
+
+def test_steps_down_a_tier_per_expensive_average():
+    post = PostProcess("auto", budget=BUDGET)
+    tiers = []
+    for _ in range(4):
+        feed(post, SLOW)
+        tiers.append(post.tier)
+    assert tiers == ["medium", "low", "off", "off"]
+    assert post.changes == 3
+
+
+def test_warmup_frames_are_not_measured():
+    post = PostProcess("auto", budget=BUDGET)
+    for _ in range(WARMUP_FRAMES):
+        post._measure(1.0)  # building surfaces, sharing the CPU with the loader
+    feed(post, FAST, RAISE_AFTER)
+    assert post.tier == "high" and post.changes == 0
+
+
+def test_steps_back_up_after_comfortable_averages():
+    post = PostProcess("auto", budget=BUDGET)
+    feed(post, SLOW, 3)
+    assert post.tier == "off"
+    feed(post, FAST, RAISE_AFTER - 1)
+    assert post.tier == "off"
+    feed(post, FAST)
+    assert post.tier == "low"
+    feed(post, FAST, RAISE_AFTER)
+    assert post.tier == "medium"
+    feed(post, FAST, 2 * RAISE_AFTER)
+    assert post.tier == "high" and post.changes == 6
+
+
+def test_middling_cost_holds_the_tier():
+    post = PostProcess("auto", budget=BUDGET)
+    feed(post, SHARE * (1 + postfx.HEADROOM) / 2, 10 * RAISE_AFTER)
+    assert post.tier == "high"
+    feed(post, SLOW)
+    feed(post, SHARE * (1 + postfx.HEADROOM) / 2, 10 * RAISE_AFTER)
+    assert post.tier == "medium"
+
+
+def test_failed_raises_wait_longer():
+    post = PostProcess("auto", budget=BUDGET)
+    feed(post, SLOW)
+    assert post.tier == "medium"
+    for patience in (1, 2, 4):
+        feed(post, FAST, RAISE_AFTER * patience - 1)
+        assert post.tier == "medium"
+        feed(post, FAST)
+        assert post.tier == "high"
+        feed(post, SLOW)  # high is still too slow
+        assert post.tier == "medium"
+    assert post.patience == 8
+    # A raise that holds resets the wait
+    feed(post, FAST, RAISE_AFTER * 8)
+    feed(post, FAST)
+    assert post.tier == "high" and post.patience == 1
+
+
+def test_fixed_tier_never_changes():
+    post = PostProcess("low", budget=BUDGET)
+    feed(post, SLOW, 5)
+    assert post.tier == "low" and post.changes == 0
+    assert post.costs["low"] == pytest.approx(SLOW)
+
+
+def test_surfaces_follow_the_tier_and_size():
+    post = PostProcess("auto", budget=BUDGET)
+    frame = pygame.Surface((320, 240), depth=32)
+    frame.fill((255, 255, 255), (150, 110, 20, 20))
+    post.apply(frame)
+    assert post.current == ("high", (320, 240))
+    assert sorted(post.surfaces) == ["crt", "large", "small"]
+    assert frame.get_at((140, 120))[:3] != (0, 0, 0)  # glow around the square
+    post._change("low")
+    post.apply(pygame.Surface((200, 100), depth=32))
+    assert post.current == ("low", (200, 100))
+    assert post.surfaces["small"].get_size() == (25, 12)
+    assert "crt" not in post.surfaces  # low has no scanlines or vignette
+    assert post.skip == WARMUP_FRAMES - 1
@@ -0,0 +1,47 @@
+import pytest
+
+import replay
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 + 5])
+def test_varint_round_trip(value):
+    buf = bytearray(b"x")
+    replay.write_varint(buf, value)
+    assert replay.read_varint(buf, 1) == (value, len(buf))
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, -64, 64, -65, 10 ** 9, -10 ** 9])
+def test_zigzag_round_trip(value):
+    encoded = replay.zigzag(value)
+    assert encoded >= 0
+    assert replay.unzigzag(encoded) == value
+
+
+def test_replay_round_trip(tmp_path):
+    path = tmp_path / "session.rpl"
+    frames = []
+    for i in range(10000):
+        ticks = (0, 1, 1, 2, 40)[i % 5]  # 40 is past the flag byte's tick field
+        mouse = (400 + (i // 7) % 50 - 25, 300 - (i // 3) % 80) if i % 11 else (0, 0)
+        events = []
+        if i % 97 == 0:
+            events = [(replay.EVENT_KEYDOWN, 32), (replay.EVENT_KEYDOWN, 1073741906)]
+        elif i == 9999:
+            events = [(replay.EVENT_QUIT, 0)]
+        frames.append((ticks, mouse, events))
+
+    writer = replay.ReplayWriter(str(path), "pong", 1234, 60)
+    for frame in frames:
+        writer.frame(*frame)
+    writer.close()
+
+    reader = replay.ReplayReader(str(path))
+    assert (reader.game, reader.seed, reader.sim_rate) == ("pong", 1234, 60)
+    assert list(reader) == frames
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_replay"
+    path.write_bytes(b"hello world")
+    with pytest.raises(ValueError):
+        replay.ReplayReader(str(path))
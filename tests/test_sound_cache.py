@@ -0,0 +1,75 @@
+import numpy as np
+import pygame
+import pytest
+
+from sound_cache import SoundCache, synthesize
+
+
+@pytest.fixture(autouse=True)
+def mixer():
+    pygame.mixer.init(44100, -16, 2)
+    yield
+    pygame.mixer.quit()
+
+
+def pcm(sound):
+    return pygame.sndarray.array(sound)
+
+
+def test_hits_return_the_same_sound():
+    cache = SoundCache()
+    beep = cache.get(440, 0.1)
+    assert cache.get(freq=440, duration=0.1) is beep
+    assert cache.get(440.0, 0.1, 0.05, "sine") is beep  # defaults and int/float spellings share a key
+    assert cache.get(880, 0.1) is not beep
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_samples_match_the_synthesizer():
+    cache = SoundCache()
+    samples = pcm(cache.get(330, 0.05, 0.2, "square"))
+    expected = (synthesize(330, 0.05, 0.2, "square") * 32767).astype(np.int16)
+    assert samples.shape == (len(expected), 2)
+    assert np.array_equal(samples[:, 0], expected) and np.array_equal(samples[:, 1], expected)
+
+
+def test_least_recently_used_sounds_are_evicted():
+    cache = SoundCache(max_size=3)
+    sounds = [cache.get(freq, 0.02) for freq in (100, 200, 300)]
+    assert cache.get(100, 0.02) is sounds[0]  # now the most recent
+    cache.get(400, 0.02)  # evicts 200
+    assert len(cache.sounds) == 3
+    assert cache.get(300, 0.02) is sounds[2]
+    assert cache.get(100, 0.02) is sounds[0]
+    misses = cache.misses
+    assert cache.get(200, 0.02) is not sounds[1]
+    assert cache.misses == misses + 1
+    assert [key[0] for key in cache.sounds] == [300.0, 100.0, 200.0]
+
+
+def test_get_many_synthesizes_repeats_once():
+    cache = SoundCache()
+    specs = [{"freq": 100}, {"freq": 200}, {"freq": 100}]
+    first, second, again = cache.get_many(specs)
+    assert first is again and first is not second
+    assert cache.misses == 2 and len(cache.sounds) == 2
+
+
+def test_disk_cache_round_trip(tmp_path):
+    rendered = SoundCache(cache_dir=str(tmp_path))
+    samples = pcm(rendered.get(523.25, 0.1, 0.1, "saw"))
+    assert len(list(tmp_path.glob("*.npy"))) == 1 and not list(tmp_path.glob("*.tmp"))
+
+    loaded = SoundCache(cache_dir=str(tmp_path))  # a later launch
+    assert np.array_equal(pcm(loaded.get(523.25, 0.1, 0.1, "saw")), samples)
+    assert (loaded.hits, loaded.misses) == (1, 0)
+
+
+def test_corrupt_disk_entries_are_resynthesized(tmp_path):
+    samples = pcm(SoundCache(cache_dir=str(tmp_path)).get(440, 0.05))
+    path, = tmp_path.glob("*.npy")
+    path.write_bytes(b"not a numpy file")
+    cache = SoundCache(cache_dir=str(tmp_path))
+    assert np.array_equal(pcm(cache.get(440, 0.05)), samples)
+    assert cache.misses == 1
+    assert np.array_equal(np.load(path), samples)  # and overwritten with good data
@@ -0,0 +1,51 @@
+import pygame
+import pytest
+
+from text_cache import DigitAtlas, TextCache
+
+
+@pytest.fixture(scope="module")
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 40)
+
+
+def test_text_cache_hits_return_the_same_surface(font):
+    cache = TextCache()
+    first = cache.render(font, "Press SPACE", (255, 255, 255))
+    assert cache.render(font, "Press SPACE", [255, 255, 255]) is first
+    assert cache.render(font, "Press SPACE", (255, 0, 0)) is not first
+    assert cache.render(font, "Press SPACE", (255, 255, 255), antialias=False) is not first
+
+
+def test_text_cache_evicts_least_recently_used(font):
+    cache = TextCache(max_size=3)
+    a = cache.render(font, "a", (255, 255, 255))
+    cache.render(font, "b", (255, 255, 255))
+    cache.render(font, "c", (255, 255, 255))
+    assert cache.render(font, "a", (255, 255, 255)) is a  # now the newest
+    cache.render(font, "d", (255, 255, 255))  # evicts "b"
+    assert len(cache.surfaces) == 3
+    assert [key[1] for key in cache.surfaces] == ["c", "a", "d"]
+    assert cache.render(font, "a", (255, 255, 255)) is a
+
+
+@pytest.mark.parametrize("value", [0, 7, 10, 305, -42])
+def test_digit_atlas_composes_numbers(font, value):
+    atlas = DigitAtlas(font, (255, 255, 255))
+    surface = pygame.Surface((400, 100))
+    surface.set_colorkey((0, 0, 0))  # for get_bounding_rect()
+    rect = atlas.blit(surface, value, (20, 30))
+    assert rect.topleft == (20, 30)
+    assert rect.size == atlas.size(value)
+    assert surface.get_bounding_rect().width > 0
+    assert rect.contains(surface.get_bounding_rect())
+    # Each glyph is where a plain render of that character would put it
+    x = 20
+    for char in str(value):
+        glyph = font.render(char, True, (255, 255, 255))
+        expected = pygame.Surface(glyph.get_size())
+        expected.blit(glyph, (0, 0))
+        assert pygame.image.tobytes(surface.subsurface((x, 30), glyph.get_size()), "RGB") == \
+               pygame.image.tobytes(expected, "RGB")
+        x += glyph.get_width()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+import pygame
+
+# Pre-rendered text.
+#
+# TextCache memoizes font.render() by (font, text, color, antialias) with LRU
+# eviction, so static strings are rasterized once. DigitAtlas renders 0-9 once
+# per font/color and composes numbers (scores) from those glyphs with a single
+# Surface.blits call.
+
+
+class TextCache:
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class DigitAtlas:
+    def __init__(self, font, color, antialias=True):
+        self.glyphs = [font.render(str(d), antialias, color) for d in range(10)]
+        self.minus = font.render("-", antialias, color)
+        self.height = max(g.get_height() for g in self.glyphs)
+
+    def size(self, value):
+        text = str(int(value))
+        return sum(self._glyph(c).get_width() for c in text), self.height
+
+    def _glyph(self, char):
+        return self.minus if char == "-" else self.glyphs[ord(char) - 48]
+
+    # Blit an integer with its top-left at pos; returns the covered rect
+    def blit(self, surface, value, pos):
+        x, y = pos
+        batch = []
+        for char in str(int(value)):
+            glyph = self._glyph(char)
+            batch.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(batch, doreturn=False)
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
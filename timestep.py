@@ -0,0 +1,49 @@
+import math
+
+# Fixed-timestep simulation helpers.
+#
+# FixedTimestep turns variable frame times into a whole number of fixed
+# simulation ticks (accumulator pattern), so physics runs at the same rate
+# whether the display refreshes at 30, 60 or 144 Hz. alpha is how far the
+# renderer is between the last two ticks, for interpolating positions.
+# Time the loop slept on purpose (see pacing.py) goes in `idle`; the ticks it
+# covers are simulated in full instead of counting against max_steps.
+
+
+class FixedTimestep:
+    def __init__(self, rate=60, max_steps=5):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.max_steps = max_steps  # beyond this, drop time instead of spiralling
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped = 0.0
+        self.idle = 0.0
+
+    def advance(self, elapsed):
+        # Add a frame's elapsed seconds; returns how many ticks to simulate
+        self.accumulator += elapsed
+        steps = int(self.accumulator * self.rate + 1e-9)
+        max_steps = self.max_steps + int(self.idle * self.rate)
+        self.idle = 0.0
+        if steps > max_steps:
+            self.dropped += (steps - max_steps) * self.dt
+            steps = max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        self.ticks += steps
+        return steps
+
+    @property
+    def alpha(self):
+        return min(self.accumulator * self.rate, 1.0)
+
+
+def lerp_point(a, b, t):
+    return (round(a[0] + (b[0] - a[0]) * t), round(a[1] + (b[1] - a[1]) * t))
+
+
+# Number of equal sub-steps so no single move is longer than max_step pixels
+def substep_count(dx, dy, max_step):
+    return max(1, math.ceil(max(abs(dx), abs(dy)) / max_step))
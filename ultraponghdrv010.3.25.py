@@ -1,16 +1,79 @@
-import pygame, sys, random, math
+import time
+launch_time = time.perf_counter()  # startup report baseline, before the heavy imports
+import pygame, sys, os, random, math, argparse
+from text_cache import TextCache, DigitAtlas
+from dirty_rects import DirtyRenderer, NullRenderer
+from glow_cache import SurfacePool
+from timestep import FixedTimestep, lerp_point, substep_count
+from profiler import FrameProfiler, DEFAULT_EXPORT, OVERLAY_SIZE
+from assets import BackgroundLoader, StartupReport
+import replay, profiler, assets, netplay, spectate, resolution, achievements, pacing, capture
 
 # Optional NumPy (for procedural audio)
 try:
     import numpy as np
+    from sound_bank import SoundBank, VoicePool
+    from sound_cache import SoundCache
+    from particles import ParticleSystem
+    from starfield import Starfield
+    from gradient import GradientCache
+    from postfx import PostProcess
     HAVE_NUMPY = True
 except ImportError:
     HAVE_NUMPY = False
     print("NumPy not found – running silent mode.")
 
-# Initialize
-pygame.init()
-pygame.mixer.init()
+# Command line
+parser = argparse.ArgumentParser(description="Atari Pong - PS5 Edition")
+parser.add_argument("--dirty-rects", action="store_true", help="redraw and present only changed regions (freezes the starfield)")
+parser.add_argument("--fps", type=int, default=60, help="render frame cap, 0 for uncapped (physics always runs at SIM_RATE)")
+parser.add_argument("--autopilot", action="store_true", help="left paddle tracks the ball (attract mode, benchmarks)")
+parser.add_argument("--particles-per-hit", type=int, default=20, help="particles emitted per paddle hit")
+parser.add_argument("--bloom", choices=("auto", "off", "low", "medium", "high"), default="auto",
+                    help="bloom and CRT post-processing tier (needs NumPy and full redraws); auto moves between "
+                         "tiers by their measured cost, replays use off for auto")
+replay.add_arguments(parser)
+profiler.add_arguments(parser)
+assets.add_arguments(parser)
+netplay.add_arguments(parser)
+spectate.add_arguments(parser)
+resolution.add_arguments(parser)
+achievements.add_arguments(parser)
+pacing.add_arguments(parser)
+capture.add_arguments(parser)
+args = parser.parse_args()
+if args.dirty_rects and (args.window or args.fullscreen):
+    parser.error("--dirty-rects draws straight to an unscaled window; it can't be combined with --window or --fullscreen")
+if args.host is not None and args.connect:
+    parser.error("--host and --connect are mutually exclusive")
+if (args.host is not None or args.connect) and (args.replay or args.record):
+    parser.error("network games can't be recorded or replayed")
+if args.spectate and (args.host is not None or args.connect or args.broadcast is not None or args.replay or args.record):
+    parser.error("--spectate only watches; it can't be combined with playing, broadcasting or replays")
+if args.headless:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+# Session seed: drives Ball.reset serves and all particle/star randomness, so
+# a replay's seed plus its recorded inputs reproduce the session exactly
+replay_reader = replay.ReplayReader(args.replay) if args.replay else None
+if replay_reader:
+    if replay_reader.game != "pong":
+        parser.error(f"{args.replay} is a {replay_reader.game} replay")
+    seed = replay_reader.seed
+elif args.seed is not None:
+    seed = args.seed
+else:
+    seed = random.randrange(2**63)
+random.seed(seed)
+
+# Initialize: only what the first frame needs. Audio is opened after that
+# frame is on screen, and slow assets are then built on a loader thread (assets.py)
+startup = StartupReport(launch_time)
+startup.mark("imports")
+pygame.display.init()
+pygame.font.init()
+loader = BackgroundLoader(startup)
 
 # Constants
 SCREEN_WIDTH = 800
@@ -22,65 +85,73 @@ PADDLE_SPEED = 5
 BALL_SPEED = 3
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
+BG_GRADIENT = [(0, 0, 50), (0, 0, 0)]  # top to bottom
 GLOW_COLOR = (100, 255, 100)
 GLOW_ALPHA = 50
 AI_SPEED = 4  # Slightly slower than player for fairness
-
-# Screen setup
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Atari Pong - PS5 Edition")
+SIM_RATE = 60  # Physics ticks per second, independent of the render rate
+MAX_SUBSTEP = min(PADDLE_WIDTH, BALL_RADIUS * 2)  # Longest ball move per collision check
+PARTICLE_CAPACITY = 50000
+PARTICLES_PER_HIT = args.particles_per_hit
+# Parallax starfield layers: (count, min_speed, max_speed, min_brightness, max_brightness)
+STAR_LAYERS = [
+    (8000, 0.05, 0.15, 40, 110),
+    (3000, 0.15, 0.35, 90, 190),
+    (1000, 0.35, 0.6, 170, 255),
+]
+IDLE_STARFIELD_FPS = 4  # starfield redraws per second on idle screens with --pacing adaptive
+MAX_VOICES = 8  # Sound effects playing at once
+SOUND_CACHE_SIZE = 64
+SOUND_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ultrapong", "sfx")  # None disables the disk cache
+
+# Screen setup: everything runs in SCREEN_WIDTH x SCREEN_HEIGHT logical
+# coordinates and is drawn through `view` at the current render scale into a
+# window of any size (see resolution.py)
+display = resolution.Display((SCREEN_WIDTH, SCREEN_HEIGHT), "Atari Pong - PS5 Edition", args.window, args.fullscreen,
+                             resizable=not args.dirty_rects)
+screen = display.surface
+view = resolution.View((SCREEN_WIDTH, SCREEN_HEIGHT))
 clock = pygame.time.Clock()
-
-# Enhanced Procedural Sound Generator with ADSR Envelope
-def generate_sound(freq=440, duration=0.1, volume=0.05, wave_type='sine', attack=0.01, decay=0.05, sustain_level=0.5, release=0.01):
-    if not HAVE_NUMPY:
-        return pygame.mixer.Sound(buffer=b'\x00'*100)  # silent dummy sound
-    sample_rate = pygame.mixer.get_init()[0]
-    num_samples = int(sample_rate * duration)
-    t = np.linspace(0, duration, num_samples, endpoint=False)
-    
-    # Generate base wave
-    if wave_type == 'sine':
-        wave = np.sin(2 * np.pi * freq * t)
-    elif wave_type == 'square':
-        wave = np.sign(np.sin(2 * np.pi * freq * t))
-    elif wave_type == 'saw':
-        wave = 2 * (t * freq - np.floor(0.5 + t * freq)) - 1  # Normalized to [-1,1]
-    else:
-        wave = np.sin(2 * np.pi * freq * t)
-    
-    # ADSR Envelope
-    envelope = np.ones(num_samples)
-    
-    # Attack
-    attack_samples = min(int(sample_rate * attack), num_samples)
-    if attack_samples > 0:
-        envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-    
-    # Decay
-    decay_start = attack_samples
-    decay_samples = int(sample_rate * decay)
-    decay_end = min(decay_start + decay_samples, num_samples)
-    if decay_end > decay_start:
-        envelope[decay_start:decay_end] = np.linspace(1, sustain_level, decay_end - decay_start)
-    
-    # Sustain (flat at sustain_level until release)
-    sustain_end = max(decay_end, num_samples - int(sample_rate * release))
-    if sustain_end > decay_end:
-        envelope[decay_end:sustain_end] = sustain_level
-    
-    # Release
-    release_start = max(0, num_samples - int(sample_rate * release))
-    if release_start < num_samples:
-        envelope[release_start:] = np.linspace(sustain_level, 0, num_samples - release_start)
-    
-    wave *= envelope * volume
-    audio = (wave * 32767).astype(np.int16)
-    return pygame.sndarray.make_sound(np.column_stack((audio, audio)))  # stereo
-
-# Pre-generate base sounds (will be overridden for dynamic ones)
-wall_bounce_sound = generate_sound(300, 0.05, wave_type='square', attack=0.001, decay=0.03, sustain_level=0.3, release=0.01)
-score_sound = generate_sound(659.25, 0.2, wave_type='saw', attack=0.01, decay=0.1, sustain_level=0.4, release=0.05)
+startup.mark("window")
+
+# Per-phase frame timings (F3 overlay, F4 export, see profiler.py)
+frame_profiler = FrameProfiler()
+frame_profiler.visible = args.profile
+profile_rect = pygame.Rect((10, SCREEN_HEIGHT - OVERLAY_SIZE[1] - 10), OVERLAY_SIZE)
+
+# Enhanced Procedural Sound Generator with ADSR Envelope (one batched bank,
+# memoized and kept on disk, see sound_bank.py and sound_cache.py)
+SOUND_EFFECTS = {
+    "wall_bounce": dict(freq=300, duration=0.05, wave_type='square', attack=0.001, decay=0.03, sustain_level=0.3, release=0.01),
+    "score": dict(freq=659.25, duration=0.2, wave_type='saw', attack=0.01, decay=0.1, sustain_level=0.4, release=0.05),
+}
+# Paddle hit beep per segment (higher pitch for center hits). The ball's
+# center can sit just past either paddle end, hence segments -1 and 8
+for segment in range(-1, 9):
+    SOUND_EFFECTS[f"paddle_{segment}"] = dict(freq=400 + (segment * 30), duration=0.05, wave_type='square', attack=0.005, decay=0.02, sustain_level=0.2, release=0.01)
+
+audio_ready = False
+voices = None
+
+# Open the mixer and synthesize the sound bank (or load it from the disk
+# cache) on the loader thread
+def init_audio():
+    global audio_ready, voices
+    audio_ready = True
+    pygame.mixer.init()
+    startup.mark("audio")
+    if HAVE_NUMPY:
+        voices = VoicePool(MAX_VOICES)
+        loader.submit("sounds", SoundBank, SOUND_EFFECTS, SoundCache(SOUND_CACHE_SIZE, SOUND_CACHE_DIR))
+
+# Sound playback is its own profiler phase; it was physics up to here
+def play_sound(name):
+    frame_profiler.mark("physics")
+    if not audio_ready:
+        init_audio()  # needed before the first frame went up
+    if HAVE_NUMPY:
+        voices.play(loader.get("sounds")[name])
+    frame_profiler.mark("audio")
 
 # Classes (unchanged)
 class Paddle:
@@ -101,14 +172,27 @@ class Ball:
         self.hit_count = 0
         self.reset()
 
-    def move(self):
-        self.rect.x += self.dx
-        self.rect.y += self.dy
+    # One physics tick: move in sub-steps of at most MAX_SUBSTEP pixels with
+    # wall/paddle checks after each, so a fast ball can't skip over a paddle.
+    # At normal speeds this is a single step, same as move + bounces.
+    def update(self, left_paddle, right_paddle):
+        steps = substep_count(self.dx, self.dy, MAX_SUBSTEP)
+        x, y = self.rect.x, self.rect.y
+        bounced = False
+        for _ in range(steps):
+            x += self.dx / steps
+            y += self.dy / steps
+            self.rect.x = x
+            self.rect.y = y
+            self.bounce_wall()
+            if not bounced:
+                bounced = self.bounce_paddle(left_paddle) or self.bounce_paddle(right_paddle)
+        return bounced
 
     def bounce_wall(self):
         if self.rect.top <= 0 or self.rect.bottom >= SCREEN_HEIGHT:
             self.dy = -self.dy
-            if HAVE_NUMPY: wall_bounce_sound.play()
+            play_sound("wall_bounce")
 
     def bounce_paddle(self, paddle):
         if self.rect.colliderect(paddle.rect):
@@ -146,11 +230,8 @@ class Ball:
                 self.dx = -self.speed * math.cos(angle)
                 self.dy = self.speed * math.sin(angle)
             
-            # Dynamic beep based on segment (higher pitch for center hits)
-            dynamic_freq = 400 + (segment * 30)  # Range ~400-640 Hz
-            if HAVE_NUMPY:
-                dynamic_bounce = generate_sound(dynamic_freq, 0.05, wave_type='square', attack=0.005, decay=0.02, sustain_level=0.2, release=0.01)
-                dynamic_bounce.play()
+            # Dynamic beep based on segment (range ~370-640 Hz)
+            play_sound(f"paddle_{segment}")
             return True
         return False
 
@@ -164,8 +245,8 @@ class Ball:
             left_score += 1
             self.reset()
             scored = True
-        if scored and HAVE_NUMPY:
-            score_sound.play()
+        if scored:
+            play_sound("score")
         return left_score, right_score
 
     def reset(self):
@@ -190,9 +271,39 @@ class Particle:
         self.y += self.vy
         self.lifetime -= 1
 
-    def draw(self, surface):
+    def draw(self, surface, scale=1):
         if self.lifetime > 0:
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), 2)
+            pygame.draw.circle(surface, self.color, (int(self.x * scale), int(self.y * scale)), 2)
+
+# Fallback with the ParticleSystem interface for running without NumPy
+class ParticleList:
+    def __init__(self):
+        self.particles = []
+
+    def __len__(self):
+        return len(self.particles)
+
+    def clear(self):
+        self.particles = []
+
+    def emit(self, x, y, n):
+        self.particles.extend(Particle(x, y) for _ in range(n))
+
+    def update(self):
+        for p in self.particles:
+            p.update()
+        self.particles = [p for p in self.particles if p.lifetime > 0]
+
+    def draw(self, surface, scale=1):
+        for p in self.particles:
+            p.draw(surface, scale)
+
+    def bounds(self):
+        if not self.particles:
+            return None
+        xs = [int(p.x) for p in self.particles]
+        ys = [int(p.y) for p in self.particles]
+        return pygame.Rect(min(xs) - 2, min(ys) - 2, max(xs) - min(xs) + 5, max(ys) - min(ys) + 5)
 
 # Procedural Starfield
 class Star:
@@ -208,13 +319,35 @@ class Star:
             self.x = SCREEN_WIDTH
             self.y = random.randint(0, SCREEN_HEIGHT)
 
-    def draw(self, surface):
-        pygame.draw.circle(surface, (self.brightness, self.brightness, self.brightness), (int(self.x), int(self.y)), 1)
+    def draw(self, surface, scale=1):
+        pygame.draw.circle(surface, (self.brightness, self.brightness, self.brightness), (int(self.x * scale), int(self.y * scale)), 1)
 
-# Generate starfield layers
-stars = [Star() for _ in range(200)]
+# Fallback with the Starfield interface for running without NumPy
+class StarList:
+    def __init__(self, count=200):
+        self.stars = [Star() for _ in range(count)]
 
-# Gradient background function
+    def update(self):
+        for star in self.stars:
+            star.update()
+
+    def draw(self, surface, scale=1):
+        for star in self.stars:
+            star.draw(surface, scale)
+
+# Generate starfield layers (on the loader thread, which also pays for
+# importing numpy.random; the fallback draws from the shared random module,
+# so it is built here to keep replays deterministic)
+def build_starfield():
+    return Starfield(SCREEN_WIDTH, SCREEN_HEIGHT, STAR_LAYERS, rng=np.random.default_rng(seed + 1))
+
+if HAVE_NUMPY:
+    starfield = None
+    loader.submit("stars", build_starfield)
+else:
+    starfield = StarList()
+
+# Gradient background function (per-scanline fallback for running without NumPy)
 def fill_gradient(surface, color, gradient, rect=None, vertical=True, forward=True):
     if rect is None: rect = surface.get_rect()
     x1, x2 = rect.left, rect.right
@@ -250,14 +383,271 @@ right_paddle = Paddle(SCREEN_WIDTH - 30, SCREEN_HEIGHT//2 - PADDLE_HEIGHT//2)
 ball = Ball()
 left_score = 0
 right_score = 0
-font = pygame.font.Font(None, 74)
-title_font = pygame.font.Font(None, 120)
-small_font = pygame.font.Font(None, 50)
-particles = []
 
-# Background surface for gradient
-bg_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-fill_gradient(bg_surface, (0, 0, 50), (0, 0, 0), vertical=True)
+# Trophies for the left (local) player, unlocked by game events with progress
+# saved across sessions (see achievements.py)
+TROPHIES = [
+    achievements.milestone("First Point", "Score a point", "points_scored", 1),
+    achievements.milestone("Wall", "Return the ball 100 times", "returns", 100),
+    achievements.milestone("Champion", "Win a match", "matches_won", 1),
+    achievements.milestone("Flawless", "Win a match 5-0", "shutouts", 1),
+    achievements.Achievement("Veteran", "Play 10 matches", ("matches_won", "matches_lost"),
+                             lambda stats: stats["matches_won"] + stats["matches_lost"] >= 10),
+]
+trophies = achievements.AchievementTracker(TROPHIES, achievements.open_store(
+    args, "pong", playing=not (args.replay or args.spectate or args.connect or args.autopilot)))
+
+def record(event, amount=1):
+    for trophy in trophies.record(event, amount):
+        print(f"Trophy unlocked: {trophy.name}")
+
+font = view.load_font(None, 74)
+title_font = view.load_font(None, 120)
+small_font = view.load_font(None, 50)
+text_cache = TextCache()
+score_digits = DigitAtlas(font, WHITE)
+
+def build_particles():
+    return ParticleSystem(PARTICLE_CAPACITY, GLOW_COLOR, rng=np.random.default_rng(seed))
+
+if HAVE_NUMPY:
+    particles = None  # not needed until a match starts
+    loader.submit("particles", build_particles)
+else:
+    particles = ParticleList()
+
+# Background surface for gradient (cached by size and colors, cheap to rebuild on resize/theme change).
+# Built on the loader thread; until then the screen is filled with the gradient's middle color
+if HAVE_NUMPY:
+    gradients = GradientCache()
+    loader.submit("background", gradients.get, (SCREEN_WIDTH, SCREEN_HEIGHT), BG_GRADIENT, True)
+    bg_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    bg_surface.fill([(a + b) // 2 for a, b in zip(*BG_GRADIENT[:2])])
+else:
+    bg_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    fill_gradient(bg_surface, BG_GRADIENT[0], BG_GRADIENT[1], vertical=True)
+
+# Glow sprites, rendered once (see glow_cache.py)
+glow_pool = SurfacePool()
+bloom = None  # the post-process (set up with the renderer), which glows for real
+
+# With bloom on, objects are drawn plain and the post-process makes the glow
+def baked_glow():
+    return not (bloom and bloom.enabled)
+
+# Glow sprites are built at the render scale (again after each scale
+# change), in logical units mapped through the view
+def build_center_line(surface):
+    # Whole dashed middle line with glow baked into one surface
+    dash_height = 10
+    space = 10
+    dash_glow = glow_pool.fill(view.size_of((3, dash_height)), GLOW_COLOR, GLOW_ALPHA)
+    y = 0
+    while y < SCREEN_HEIGHT:
+        if baked_glow():
+            surface.blit(dash_glow, view.point((0, y)))
+        pygame.draw.line(surface, WHITE, view.point((1, y)), view.point((1, y + dash_height)), view.length(1))
+        y += dash_height + space
+
+def build_paddle(surface):
+    if baked_glow():
+        surface.fill((*GLOW_COLOR, GLOW_ALPHA))
+    pygame.draw.rect(surface, WHITE, view.rect((5, 5, PADDLE_WIDTH, PADDLE_HEIGHT)))
+
+def build_ball(surface):
+    # The glow circles are drawn opaque, exactly like drawing them on the screen
+    surface.set_colorkey(BLACK)
+    center = (view.length(BALL_RADIUS + 10),) * 2
+    if baked_glow():
+        pygame.draw.circle(surface, GLOW_COLOR, center, view.length(BALL_RADIUS + 5))
+        pygame.draw.circle(surface, GLOW_COLOR, center, view.length(BALL_RADIUS + 10))
+    pygame.draw.circle(surface, WHITE, center, view.length(BALL_RADIUS))
+
+def glow_sprite(key, size, build, flags=pygame.SRCALPHA):
+    glow_pool.set_scale(view.scale)
+    return glow_pool.sprite((key, baked_glow()), size, build, flags)
+
+# Drawing helpers, called by the renderer with the screen as first argument
+def draw_center_line(surface):
+    sprite = glow_sprite("center_line", view.size_of((3, SCREEN_HEIGHT)), build_center_line)
+    surface.blit(sprite, view.point((SCREEN_WIDTH // 2 - 1, 0)))
+
+def draw_paddle(surface, topleft):
+    sprite = glow_sprite("paddle", view.size_of((PADDLE_WIDTH + 10, PADDLE_HEIGHT + 10)), build_paddle)
+    surface.blit(sprite, view.point((topleft[0] - 5, topleft[1] - 5)))
+
+def draw_ball(surface, center):
+    radius = view.length(BALL_RADIUS + 10)
+    sprite = glow_sprite("ball", (radius * 2 + 1,) * 2, build_ball, flags=0)
+    x, y = view.point(center)
+    surface.blit(sprite, (x - radius, y - radius))
+
+def draw_text(surface, text_font, text, pos):
+    surface.blit(text_cache.render(view.font(text_font), text, WHITE), view.point(pos))
+
+def draw_score(surface, value, pos):
+    digits = view.cached("score_digits", lambda: DigitAtlas(view.font(font), WHITE))
+    digits.blit(surface, value, view.point(pos))
+
+def draw_profiler(surface):
+    area = view.rect(profile_rect)
+    frame_profiler.draw(surface, area.topleft, area.size)
+
+# Submit a cached, horizontally centered text line as a sprite (laid out
+# with the logical font, drawn with the scaled one)
+def text_sprite(key, text_font, text, y):
+    rendered = text_cache.render(text_font, text, WHITE)
+    pos = (SCREEN_WIDTH//2 - rendered.get_width()//2, y)
+    renderer.sprite(key, rendered.get_rect(topleft=pos), text, draw_text, text_font, text, pos)
+
+# Renderer: full redraw at the current render scale, or dirty rects against
+# a background with the stars baked in (unscaled)
+screen_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+center_line_rect = pygame.Rect(SCREEN_WIDTH // 2 - 1, 0, 3, SCREEN_HEIGHT)
+def current_background():
+    if args.dirty_rects and starfield is not None:
+        background = bg_surface.copy()
+        starfield.draw(background)
+        return background
+    return bg_surface
+
+scaler = None
+if args.replay and args.fast_forward:
+    renderer = NullRenderer(screen, bg_surface)
+elif args.dirty_rects:
+    renderer = DirtyRenderer(screen, current_background())
+else:
+    budget = args.frame_budget / 1000 if args.frame_budget else 0.9 / (args.fps or SIM_RATE)
+    # Replays render at a fixed resolution so their output doesn't depend on timing
+    mode = "native" if args.replay and args.resolution == "auto" else args.resolution
+    scaler = resolution.ResolutionScaler(display, view, budget, mode)
+    renderer = resolution.ScaledRenderer(display, view, bg_surface)
+    # Bloom and scanlines on each finished frame (see postfx.py), at a fixed
+    # tier for replays so their frames don't depend on timing
+    bloom_mode = "off" if args.replay and args.bloom == "auto" else args.bloom
+    if HAVE_NUMPY and bloom_mode != "off":
+        bloom = PostProcess(bloom_mode, GLOW_COLOR, budget)
+
+# Swap in assets from the loader thread (waiting for them if necessary)
+pending_assets = {"stars", "background", "particles"} if HAVE_NUMPY else set()
+
+def install_asset(name):
+    global starfield, bg_surface, particles
+    value = loader.get(name)
+    pending_assets.discard(name)
+    if name == "particles":
+        particles = value
+        return
+    if name == "stars":
+        starfield = value
+    else:
+        bg_surface = value
+    renderer.set_background(current_background())
+
+# Installs whatever has finished; returns False once everything is in
+def poll_assets():
+    for name in [name for name in pending_assets if loader.ready(name)]:
+        install_asset(name)
+    if pending_assets or not audio_ready or not loader.idle():
+        return True
+    if args.startup_report:
+        startup.print()
+    return False
+
+# Timing: physics at SIM_RATE, rendering at up to --fps with interpolation
+timestep = FixedTimestep(SIM_RATE)
+frame_time = 0.0
+# Frame pacing (see pacing.py): the menu and game over screens change only on
+# input, the blinking prompt and the starfield, which moves at full speed
+# but is redrawn only IDLE_STARFIELD_FPS times a second there
+pacer = pacing.from_args(args, clock, timestep, ("menu", "game_over"))
+# Frame capture (see capture.py): presented frames go to a writer thread
+frame_capture = capture.from_args(args, args.fps or SIM_RATE)
+prev_ball = ball.rect.topleft
+prev_right = right_paddle.rect.topleft
+
+# Input: live (optionally recorded) or played back from a replay
+if replay_reader:
+    controls = replay.PlaybackControls(timestep, replay_reader)
+else:
+    controls = replay.LiveControls(timestep, replay.ReplayWriter(args.record, "pong", seed, SIM_RATE) if args.record else None)
+controls.map_mouse = display.to_logical
+
+# Network play (see netplay.py): the host simulates and the guest's mouse
+# drives the right paddle; the client only sends input and draws snapshots
+net_conditions = dict(latency=args.net_latency / 1000, jitter=args.net_jitter / 1000, loss=args.net_loss)
+net_host = net_client = None
+if args.host is not None:
+    net_host = netplay.HostSession(args.host, SIM_RATE, args.tick_rate, **net_conditions)
+    print(f"Hosting on UDP port {args.host}")
+elif args.connect:
+    net_client = netplay.ClientSession(netplay.parse_address(args.connect), SIM_RATE, PADDLE_HEIGHT, SCREEN_HEIGHT,
+                                       args.interpolate_ms, **net_conditions)
+net_session = net_host or net_client
+
+# Spectators (see spectate.py): --broadcast streams this match each tick,
+# --spectate watches one, drawn with the normal drawing code
+SPECTATOR_FIELDS = ("tick", "ball_x", "ball_y", "left_y", "right_y", "left_score", "right_score")
+broadcaster = feed = None
+if args.broadcast is not None:
+    broadcaster = spectate.BroadcastServer("pong", SPECTATOR_FIELDS, ("menu", "playing", "game_over"),
+                                           args.broadcast, args.broadcast_rate)
+    print(f"Broadcasting on TCP port {broadcaster.port}")
+elif args.spectate:
+    feed = spectate.FeedReader(spectate.parse_address(args.spectate, spectate.DEFAULT_PORT), "pong")
+
+def watch_feed():
+    global game_state, left_score, right_score, winner, prev_ball, prev_right, running
+    frame = feed.poll()
+    if feed.closed:
+        print("Broadcast ended")
+        running = False
+    if frame is None:
+        return
+    if frame["state"] == "playing" and "particles" in pending_assets:
+        install_asset("particles")
+    game_state = frame["state"]
+    ball.rect.topleft = prev_ball = (frame["ball_x"], frame["ball_y"])
+    left_paddle.rect.y = frame["left_y"]
+    right_paddle.rect.y = frame["right_y"]
+    prev_right = right_paddle.rect.topleft
+    left_score, right_score = frame["left_score"], frame["right_score"]
+    winner = "Left" if left_score >= 5 else "Right"
+
+# Client tick: predict our paddle, then show the host's state as of a little
+# while ago. Sounds and particles are inferred from how the ball changed.
+def client_tick():
+    global game_state, left_score, right_score, winner, prev_ball, prev_right
+    mouse_y = ball.rect.centery if args.autopilot else controls.mouse[1]
+    net_client.send_input(mouse_y)
+    snapshot = net_client.view()
+    if snapshot is None:
+        return
+    if snapshot["state"] == "playing" and "particles" in pending_assets:
+        install_asset("particles")
+    rally = (snapshot["state"], snapshot["left_score"], snapshot["right_score"]) == (game_state, left_score, right_score)
+    dx, dy = ball.dx, ball.dy
+    prev_ball = ball.rect.topleft if rally else (snapshot["ball_x"], snapshot["ball_y"])
+    prev_right = right_paddle.rect.topleft
+    game_state = snapshot["state"]
+    ball.rect.topleft = (snapshot["ball_x"], snapshot["ball_y"])
+    ball.dx, ball.dy = snapshot["ball_dx"], snapshot["ball_dy"]
+    left_paddle.rect.y = snapshot["left_y"]
+    right_paddle.rect.y = snapshot["right_y"]
+    if game_state == "playing" and rally:
+        if (dx < 0) != (ball.dx < 0):
+            paddle = left_paddle if ball.dx > 0 else right_paddle
+            segment = int((ball.rect.centery - paddle.rect.top) // (PADDLE_HEIGHT / 8))
+            play_sound(f"paddle_{min(max(segment, -1), 8)}")
+            particles.emit(ball.rect.centerx, ball.rect.centery, PARTICLES_PER_HIT)
+        elif (dy < 0) != (ball.dy < 0) and dy and ball.dy:
+            play_sound("wall_bounce")
+    elif (snapshot["left_score"], snapshot["right_score"]) != (left_score, right_score) and game_state != "menu":
+        play_sound("score")
+    left_score, right_score = snapshot["left_score"], snapshot["right_score"]
+    winner = "Host" if left_score >= 5 else "Player"
+    if game_state == "playing":
+        particles.update()
 
 # Game state
 game_state = "menu"
@@ -267,20 +657,44 @@ winner = ""
 
 # Main loop
 running = True
+loading = True
 while running:
+    frame_start = time.perf_counter()
+    frame_profiler.start_frame()
+    if loading:
+        loading = poll_assets()
+
     # Handle events
-    for event in pygame.event.get():
+    events = controls.poll(frame_time)
+    if net_session:
+        net_session.poll()
+    if feed:
+        watch_feed()
+    frame_profiler.mark("events")
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
+        if event.type == pygame.VIDEORESIZE and scaler:
+            scaler.window_resized()
+        if event.type == pygame.KEYDOWN and frame_profiler.handle_key(event.key, args.profile_out or DEFAULT_EXPORT):
+            continue
+        if event.type == pygame.KEYDOWN and (net_client or feed):
+            if event.key == pygame.K_ESCAPE:
+                running = False  # the host runs the match
+            continue
         if event.type == pygame.KEYDOWN:
             if game_state == "menu":
                 if event.key == pygame.K_SPACE:
+                    if "particles" in pending_assets:
+                        install_asset("particles")
                     game_state = "playing"
                     left_score = 0
                     right_score = 0
                     ball.reset()
                     left_paddle.rect.centery = SCREEN_HEIGHT // 2
                     right_paddle.rect.centery = SCREEN_HEIGHT // 2
+                    prev_ball = ball.rect.topleft
+                    prev_right = right_paddle.rect.topleft
                 if event.key == pygame.K_ESCAPE:
                     running = False
             elif game_state == "playing":
@@ -294,118 +708,182 @@ while running:
                     ball.reset()
                     left_paddle.rect.centery = SCREEN_HEIGHT // 2
                     right_paddle.rect.centery = SCREEN_HEIGHT // 2
+                    prev_ball = ball.rect.topleft
+                    prev_right = right_paddle.rect.topleft
                 elif event.key == pygame.K_n:
                     running = False
-
-    # Get controls for playing state
-    if game_state == "playing":
-        # Left paddle: Mouse control
-        mouse_y = pygame.mouse.get_pos()[1]
-        left_paddle.rect.centery = mouse_y
-        if left_paddle.rect.top < 0:
-            left_paddle.rect.top = 0
-        if left_paddle.rect.bottom > SCREEN_HEIGHT:
-            left_paddle.rect.bottom = SCREEN_HEIGHT
-
-        # Right paddle: AI control (track ball y)
-        if right_paddle.rect.centery < ball.rect.centery:
-            right_paddle.move(AI_SPEED)
-        elif right_paddle.rect.centery > ball.rect.centery:
-            right_paddle.move(-AI_SPEED)
-
-        ball.move()
-        ball.bounce_wall()
-        bounced = ball.bounce_paddle(left_paddle) or ball.bounce_paddle(right_paddle)
-        if bounced:
-            for _ in range(20):
-                particles.append(Particle(ball.rect.centerx, ball.rect.centery))
-        left_score, right_score = ball.check_score(left_score, right_score)
-
-        # Check win condition
-        if left_score >= 5 or right_score >= 5:
-            game_state = "game_over"
-            winner = "Player" if left_score >= 5 else "AI"
-
-        for p in particles[:]:
-            p.update()
-            if p.lifetime <= 0:
-                particles.remove(p)
+    frame_profiler.mark("input")
+
+    # Fixed-timestep simulation: as many ticks as the elapsed frame time covers
+    for _ in range(controls.ticks):
+        if starfield is not None and not args.dirty_rects:
+            starfield.update()
+            frame_profiler.mark("effects")
+        if game_state == "menu":
+            flash_timer += 1
+
+        if net_client:
+            client_tick()
+            frame_profiler.mark("physics")
+
+        # Get controls for playing state
+        elif game_state == "playing" and not feed:
+            prev_ball = ball.rect.topleft
+            prev_right = right_paddle.rect.topleft
+
+            # Left paddle: Mouse control
+            mouse_y = ball.rect.centery if args.autopilot else controls.mouse[1]
+            left_paddle.rect.centery = mouse_y
+            if left_paddle.rect.top < 0:
+                left_paddle.rect.top = 0
+            if left_paddle.rect.bottom > SCREEN_HEIGHT:
+                left_paddle.rect.bottom = SCREEN_HEIGHT
+
+            # Right paddle: the network guest, or AI control (track ball y)
+            remote_y = net_host.next_input() if net_host else None
+            if remote_y is not None:
+                right_paddle.rect.y = netplay.apply_input(remote_y, PADDLE_HEIGHT, SCREEN_HEIGHT)
+            elif right_paddle.rect.centery < ball.rect.centery:
+                right_paddle.move(AI_SPEED)
+            elif right_paddle.rect.centery > ball.rect.centery:
+                right_paddle.move(-AI_SPEED)
+
+            bounced = ball.update(left_paddle, right_paddle)
+            if bounced:
+                particles.emit(ball.rect.centerx, ball.rect.centery, PARTICLES_PER_HIT)
+                if ball.dx > 0:
+                    record("returns")
+            scores = (left_score, right_score)
+            left_score, right_score = ball.check_score(left_score, right_score)
+            if (left_score, right_score) != scores:
+                prev_ball = ball.rect.topleft  # served from the center, don't interpolate
+                record("points_scored" if left_score > scores[0] else "points_conceded")
+
+            # Check win condition
+            if left_score >= 5 or right_score >= 5:
+                game_state = "game_over"
+                winner = "Player" if left_score >= 5 else "Guest" if net_host and net_host.connected else "AI"
+                if left_score >= 5:
+                    record("matches_won")
+                    if right_score == 0:
+                        record("shutouts")
+                else:
+                    record("matches_lost")
+
+            frame_profiler.mark("physics")
+            particles.update()
+
+        if net_host:
+            net_host.end_tick(netplay.pack_state(game_state, ball, left_paddle, right_paddle, left_score, right_score))
+        if broadcaster:
+            broadcaster.publish(game_state, (timestep.ticks, ball.rect.x, ball.rect.y, left_paddle.rect.y,
+                                             right_paddle.rect.y, left_score, right_score))
+        frame_profiler.mark("effects")
 
     # Draw background and starfield (common to all states)
-    screen.blit(bg_surface, (0, 0))
-    for star in stars:
-        star.update()
-        star.draw(screen)
+    if starfield is not None and not args.dirty_rects:
+        renderer.sprite("stars", screen_rect, None, starfield.draw, view.scale)
 
     if game_state == "menu":
         # Draw title
-        title_text = title_font.render("PONG", True, WHITE)
-        screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, SCREEN_HEIGHT//4))
+        text_sprite("title", title_font, "PONG", SCREEN_HEIGHT//4)
 
         # Flashing start text
-        flash_timer += 1
         if flash_timer % flash_interval < flash_interval // 2:
-            start_text = small_font.render("Press SPACE to Start", True, WHITE)
-            screen.blit(start_text, (SCREEN_WIDTH//2 - start_text.get_width()//2, SCREEN_HEIGHT//2))
+            if net_client:
+                prompt = "Waiting for the host to start" if net_client.connected else f"Connecting to {args.connect}..."
+            elif feed:
+                prompt = "Spectating - waiting for the match"
+            else:
+                prompt = "Press SPACE to Start"
+            text_sprite("start", small_font, prompt, SCREEN_HEIGHT//2)
+        half = flash_interval // 2
+        pacer.schedule((half - flash_timer % half) / SIM_RATE)  # the prompt's next blink
 
-        quit_text = small_font.render("Press ESC to Quit", True, WHITE)
-        screen.blit(quit_text, (SCREEN_WIDTH//2 - quit_text.get_width()//2, SCREEN_HEIGHT//2 + 60))
+        text_sprite("quit", small_font, "Press ESC to Quit", SCREEN_HEIGHT//2 + 60)
 
     elif game_state == "playing":
-        # Dashed middle line with glow
-        mid_x = SCREEN_WIDTH // 2
-        dash_height = 10
-        space = 10
-        y = 0
-        glow_surf = pygame.Surface((3, dash_height), pygame.SRCALPHA)
-        glow_surf.fill((*GLOW_COLOR, GLOW_ALPHA))
-        while y < SCREEN_HEIGHT:
-            # Glow
-            screen.blit(glow_surf, (mid_x - 1, y))
-            # Line
-            pygame.draw.line(screen, WHITE, (mid_x, y), (mid_x, y + dash_height), 1)
-            y += dash_height + space
+        renderer.sprite("center_line", center_line_rect, 0, draw_center_line)
+
+        # Simulated objects are drawn interpolated between the last two ticks;
+        # the mouse paddle is drawn where it is now to keep input responsive
+        alpha = timestep.alpha
+        right_pos = lerp_point(prev_right, right_paddle.rect.topleft, alpha)
+        ball_rect = pygame.Rect(lerp_point(prev_ball, ball.rect.topleft, alpha), ball.rect.size)
 
         # Draw paddles with glow
-        for paddle in [left_paddle, right_paddle]:
-            # Glow
-            glow_rect = paddle.rect.inflate(10, 10)
-            glow_surf = pygame.Surface((glow_rect.width, glow_rect.height), pygame.SRCALPHA)
-            pygame.draw.rect(glow_surf, (*GLOW_COLOR, GLOW_ALPHA), (0, 0, glow_rect.width, glow_rect.height))
-            screen.blit(glow_surf, glow_rect.topleft)
-            # Paddle
-            pygame.draw.rect(screen, WHITE, paddle.rect)
+        renderer.sprite("left_paddle", left_paddle.rect.inflate(10, 10), left_paddle.rect.topleft, draw_paddle, left_paddle.rect.topleft)
+        renderer.sprite("right_paddle", pygame.Rect(right_pos, right_paddle.rect.size).inflate(10, 10), right_pos, draw_paddle, right_pos)
 
         # Draw ball with glow
-        # Outer glow
-        pygame.draw.circle(screen, (*GLOW_COLOR, GLOW_ALPHA), ball.rect.center, BALL_RADIUS + 5)
-        pygame.draw.circle(screen, (*GLOW_COLOR, GLOW_ALPHA // 2), ball.rect.center, BALL_RADIUS + 10)
-        # Ball
-        pygame.draw.circle(screen, WHITE, ball.rect.center, BALL_RADIUS)
-
-        # Scores
-        left_text = font.render(str(left_score), True, WHITE)
-        right_text = font.render(str(right_score), True, WHITE)
-        screen.blit(left_text, (SCREEN_WIDTH//4, 10))
-        screen.blit(right_text, (3*SCREEN_WIDTH//4, 10))
+        renderer.sprite("ball", ball_rect.inflate(22, 22), ball_rect.center, draw_ball, ball_rect.center)
+
+        # Scores (composed from pre-rendered digit glyphs)
+        left_pos = (SCREEN_WIDTH//4, 10)
+        right_pos = (3*SCREEN_WIDTH//4, 10)
+        renderer.sprite("left_score", pygame.Rect(left_pos, score_digits.size(left_score)), left_score, draw_score, left_score, left_pos)
+        renderer.sprite("right_score", pygame.Rect(right_pos, score_digits.size(right_score)), right_score, draw_score, right_score, right_pos)
 
         # Particles
-        for p in particles:
-            p.draw(screen)
+        particle_rect = particles.bounds()
+        if particle_rect:
+            renderer.sprite("particles", particle_rect, None, particles.draw, view.scale)
 
     elif game_state == "game_over":
         # Draw game over prompt
-        over_text = title_font.render("Game Over!", True, WHITE)
-        screen.blit(over_text, (SCREEN_WIDTH//2 - over_text.get_width()//2, SCREEN_HEIGHT//4))
-
-        winner_text = small_font.render(f"{winner} Wins!", True, WHITE)
-        screen.blit(winner_text, (SCREEN_WIDTH//2 - winner_text.get_width()//2, SCREEN_HEIGHT//2 - 30))
-
-        restart_text = small_font.render("Restart? (Y/N)", True, WHITE)
-        screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, SCREEN_HEIGHT//2 + 30))
-
-    pygame.display.flip()
-    clock.tick(60)
-
+        text_sprite("game_over", title_font, "Game Over!", SCREEN_HEIGHT//4)
+        text_sprite("winner", small_font, f"{winner} Wins!", SCREEN_HEIGHT//2 - 30)
+        text_sprite("restart", small_font, "Waiting for the host..." if net_client or feed else "Restart? (Y/N)", SCREEN_HEIGHT//2 + 30)
+
+    if frame_profiler.visible:
+        renderer.sprite("profiler", profile_rect, None, draw_profiler)
+    frame_profiler.mark("submit")
+
+    renderer.draw()
+    frame_profiler.mark("draw")
+    if bloom:
+        bloom.apply(renderer.screen)
+        frame_profiler.mark("effects")
+    renderer.present()
+    if frame_capture:
+        frame_capture.frame(pygame.display.get_surface())
+    frame_profiler.mark("present")
+    if not audio_ready:
+        startup.mark("first frame")
+        init_audio()
+        loader.start()
+    if scaler:
+        scaler.update(time.perf_counter() - frame_start)
+    if loading or net_session or feed or frame_profiler.visible:
+        pacer.schedule(0)  # these need every frame, idle screen or not
+    elif starfield is not None and not args.dirty_rects:
+        pacer.schedule(1 / IDLE_STARFIELD_FPS)
+    frame_time = pacer.wait(game_state)
+    frame_profiler.mark("wait")
+
+controls.close()
+loader.shutdown()
+trophies.close()
+if frame_capture:
+    frame_capture.close()
+    print(frame_capture.summary())
+if net_session:
+    net_session.close()
+if broadcaster:
+    broadcaster.close()
+    print(broadcaster.summary())
+if feed:
+    feed.close()
+    print(f"Spectated {feed.frames} frames")
+if args.profile_out:
+    frame_profiler.export(args.profile_out)
+if scaler and scaler.changes:
+    print(f"Render resolution changed {scaler.changes} times, ending at {scaler.describe()}")
+if pacer.adaptive:
+    print(pacer.summary())
+if bloom:
+    print(bloom.summary())
+if replay_reader:
+    print(f"Replay finished: {controls.frames} frames, {timestep.ticks} ticks, score {left_score}-{right_score}, state {game_state}")
 pygame.quit()
 sys.exit(0)